@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Typed columnar snapshot of the trades table for the analysis scripts.
+
+    python analytics.py --db trades_vps.db        # build / refresh the snapshot
+    df = load_trades("trades_vps.db", status="closed")
+
+One .npy file per column under analytics/<db name>/gen-N/:
+  prices / pnl / qty ...        float64 (NULL and junk -> 0, like to_numeric(...).fillna(0))
+  time / exit_time / updated_at datetime64[ms] (UTC epoch ms, NaT when missing;
+                                naive values are host-local time, as the scripts read them)
+  symbol / strategy / side / status  int8/16/32 codes (pandas' width for the category
+                                count), categories in meta.json (-1 = NULL)
+Refreshes read only the rows changed since the last one (updated_at cursor,
+see export.py) and publish a new generation by swapping meta.json, so a reader
+never sees a half-written snapshot. load_trades() memory-maps the columns
+(copy-on-write) instead of parsing SQL rows again: numeric, time and category
+columns are used in place; only the id strings are converted by pandas.
+"""
+import os
+import sys
+import json
+import shutil
+import sqlite3
+import argparse
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from models import TRADE_COLUMNS, DEFAULTS
+from export import encode_change_cursor, decode_change_cursor, rewind_cursor
+
+ANALYTICS_DIR = os.environ.get("ANALYTICS_DIR", "analytics")
+SNAPSHOT_VERSION = 2  # 2: naive timestamps read as local time
+
+TIME_COLUMNS = ("time", "exit_time", "updated_at")
+CATEGORY_COLUMNS = ("symbol", "strategy", "side", "status")
+FLOAT_COLUMNS = tuple(c for c in TRADE_COLUMNS if isinstance(DEFAULTS[c], float))
+
+
+def snapshot_dir(db_path: str, root: str = ANALYTICS_DIR) -> str:
+    return os.path.join(root, os.path.splitext(os.path.basename(db_path))[0])
+
+
+def _read_meta(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(path, "meta.json")) as fh:
+            meta = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get("version") == SNAPSHOT_VERSION else None
+
+
+# ------------------------
+# SOURCE ROWS
+# ------------------------
+def _source_columns(conn) -> List[str]:
+    return [r[1] for r in conn.execute("PRAGMA table_info(trades)")]
+
+
+def _fetch(conn, cursor: Optional[str]) -> pd.DataFrame:
+    """Changed rows after `cursor` (all rows when None), marks overlaid if present."""
+    present = set(_source_columns(conn))
+    has_marks = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'trade_marks'").fetchone()
+    if has_marks and "updated_at" in present:
+        from database import trade_select, CHANGED_AT
+        sql = trade_select([c for c in TRADE_COLUMNS if c in present])
+        params: tuple = ()
+        if cursor:
+            since, after_id = decode_change_cursor(cursor)
+            sql += (" WHERE (t.updated_at >= ? OR t.id IN (SELECT trade_id FROM trade_marks WHERE updated_at >= ?))"
+                    f" AND ({CHANGED_AT}, t.id) > (?, ?)")
+            params = (since, since, since, after_id)
+    else:
+        # Old copies / replicas: no marks overlay, no change tracking
+        sql = "SELECT " + ", ".join(c for c in TRADE_COLUMNS if c in present) + " FROM trades"
+        params = ()
+        if cursor and "updated_at" in present:
+            since, after_id = decode_change_cursor(cursor)
+            sql += " WHERE (updated_at, id) > (?, ?)"
+            params = (since, after_id)
+    cur = conn.execute(sql, params)
+    return pd.DataFrame.from_records(cur.fetchall(), columns=[d[0] for d in cur.description])
+
+
+_OFFSET = r"(?:Z|[+-]\d{2}:?\d{2})$"
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MS = timedelta(milliseconds=1)
+
+
+def _parse_times(col: pd.Series) -> np.ndarray:
+    """
+    ISO strings -> datetime64[ms] UTC. Values with an offset convert exactly.
+    Naive ones (rows written with datetime.now()) are host-local time, read the
+    way the scripts always did: datetime.fromisoformat(s).timestamp()
+    (truncated to ms like the aware ones).
+    """
+    s = col.astype("string")
+    aware = s.str.contains(_OFFSET, regex=True, na=False).to_numpy(bool)
+    ts = pd.to_datetime(s.where(aware), utc=True, format="ISO8601", errors="coerce")
+    out = np.array(ts.dt.tz_localize(None).to_numpy("datetime64[ms]"), copy=True)
+    for i in np.flatnonzero(~aware & s.notna().to_numpy(bool)):
+        try:
+            local = datetime.fromisoformat(s.iloc[i]).astimezone(timezone.utc)
+            out[i] = np.datetime64((local - _EPOCH) // _MS, "ms")
+        except ValueError:
+            pass  # junk stays NaT
+    return out
+
+
+def _encode(df: pd.DataFrame, categories: Dict[str, List[str]]) -> Dict[str, np.ndarray]:
+    """SQL rows -> typed column arrays (extends `categories` in place)."""
+    n = len(df)
+    out = {"id": df["id"].astype(str).to_numpy(dtype=str)}
+    for c in FLOAT_COLUMNS:
+        col = df[c] if c in df else pd.Series(np.zeros(n))
+        out[c] = pd.to_numeric(col, errors="coerce").fillna(0).to_numpy(np.float64)
+    for c in TIME_COLUMNS:
+        if c in df:
+            out[c] = _parse_times(df[c])
+        else:
+            out[c] = np.full(n, np.datetime64("NaT"), dtype="datetime64[ms]")
+    for c in CATEGORY_COLUMNS:
+        cats = categories.setdefault(c, [])
+        index = {v: i for i, v in enumerate(cats)}
+        codes = np.full(n, -1, dtype=np.int32)
+        if c in df:
+            for i, v in enumerate(df[c].to_numpy()):
+                if v is None or v != v:
+                    continue
+                if v not in index:
+                    index[v] = len(cats)
+                    cats.append(v)
+                codes[i] = index[v]
+        out[c] = codes
+    out["trail_active"] = (pd.to_numeric(df.get("trail_active", pd.Series(np.zeros(n))), errors="coerce")
+                           .fillna(0).to_numpy() != 0)
+    out["is_partial"] = (pd.to_numeric(df.get("is_partial", pd.Series(np.zeros(n))), errors="coerce")
+                         .fillna(0).to_numpy(np.int8))
+    return out
+
+
+def _code_dtype(n_categories: int):
+    """The code width pandas.Categorical uses for n categories (stored as-is: no copy on load)."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _merge(old: Dict[str, np.ndarray], new: Dict[str, np.ndarray]):
+    """
+    Upsert `new` rows into `old` by id (updates in place, inserts appended).
+    Returns (columns, rows that actually differ).
+    """
+    pos = {v: i for i, v in enumerate(old["id"].tolist())}
+    at = np.array([pos.get(v, -1) for v in new["id"].tolist()], dtype=np.int64)
+    upd, ins = at >= 0, at < 0
+    differs = np.zeros(int(upd.sum()), dtype=bool)
+    merged = {}
+    for c, arr in old.items():
+        # Materialize the mmap before writing a new generation (codes widen back to int32)
+        col = np.array(arr, dtype=new[c].dtype if c in CATEGORY_COLUMNS else None)
+        if c != "id":
+            before, after = col[at[upd]], new[c][upd]
+            if before.dtype.kind == "M":  # NaT != NaT
+                before, after = before.view(np.int64), after.view(np.int64)
+            differs |= before != after
+            col[at[upd]] = new[c][upd]
+        merged[c] = np.concatenate([col, new[c][ins]])
+    return merged, int(differs.sum() + ins.sum())
+
+
+# ------------------------
+# SNAPSHOT
+# ------------------------
+def refresh(db_path: str = "trades.db", root: str = ANALYTICS_DIR, rebuild: bool = False) -> Dict[str, Any]:
+    """Bring the snapshot of `db_path` up to date. Returns its meta (with `changed`)."""
+    path = snapshot_dir(db_path, root)
+    meta = None if rebuild else _read_meta(path)
+    conn = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True)
+    try:
+        incremental = bool(meta and meta.get("cursor"))
+        df = _fetch(conn, rewind_cursor(meta["cursor"]) if incremental else None)
+    finally:
+        conn.close()
+
+    if incremental and df.empty:
+        meta["changed"] = 0
+        return meta
+
+    categories = meta["categories"] if incremental else {}
+    cols = _encode(df, categories)
+    changed = len(df)
+    if incremental:
+        # The rewound window re-reads rows already ingested; publish only real changes
+        cols, changed = _merge(_open_columns(path, meta), cols)
+        if not changed:
+            meta["changed"] = 0
+            return meta
+
+    cursor = None
+    if "updated_at" in df and not df.empty:
+        last = df.sort_values(["updated_at", "id"], na_position="first").iloc[-1]
+        cursor = encode_change_cursor(last["updated_at"] or "", last["id"])
+    if incremental and cursor is None:
+        cursor = meta["cursor"]
+    elif incremental:
+        cursor = max(cursor, meta["cursor"], key=decode_change_cursor)
+
+    gen = (meta["generation"] + 1) if meta else 1
+    gen_dir = os.path.join(path, f"gen-{gen}")
+    shutil.rmtree(gen_dir, ignore_errors=True)
+    os.makedirs(gen_dir)
+    for c, arr in cols.items():
+        if c in CATEGORY_COLUMNS:
+            arr = arr.astype(_code_dtype(len(categories.get(c, []))))
+        np.save(os.path.join(gen_dir, f"{c}.npy"), arr)
+    out = {
+        "version": SNAPSHOT_VERSION,
+        "source": os.path.abspath(db_path),
+        "generation": gen,
+        "rows": int(len(cols["id"])),
+        "cursor": cursor,
+        "categories": categories,
+    }
+    tmp = os.path.join(path, "meta.json.tmp")
+    with open(tmp, "w") as fh:
+        json.dump(out, fh)
+    os.replace(tmp, os.path.join(path, "meta.json"))  # publish
+    for name in os.listdir(path):
+        if name.startswith("gen-") and name != f"gen-{gen}":
+            shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+    out["changed"] = changed
+    return out
+
+
+def _open_columns(path: str, meta: Dict[str, Any], mmap_mode: str = "c") -> Dict[str, np.ndarray]:
+    gen_dir = os.path.join(path, f"gen-{meta['generation']}")
+    return {c: np.load(os.path.join(gen_dir, f"{c}.npy"), mmap_mode=mmap_mode) for c in TRADE_COLUMNS}
+
+
+def load_trades(db_path: str = "trades.db", status: Optional[str] = None,
+                refresh_first: bool = True, root: str = ANALYTICS_DIR) -> pd.DataFrame:
+    """
+    Trades as a typed DataFrame backed by memory-mapped columns (copy-on-write:
+    scripts may modify it without touching the snapshot). Only the `status`
+    filter copies.
+    """
+    path = snapshot_dir(db_path, root)
+    meta = _read_meta(path)
+    if meta is None or (refresh_first and os.path.exists(db_path)):
+        meta = refresh(db_path, root)
+    cols = _open_columns(path, meta)
+    data = {}
+    for c in TRADE_COLUMNS:
+        if c in CATEGORY_COLUMNS:
+            data[c] = pd.Categorical.from_codes(cols[c], categories=meta["categories"].get(c, []))
+        else:
+            data[c] = cols[c]
+    df = pd.DataFrame(data, copy=False)
+    if status is not None:
+        df = df[df["status"] == status].reset_index(drop=True)
+    return df
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Build or refresh the columnar trades snapshot.")
+    ap.add_argument("--db", default="trades.db")
+    ap.add_argument("--root", default=ANALYTICS_DIR)
+    ap.add_argument("--rebuild", action="store_true", help="Ignore the existing snapshot")
+    args = ap.parse_args(argv)
+    meta = refresh(args.db, args.root, args.rebuild)
+    print(f"✅ {snapshot_dir(args.db, args.root)}: {meta['rows']} rows "
+          f"({meta['changed']} changed, generation {meta['generation']})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
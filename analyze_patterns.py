@@ -1,9 +1,9 @@
 
-import sqlite3
 import pandas as pd
 import ccxt
 import time
-from datetime import datetime
+
+from analytics import load_trades
 
 def calculate_rsi(series, period=14):
     delta = series.diff()
@@ -16,15 +16,13 @@ def calculate_ema(series, span):
     return series.ewm(span=span, adjust=False).mean()
 
 def analyze_patterns():
-    conn = sqlite3.connect('trades_vps_latest.db')
-    df_trades = pd.read_sql_query("SELECT * FROM trades WHERE status='closed'", conn)
+    df_trades = load_trades('trades_vps_latest.db', status='closed')
     
     if df_trades.empty:
         print("No closed trades found.")
         return
 
     # Sort by PnL
-    df_trades['pnl'] = pd.to_numeric(df_trades['pnl'])
     df_trades = df_trades.sort_values('pnl', ascending=False)
     
     # Top 5 Winners & Bottom 5 Losers
@@ -42,16 +40,8 @@ def analyze_patterns():
     for i, row in targets.iterrows():
         try:
             symbol = row['symbol']
-            entry_time_str = row['time']
             pnl = row['pnl']
-            
-             # Parse time
-            try:
-                dt_entry = datetime.fromisoformat(entry_time_str)
-            except:
-                dt_entry = datetime.strptime(entry_time_str, "%Y-%m-%dT%H:%M:%S.%f")
-
-            ts_entry = int(dt_entry.timestamp() * 1000)
+            ts_entry = int(row['time'].value // 10**6)  # epoch ms
             since = ts_entry - (24 * 60 * 60 * 1000)
             
             ohlcv = ex.fetch_ohlcv(symbol, '15m', since=since, limit=100)
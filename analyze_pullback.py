@@ -1,17 +1,17 @@
 
-import sqlite3
 import pandas as pd
 import ccxt.base.exchange
 import ccxt
 import time
 from datetime import datetime, timezone, timedelta
 
+from analytics import load_trades
+
 def calculate_ema(series, span):
     return series.ewm(span=span, adjust=False).mean()
 
 def analyze_pullbacks():
-    conn = sqlite3.connect('trades_vps_latest.db')
-    df_trades = pd.read_sql_query("SELECT * FROM trades", conn)
+    df_trades = load_trades('trades_vps_latest.db')
 
     if df_trades.empty:
         print("No trades found.")
@@ -28,16 +28,9 @@ def analyze_pullbacks():
     for i, row in df_trades.iterrows():
         try:
             symbol = row['symbol']
-            entry_time_str = row['time'] # ISO Format
-            
-            # Parse time
-            try:
-                dt_entry = datetime.fromisoformat(entry_time_str)
-            except:
-                dt_entry = datetime.strptime(entry_time_str, "%Y-%m-%dT%H:%M:%S.%f") # Manual Fallback
-            
+
             # Timestamp (ms)
-            ts_entry = int(dt_entry.timestamp() * 1000)
+            ts_entry = int(row['time'].value // 10**6)
             
             # Fetch OHLCV surrounding this time
             # We need at least 50 candles BEFORE to calc EMA
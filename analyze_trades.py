@@ -1,25 +1,18 @@
 
-import sqlite3
 import pandas as pd
 from datetime import datetime
 
+from analytics import load_trades
+
 def analyze():
     # [FIX] Analyze the FRESH database downloaded from VPS
-    conn = sqlite3.connect('trades_new.db')
-    
-    # Load ALL trades
-    query = "SELECT * FROM trades"
-    df = pd.read_sql_query(query, conn)
+    # Load ALL trades (typed columnar snapshot, see analytics.py)
+    df = load_trades('trades_new.db')
     
     if df.empty:
         print("No trades found.")
         return
 
-    # Convert numeric columns
-    numeric_cols = ['pnl', 'used_usd', 'entry_price', 'exit_price', 'fees_usd', 'unrealized_pnl', 'qty']
-    for col in numeric_cols:
-        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-
     # Filter by Status
     closed_trades = df[df['status'] == 'closed']
     open_trades = df[df['status'] == 'open']
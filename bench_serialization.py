@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark /trades and /history response serialization.
+
+    python bench_serialization.py              # 10k trade rows, 10k candles
+    python bench_serialization.py --rows 50000 --repeat 5
+
+Compares the old path (jsonable_encoder + stdlib json, iterrows for
+/history) with serialization.py (orjson when installed, per-field rounding)
+and chart_series.py, and reports body size and gzip / brotli cost.
+"""
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import statistics
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+
+import serialization
+from serialization import dumps, round_rows, compress
+from chart_series import ChartSeries
+from models import TRADE_COLUMNS
+
+
+def trade_rows(n, seed=42):
+    rnd = random.Random(seed)
+    t0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for i in range(n):
+        entry = rnd.uniform(0.00001, 100)
+        qty = 10 / entry
+        t = t0 + timedelta(minutes=i)
+        exit_price = entry * rnd.uniform(0.97, 1.05)
+        rows.append({
+            "id": str(uuid.UUID(int=rnd.getrandbits(128))), "time": t.isoformat(),
+            "symbol": f"C{i % 400}/USDT", "side": "buy", "strategy": "SMC_5EMA_Reclaim",
+            "entry_price": entry, "qty": qty, "used_usd": 10.0, "status": "closed",
+            "pnl": (exit_price - entry) * qty, "sl": entry * 0.98, "tp": entry * 1.04,
+            "exit_price": exit_price, "exit_time": (t + timedelta(hours=2)).isoformat(),
+            "current_price": exit_price, "unrealized_pnl": 0.0, "fees_usd": 0.02,
+            "highest_price": entry * 1.02, "trail_active": 0, "trail_sl": 0.0, "is_partial": 0,
+            "updated_at": (t + timedelta(hours=2)).isoformat(),
+        })
+    assert set(rows[0]) == set(TRADE_COLUMNS)
+    return rows
+
+
+def candles(n, seed=7):
+    rnd = random.Random(seed)
+    price, out = 100.0, []
+    for i in range(n):
+        o = price
+        price *= 1 + rnd.uniform(-0.01, 0.01)
+        out.append([1_700_000_000_000 + i * 900_000, o, max(o, price) * 1.002, min(o, price) * 0.998, price, 5.0])
+    return out
+
+
+def stdlib_render(content):
+    """What FastAPI did before: jsonable_encoder, then JSONResponse.render."""
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode()
+
+
+def history_iterrows(ohlcv):
+    """The original /history body."""
+    df_hist = pd.DataFrame(ohlcv, columns=['time', 'open', 'high', 'low', 'close', 'volume'])
+    df_hist['ema5'] = df_hist['close'].ewm(span=5, adjust=False).mean()
+    df_hist['ema50'] = df_hist['close'].ewm(span=50, adjust=False).mean()
+    delta = df_hist['close'].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rs = gain / (loss.replace(0, 0.0001))
+    df_hist['rsi'] = 100 - (100 / (1 + rs))
+    candle_rows, ema5, ema50, rsi = [], [], [], []
+    for i, row in df_hist.iterrows():
+        t_sec = int(row['time'] / 1000)
+        candle_rows.append({"time": t_sec, "open": row['open'], "high": row['high'],
+                            "low": row['low'], "close": row['close']})
+        if not pd.isna(row['ema5']):
+            ema5.append({"time": t_sec, "value": row['ema5']})
+        if not pd.isna(row['ema50']):
+            ema50.append({"time": t_sec, "value": row['ema50']})
+        if not pd.isna(row['rsi']):
+            rsi.append({"time": t_sec, "value": row['rsi']})
+    return {"candles": candle_rows, "ema20": ema5, "ema5": ema5, "ema50": ema50, "rsi": rsi}
+
+
+def timed(fn, repeat):
+    samples, out = [], None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        out = fn()
+        samples.append((time.perf_counter() - t) * 1000)
+    return statistics.median(samples), out
+
+
+def report(name, ms, body, baseline=None):
+    speedup = f"{baseline / ms:>6.1f}x" if baseline else f"{'':>7}"
+    print(f"  {name:<44} {ms:>9.2f} ms {speedup} {len(body) / 1024:>9.1f} KB")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=10_000)
+    ap.add_argument("--repeat", type=int, default=15)
+    args = ap.parse_args()
+    encoder = "orjson" if serialization.orjson is not None else "stdlib json (orjson not installed)"
+    print(f"Encoder: {encoder}; brotli: {'yes' if serialization.brotli is not None else 'not installed'}")
+
+    rows = trade_rows(args.rows)
+    print(f"\n/trades, {args.rows:,} rows{'':<22} {'median':>12} {'speedup':>7} {'body':>12}")
+    base_ms, base = timed(lambda: stdlib_render(rows), args.repeat)
+    report("jsonable_encoder + json (before)", base_ms, base)
+    ms, body = timed(lambda: dumps(rows), args.repeat)
+    report("dumps", ms, body, base_ms)
+    ms, trades_body = timed(lambda: dumps(round_rows(rows)), args.repeat)
+    report("round_rows + dumps (now)", ms, trades_body, base_ms)
+
+    ohlcv = candles(args.rows)
+    print(f"\n/history, {args.rows:,} candles")
+    base_ms, base = timed(lambda: stdlib_render(history_iterrows(ohlcv)), max(3, args.repeat // 5))
+    report("iterrows + jsonable_encoder + json (before)", base_ms, base)
+    ms, _ = timed(lambda: ChartSeries(ohlcv).columns_json().encode(), args.repeat)
+    report("new bar: ChartSeries build + columns", ms, ChartSeries(ohlcv).columns_json().encode(), base_ms)
+    series = ChartSeries(ohlcv)
+    live = list(ohlcv[-1])
+
+    def hit():
+        live[4] *= 1.0001
+        series.update_live(live)
+        return series.columns_json().encode()
+
+    ms, history_body = timed(hit, args.repeat)
+    report("same bar: live tail + columns (now)", ms, history_body, base_ms)
+    ms, body = timed(lambda: dumps(series.rows()), args.repeat)
+    report("format=rows via dumps", ms, body, base_ms)
+
+    print("\nCompression")
+    encodings = ["gzip"] + (["br"] if serialization.brotli is not None else [])
+    for name, body in (("/trades", trades_body), ("/history", history_body)):
+        for enc in encodings:
+            ms, out = timed(lambda: compress(body, enc), args.repeat)
+            print(f"  {name:<10} {enc:<5} {ms:>9.2f} ms  {len(body) / 1024:>8.1f} KB -> {len(out) / 1024:>7.1f} KB "
+                  f"({len(out) / len(body):.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark the hot trade queries on a large synthetic trades table.
+
+    python bench_trades_db.py              # 1M rows, temp file
+    python bench_trades_db.py --rows 200000 --keep bench.db
+
+Builds the table with the production schema (Database.init_db), prints the
+query plan of every hot query and fails (exit 1) if any median exceeds the
+budget.
+"""
+import os
+import sys
+import time
+import uuid
+import random
+import sqlite3
+import asyncio
+import argparse
+import tempfile
+import statistics
+from datetime import datetime, timedelta, timezone
+
+from database import Database, TRADE_SELECT
+
+BUDGET_MS = 1.0
+
+def generate(path, rows, open_count, seed=42):
+    rnd = random.Random(seed)
+    symbols = [f"C{i}/USDT" for i in range(400)]
+    strategies = ["SMC_5EMA_Reclaim", "Manual_Import", "SMC_SMC"]
+    t0 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    def row(i):
+        entry = rnd.uniform(0.01, 100)
+        is_open = i >= rows - open_count
+        t = t0 + timedelta(seconds=i * 60)
+        return (
+            str(uuid.UUID(int=rnd.getrandbits(128))), t.isoformat(), rnd.choice(symbols), "buy",
+            rnd.choice(strategies), entry, 10 / entry, 10.0, "open" if is_open else "closed",
+            0.0 if is_open else rnd.uniform(-1, 1), entry * 0.98, entry * 1.04,
+            0.0 if is_open else entry * 1.01, None if is_open else (t + timedelta(hours=2)).isoformat(),
+            entry, 0.0, 0.02, entry * 1.02, 0, 0.0, 0,
+        )
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS trades (
+            id TEXT PRIMARY KEY, time TEXT, symbol TEXT, side TEXT, strategy TEXT,
+            entry_price REAL, qty REAL, used_usd REAL, status TEXT, pnl REAL, sl REAL, tp REAL,
+            exit_price REAL, exit_time TEXT, current_price REAL, unrealized_pnl REAL,
+            fees_usd REAL, highest_price REAL, trail_active INTEGER, trail_sl REAL,
+            is_partial INTEGER DEFAULT 0
+        )
+    """)
+    batch = 50_000
+    for start in range(0, rows, batch):
+        conn.executemany(f"INSERT INTO trades VALUES ({','.join('?' * 21)})",
+                         (row(i) for i in range(start, min(rows, start + batch))))
+        conn.commit()
+    conn.close()
+    return symbols, strategies
+
+
+def timed(conn, sql, params, repeat):
+    samples = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        samples.append((time.perf_counter() - t) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--open", type=int, default=12)
+    ap.add_argument("--repeat", type=int, default=200)
+    ap.add_argument("--keep", default=None, help="Keep the generated DB at this path")
+    args = ap.parse_args()
+
+    path = args.keep or os.path.join(tempfile.mkdtemp(prefix="bench_"), "bench.db")
+    print(f"Generating {args.rows:,} trades -> {path}")
+    t = time.perf_counter()
+    _, strategies = generate(path, args.rows, args.open)
+    print(f"  generated in {time.perf_counter() - t:.1f}s")
+
+    async def migrate():
+        database = Database(path)
+        await database.init_db()
+        await database.close()
+
+    t = time.perf_counter()
+    asyncio.run(migrate())
+    print(f"  init_db (index build) in {time.perf_counter() - t:.1f}s")
+
+    conn = sqlite3.connect(path)
+    open_row = conn.execute("SELECT id, symbol, strategy FROM trades WHERE status = 'open' LIMIT 1").fetchone()
+    mid_row = conn.execute("SELECT time, id FROM trades ORDER BY time DESC, id DESC LIMIT 1 OFFSET ?",
+                           (args.rows // 2,)).fetchone()
+    recent = conn.execute("SELECT MAX(updated_at) FROM trades").fetchone()[0]
+    # Open trades carry a trade_marks row, like in production
+    conn.execute("INSERT OR REPLACE INTO trade_marks SELECT id, current_price * 1.01, 0.1, highest_price, time "
+                 "FROM trades WHERE status = 'open'")
+    conn.commit()
+
+    queries = [
+        ("get_trade", f"{TRADE_SELECT} WHERE t.id = ?", (open_row[0],)),
+        ("get_open_trades", f"{TRADE_SELECT} WHERE t.status = 'open'", ()),
+        ("get_all_trades_desc(100)", f"{TRADE_SELECT} ORDER BY t.time DESC, t.id DESC LIMIT ?", (100,)),
+        ("get_trades_page(100, deep cursor)",
+         f"{TRADE_SELECT} WHERE (t.time, t.id) < (?, ?) ORDER BY t.time DESC, t.id DESC LIMIT ?",
+         (*mid_row, 100)),
+        ("get_trades_changed_since",
+         f"{TRADE_SELECT} WHERE t.updated_at > ? OR t.id IN "
+         "(SELECT trade_id FROM trade_marks WHERE updated_at > ?) ORDER BY updated_at, t.id LIMIT ?",
+         (recent, recent, 500)),
+        ("get_trades_by_status_symbol_strategy",
+         f"{TRADE_SELECT} WHERE t.status = ? AND t.symbol = ? AND t.strategy = ?",
+         ("open", open_row[1], open_row[2])),
+    ]
+
+    failed = False
+    print(f"\n{'Query':<40} {'median ms':>10}  Plan")
+    print("-" * 100)
+    for name, sql, params in queries:
+        plan = " | ".join(r[3] for r in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+        ms = timed(conn, sql, params, args.repeat)
+        ok = ms < BUDGET_MS
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} {name:<38} {ms:>10.3f}  {plan}")
+
+    # Not a hot path: returns every row of a strategy, so it is O(result)
+    plan = " | ".join(r[3] for r in conn.execute(
+        f"EXPLAIN QUERY PLAN {TRADE_SELECT} WHERE t.strategy = ?", (strategies[0],)))
+    print(f"ℹ️  {'get_trades_by_strategy (O(result))':<38} {'-':>10}  {plan}")
+
+    conn.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+import os
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+# ------------------------
+# LOCAL 1M CANDLE STORE
+# ------------------------
+# One .npy file per symbol per UTC day: float64 array of shape (n, 6)
+# with columns [ts, open, high, low, close, vol] (ccxt OHLCV layout).
+# Completed days are immutable and never refetched; the current day is
+# always refetched so the store never serves a truncated day as final.
+
+CANDLE_DIR = os.environ.get("CANDLE_DIR", "candles_1m")
+DAY_MS = 24 * 3600 * 1000
+MINUTE_MS = 60 * 1000
+
+COLUMNS = ("ts", "open", "high", "low", "close", "vol")
+
+
+class CandleStore:
+    def __init__(self, root=CANDLE_DIR, exchange=None):
+        self.root = root
+        self.exchange = exchange  # sync ccxt instance, only needed for missing days
+
+    def _path(self, symbol, day_start_ms):
+        day = datetime.fromtimestamp(day_start_ms / 1000, timezone.utc).strftime("%Y-%m-%d")
+        return os.path.join(self.root, symbol.replace("/", "_"), f"{day}.npy")
+
+    def _fetch_day(self, symbol, day_start_ms):
+        if self.exchange is None:
+            return np.empty((0, 6))
+
+        rows = []
+        since = day_start_ms
+        day_end = day_start_ms + DAY_MS
+        while since < day_end:
+            batch = self.exchange.fetch_ohlcv(symbol, "1m", since=since, limit=1000)
+            if not batch:
+                break
+            rows.extend(r for r in batch if r[0] < day_end)
+            last_ts = batch[-1][0]
+            if last_ts < since:
+                break
+            since = last_ts + MINUTE_MS
+            if len(batch) < 1000:
+                break
+            time.sleep(self.exchange.rateLimit / 1000)
+
+        return np.asarray(rows, dtype=np.float64).reshape(-1, 6)
+
+    def load_day(self, symbol, day_start_ms):
+        path = self._path(symbol, day_start_ms)
+        day_complete = (day_start_ms + DAY_MS) <= int(time.time() * 1000)
+
+        if day_complete and os.path.exists(path):
+            return np.load(path, mmap_mode="r")
+
+        arr = self._fetch_day(symbol, day_start_ms)
+        if day_complete and len(arr):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            np.save(path, arr)
+        return arr
+
+    def get(self, symbol, start_ms, end_ms):
+        """
+        1m candles for symbol with open time in [start_ms, end_ms).
+        Returns a (n, 6) float64 array sorted by ts.
+        """
+        first_day = (int(start_ms) // DAY_MS) * DAY_MS
+        parts = [self.load_day(symbol, d) for d in range(first_day, int(end_ms), DAY_MS)]
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return np.empty((0, 6))
+
+        arr = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        lo = np.searchsorted(arr[:, 0], start_ms, side="left")
+        hi = np.searchsorted(arr[:, 0], end_ms, side="left")
+        return arr[lo:hi]
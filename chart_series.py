@@ -0,0 +1,155 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from serialization import dumps, decimals
+
+# ------------------------
+# CHART SERIES CACHE (/history)
+# ------------------------
+# One entry per (symbol, interval): OHLC columns plus EMA5 / EMA50 / RSI14,
+# computed column-wise when the fetched window starts a new candle. While the
+# last candle's timestamp is unchanged (every poll inside one bar) only that
+# live candle and its indicator tail are recomputed: the EMAs from the
+# previous bar's value, the RSI from the 13 closed deltas before it. The
+# closed bars' JSON is rendered once per bar and reused as a prefix.
+#
+# Columnar payload (default): parallel arrays, null where an indicator has
+# no value yet (RSI's first 13 bars):
+#   {"time": [...], "open": [...], "high": [...], "low": [...], "close": [...],
+#    "ema5": [...], "ema50": [...], "rsi": [...]}
+# rows(): the original {"candles": [{time, open, ...}], "ema5": [{time, value}], ...}
+
+EMA_FAST = 5
+EMA_SLOW = 50
+RSI_WINDOW = 14
+SERIES = ("time", "open", "high", "low", "close", "ema5", "ema50", "rsi")
+
+
+def _alpha(span: int) -> float:
+    return 2.0 / (span + 1)
+
+
+def _rsi(gain: np.ndarray, loss: np.ndarray) -> np.ndarray:
+    avg_gain = pd.Series(gain).rolling(window=RSI_WINDOW).mean().to_numpy()
+    avg_loss = pd.Series(loss).rolling(window=RSI_WINDOW).mean().to_numpy()
+    rs = avg_gain / np.where(avg_loss == 0, 0.0001, avg_loss)
+    return 100 - (100 / (1 + rs))
+
+
+def _rounded(name: str, values):
+    """Per-field precision from serialization.FIELD_DECIMALS (NaN stays NaN)."""
+    dec = decimals(name)
+    return np.round(values, dec) if dec is not None and name != "time" else values
+
+
+def _json_list(values: np.ndarray) -> str:
+    return dumps(values).decode()  # NaN -> null
+
+
+class ChartSeries:
+    def __init__(self, ohlcv: List[list]):
+        arr = np.asarray(ohlcv, dtype=np.float64).reshape(-1, 6)
+        close = arr[:, 4]
+        self.cols: Dict[str, np.ndarray] = {
+            "time": (arr[:, 0] / 1000).astype(np.int64),
+            "open": arr[:, 1].copy(),
+            "high": arr[:, 2].copy(),
+            "low": arr[:, 3].copy(),
+            "close": close.copy(),
+            "ema5": pd.Series(close).ewm(span=EMA_FAST, adjust=False).mean().to_numpy(copy=True),
+            "ema50": pd.Series(close).ewm(span=EMA_SLOW, adjust=False).mean().to_numpy(copy=True),
+        }
+        delta = np.diff(close, prepend=np.nan)
+        self.gain = np.where(delta > 0, delta, 0.0)
+        self.loss = np.where(delta < 0, -delta, 0.0)
+        self.cols["rsi"] = _rsi(self.gain, self.loss)
+        self.last_ts = int(arr[-1, 0]) if len(arr) else None
+        self.version = 0
+        # Closed bars rendered once: "[v0,...,v(n-2)" per series
+        self._prefix = {k: _json_list(_rounded(k, v[:-1]))[:-1] for k, v in self.cols.items()}
+
+    def __len__(self):
+        return len(self.cols["time"])
+
+    def update_live(self, candle: list) -> bool:
+        """Recompute only the live (last) candle and its indicators. False if unchanged."""
+        n = len(self)
+        i = n - 1
+        o, h, l, c = (float(x) for x in candle[1:5])
+        cols = self.cols
+        if (cols["open"][i], cols["high"][i], cols["low"][i], cols["close"][i]) == (o, h, l, c):
+            return False
+        cols["open"][i], cols["high"][i], cols["low"][i], cols["close"][i] = o, h, l, c
+        if n == 1:
+            cols["ema5"][i] = cols["ema50"][i] = c
+            return True
+        for name, span in (("ema5", EMA_FAST), ("ema50", EMA_SLOW)):
+            a = _alpha(span)
+            cols[name][i] = a * c + (1 - a) * cols[name][i - 1]
+        d = c - cols["close"][i - 1]
+        self.gain[i], self.loss[i] = max(d, 0.0), max(-d, 0.0)
+        if n >= RSI_WINDOW:
+            avg_gain = self.gain[n - RSI_WINDOW:].mean()
+            avg_loss = self.loss[n - RSI_WINDOW:].mean()
+            cols["rsi"][i] = 100 - (100 / (1 + avg_gain / (avg_loss or 0.0001)))
+        return True
+
+    def columns_json(self) -> str:
+        """Columnar payload: cached closed-bar prefix + the live value per series."""
+        if not len(self):
+            return json.dumps({k: [] for k in SERIES})
+        sep = "," if len(self) > 1 else ""
+        parts = []
+        for k in SERIES:
+            v = _rounded(k, self.cols[k][-1]).item()
+            parts.append(f'"{k}":{self._prefix[k]}{sep}{json.dumps(None if v != v else v)}]')
+        return "{" + ",".join(parts) + "}"
+
+    def rows(self) -> Dict[str, Any]:
+        """Original list-of-dicts shape (ema20 is EMA5, kept for older dashboards)."""
+        cols = {k: _rounded(k, v) for k, v in self.cols.items()}
+        times = cols["time"].tolist()
+        candles = [
+            {"time": t, "open": o, "high": h, "low": l, "close": c}
+            for t, o, h, l, c in zip(times, cols["open"].tolist(), cols["high"].tolist(),
+                                     cols["low"].tolist(), cols["close"].tolist())
+        ]
+
+        def points(name):
+            return [{"time": t, "value": v} for t, v in zip(times, cols[name].tolist()) if v == v]
+
+        ema5 = points("ema5")
+        return {"candles": candles, "ema20": ema5, "ema5": ema5, "ema50": points("ema50"), "rsi": points("rsi")}
+
+
+class ChartSeriesCache:
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str], ChartSeries] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def update(self, symbol: str, interval: str, ohlcv: List[list]) -> ChartSeries:
+        """
+        Entry for a freshly fetched window. Same last-candle timestamp: reuse it
+        and refresh the live candle only; otherwise rebuild. `version` bumps
+        whenever the payload changes (ETags).
+        """
+        key = (symbol, interval)
+        entry: Optional[ChartSeries] = self._entries.get(key)
+        last_ts = int(ohlcv[-1][0]) if ohlcv else None
+        if entry is not None and entry.last_ts == last_ts and len(entry) == len(ohlcv):
+            self.hits += 1
+            if last_ts is not None and entry.update_live(ohlcv[-1]):
+                entry.version += 1
+            return entry
+        self.misses += 1
+        fresh = ChartSeries(ohlcv)
+        fresh.version = entry.version + 1 if entry is not None else 1
+        self._entries[key] = fresh
+        return fresh
+
+
+chart_series = ChartSeriesCache()
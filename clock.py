@@ -0,0 +1,81 @@
+import time
+import heapq
+import asyncio
+from datetime import datetime, date
+
+
+# ------------------------
+# CLOCK
+# ------------------------
+# All bot code reads time and sleeps through `clock` so the exact production
+# loops can be driven by a VirtualClock (see timewarp.py).
+
+class Clock:
+    """Wall clock. Thin wrappers over datetime/time/asyncio."""
+
+    def now(self, tz=None) -> datetime:
+        return datetime.now(tz)
+
+    def time(self) -> float:
+        return time.time()
+
+    def today(self) -> date:
+        return date.today()
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(seconds)
+
+
+class VirtualClock(Clock):
+    """
+    Discrete-event clock for time-warp runs.
+
+    Time only moves when every participant task (e.g. watcher_loop and
+    strategy_loop) is blocked in clock.sleep(); it then jumps straight to the
+    earliest wake-up. Runs are deterministic and as fast as the code under test.
+    """
+
+    def __init__(self, start_ts: float, participants: int = 1, until_ts: float = None):
+        self._now = float(start_ts)
+        self.participants = participants
+        self.until_ts = until_ts
+        self.finished = asyncio.Event()
+        self._waiters = []  # heap of (wake_ts, seq, future)
+        self._seq = 0
+
+    def now(self, tz=None) -> datetime:
+        return datetime.fromtimestamp(self._now, tz)
+
+    def time(self) -> float:
+        return self._now
+
+    def today(self) -> date:
+        return datetime.fromtimestamp(self._now).date()
+
+    async def sleep(self, seconds: float):
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (self._now + max(0.0, float(seconds)), self._seq, fut))
+        self._seq += 1
+        self._advance()
+        await fut
+
+    def _advance(self):
+        # Drop waiters whose task was cancelled
+        while self._waiters and self._waiters[0][2].cancelled():
+            heapq.heappop(self._waiters)
+
+        pending = sum(1 for w in self._waiters if not w[2].cancelled())
+        if pending < self.participants:
+            return
+
+        wake_ts, _, fut = self._waiters[0]
+        if self.until_ts is not None and wake_ts > self.until_ts:
+            self.finished.set()
+            return
+
+        heapq.heappop(self._waiters)
+        self._now = max(self._now, wake_ts)
+        fut.set_result(None)
+
+
+clock = Clock()
@@ -38,6 +38,24 @@ const fetchWithTimeout = async (url: string, options: RequestInit = {}, timeout
    }
 };
 
+// [PERF] Live push (/stream, server-sent events): one snapshot, then per-topic deltas.
+// Keyed lists: { upsert, remove, order }, dicts: { set, unset }, other values: { replace }.
+const rowKey = (row: any, key: string[]) => key.map(k => String(row?.[k] ?? "")).join("|");
+
+const applyDelta = (prev: any, delta: any, key?: string[]) => {
+   if ("replace" in delta) return delta.replace;
+   if (key) {
+      const byKey = new Map<string, any>((Array.isArray(prev) ? prev : []).map((r: any) => [rowKey(r, key), r]));
+      (delta.remove || []).forEach((k: string) => byKey.delete(k));
+      (delta.upsert || []).forEach((r: any) => byKey.set(rowKey(r, key), r));
+      const order: string[] = delta.order || Array.from(byKey.keys());
+      return order.map(k => byKey.get(k)).filter(Boolean);
+   }
+   const next = { ...(prev || {}), ...(delta.set || {}) };
+   (delta.unset || []).forEach((k: string) => delete next[k]);
+   return next;
+};
+
 const InfoTooltip = ({ text }: { text: string }) => (
    <div className="group relative inline-flex ml-1.5 cursor-help transform translate-y-0.5">
       <div className="w-4 h-4 rounded-full border-1 border-current flex items-center justify-center text-xs opacity-90 hover:opacity-100 transition-opacity">?</div>
@@ -51,8 +69,12 @@ const InfoTooltip = ({ text }: { text: string }) => (
 // [COMPONENT] Smart Chart (Lightweight Charts)
 import { createChart, ColorType, CandlestickSeries, LineSeries } from 'lightweight-charts';
 
-const SmartChart = ({ symbol, interval, isDark, ob, position }: { symbol: string, interval: string, isDark: boolean, ob?: any, position?: any }) => {
+type ChartSubscribe = (chart: string, onCandles: (msg: any) => void) => () => void;
+
+const SmartChart = ({ symbol, interval, isDark, ob, position, subscribe, live }: { symbol: string, interval: string, isDark: boolean, ob?: any, position?: any, subscribe: ChartSubscribe, live: boolean }) => {
    const chartContainerRef = useRef<HTMLDivElement>(null);
+   const liveRef = useRef(live);
+   liveRef.current = live;
    const chartRef = useRef<any>(null);
    const seriesRef = useRef<any>(null);
    const ema5Ref = useRef<any>(null); // [NEW] EMA 5
@@ -197,19 +219,20 @@ const SmartChart = ({ symbol, interval, isDark, ob, position }: { symbol: string
             const json = await res.json();
             if (!isMounted) return;
 
-            // Handle new response structure { candles, ema20, ema50 }
-            const candles = json.candles || json;
+            // [PERF] Columnar payload: parallel arrays (time, open, high, low, close, ema5, ema50, rsi)
+            const t: number[] = json.time || [];
+            const candles = t.map((time, i) => ({
+               time, open: json.open[i], high: json.high[i], low: json.low[i], close: json.close[i],
+            }));
+            const line = (values: (number | null)[]) =>
+               t.map((time, i) => ({ time, value: values[i] })).filter(p => p.value !== null);
 
-            if (Array.isArray(candles) && candles.length > 0) {
+            if (candles.length > 0) {
                seriesRef.current.setData(candles);
 
-               // Handle EMA 5 data (Backend sends 'ema5' and legacy 'ema20')
-               if (ema5Ref.current) {
-                  const data = json.ema5 || json.ema20;
-                  if (data) ema5Ref.current.setData(data);
-               }
-               if (ema50Ref.current && json.ema50) ema50Ref.current.setData(json.ema50);
-               if (rsiRef.current && json.rsi) rsiRef.current.setData(json.rsi);
+               if (ema5Ref.current) ema5Ref.current.setData(line(json.ema5));
+               if (ema50Ref.current) ema50Ref.current.setData(line(json.ema50));
+               if (rsiRef.current) rsiRef.current.setData(line(json.rsi));
 
                // Only fit content on the very first load for this symbol/interval
                if (isFirstLoad) {
@@ -225,10 +248,26 @@ const SmartChart = ({ symbol, interval, isDark, ob, position }: { symbol: string
       };
 
       fetchHistory(); // Immediate load
-      const intervalId = setInterval(fetchHistory, 5000); // Poll every 5s
+
+      // [PERF] Live candles ride on the dashboard's single stream; the 5s poll is only the fallback while it is down
+      let lastBar = 0;
+      const unsubscribe = subscribe(`${symbol}@${interval}`, (msg: any) => {
+         const candles = ("replace" in msg ? msg.replace : msg.set)?.candles;
+         if (!isMounted || !Array.isArray(candles) || !seriesRef.current) return;
+         const prevBar = lastBar;
+         for (const c of candles) {
+            if (c.time < lastBar) continue;
+            lastBar = c.time;
+            seriesRef.current.update(c);
+         }
+         // A new bar closed the previous one: refresh indicators from /history
+         if (prevBar && lastBar > prevBar) fetchHistory();
+      });
+      const intervalId = setInterval(() => { if (!liveRef.current) fetchHistory(); }, 5000);
 
       return () => {
          isMounted = false;
+         unsubscribe();
          clearInterval(intervalId);
       };
    }, [symbol, interval]);
@@ -332,6 +371,42 @@ export default function Dashboard() {
    const initialized = useRef(false);
    const [lastSync, setLastSync] = useState<string>("—");
 
+   // [PERF] One push stream per tab: charts subscribe on it (POST /stream/charts) instead of opening their own
+   const streamRef = useRef<EventSource | null>(null);
+   const streamClient = useRef<string | null>(null);
+   const chartListeners = useRef<Map<string, Set<(msg: any) => void>>>(new Map());
+   const listening = useRef<Set<string>>(new Set());
+   const [streamLive, setStreamLive] = useState(false);
+
+   const syncCharts = () => {
+      if (!streamClient.current) return; // sent on the next hello
+      const charts = encodeURIComponent(Array.from(chartListeners.current.keys()).join(","));
+      fetchWithTimeout(`${API}/stream/charts?client=${streamClient.current}&charts=${charts}`, { method: "POST" })
+         .catch(e => console.error("Chart subscribe failed", e));
+   };
+   const listenChart = (chart: string) => {
+      const stream = streamRef.current;
+      if (!stream || listening.current.has(chart)) return;
+      listening.current.add(chart);
+      stream.addEventListener(`candle:${chart}`, (e: MessageEvent) => {
+         const msg = JSON.parse(e.data);
+         chartListeners.current.get(chart)?.forEach(fn => fn(msg));
+      });
+   };
+   const subscribeChart: ChartSubscribe = (chart, onCandles) => {
+      const subs = chartListeners.current;
+      if (!subs.has(chart)) subs.set(chart, new Set());
+      subs.get(chart)!.add(onCandles);
+      listenChart(chart);
+      syncCharts();
+      return () => {
+         const fns = subs.get(chart);
+         fns?.delete(onCandles);
+         if (fns && !fns.size) subs.delete(chart);
+         syncCharts();
+      };
+   };
+
 
    const [theme, setTheme] = useState<"dark" | "light">("dark");
 
@@ -347,89 +422,99 @@ export default function Dashboard() {
 
    const loadData = async () => {
       try {
-         // [OPTIMIZATION] Split fetching into Critical (Fast) and Heavy (Slow)
-         // This ensures the dashboard becomes active immediately without waiting for the slow scanner/signals.
-
-         // 1. Critical Data - Fetch & Update Immediately (User sees status/trades instantly)
-         const criticalResults = await Promise.allSettled([
-            fetchWithTimeout(`${API}/stats`).then(r => r.json()),
-            fetchWithTimeout(`${API}/trades`).then(r => r.json()),
-            fetchWithTimeout(`${API}/positions`).then(r => r.json()),
-            fetchWithTimeout(`${API}/admin/trade-usd`).then(r => r.json()),
-         ]);
-
-         // Helper: Log errors
-         criticalResults.forEach((res, index) => {
-            if (res.status === 'rejected') {
-               console.warn(`Critical Data Fail [Index ${index}]:`, res.reason);
-            }
-         });
-
-         // 1. Stats (Critical)
-         if (criticalResults[0].status === 'fulfilled') {
-            setStats(criticalResults[0].value);
-         } else if (!stats || !stats.mode) {
-            // If we have NO stats and fetch failed, throw to show error banner
-            throw criticalResults[0].reason;
-         }
-
-         // 2. Trades
-         if (criticalResults[1].status === 'fulfilled') {
-            setTrades(criticalResults[1].value);
-         }
-
-         // 3. Positions
-         if (criticalResults[2].status === 'fulfilled') {
-            const rawPositions = criticalResults[2].value;
-            const uniquePositions = Array.from(new Map(rawPositions.map((item: any) => [item.symbol, item])).values()) as Position[];
-            setPositions(uniquePositions);
-         }
-
-         // 4. Config
-         if (criticalResults[3].status === 'fulfilled') {
-            const cfg = criticalResults[3].value;
-            setTradeUsd(cfg.trade_usd);
-            if (!isEditingTradeUsd.current) {
-               setTradeUsdDraft(String(cfg.trade_usd));
-            }
-         }
+         // [PERF] One request for every section (stats, positions, trades, config, signals, scanner)
+         const res = await fetchWithTimeout(`${API}/dashboard`);
+         if (!res.ok) throw new Error(`Dashboard HTTP ${res.status}`);
+         const snap = await res.json();
 
+         Object.entries(snap).forEach(([topic, value]) => applyTopic(topic, value));
          setLastSync(new Date().toISOString());
          setBackendError(null);
-
-         const latestStats = criticalResults[0].status === 'fulfilled' ? criticalResults[0].value : stats;
-         if (latestStats && latestStats.api_status === "error") {
-            setApiError(latestStats.api_error || "Unknown Exchange API Error");
-         } else {
-            setApiError(null);
-         }
-
-         // 2. Heavy Data - Fetch in Background (Don't block UI)
-         // We do NOT await this. It updates state when ready (~5-10s later).
-         Promise.allSettled([
-            fetchWithTimeout(`${API}/signals`, {}, 25000).then(r => r.json()), // Longer timeout
-            fetchWithTimeout(`${API}/smc-scanner`, {}, 25000).then(r => r.json())
-         ]).then(heavyResults => {
-            if (heavyResults[0].status === 'fulfilled') {
-               setSignals(Array.isArray(heavyResults[0].value) ? heavyResults[0].value : []);
-            }
-            if (heavyResults[1].status === 'fulfilled') {
-               setSmcScanner(Array.isArray(heavyResults[1].value) ? heavyResults[1].value : []);
-            }
-         }).catch(e => console.warn("Heavy data fetch warning:", e));
-
       } catch (e) {
          console.error("Critical Load failed", e);
          setBackendError("Backend Offline: Check if the trading bot is running (port 8000)");
       }
    };
 
+   // [PERF] Apply one pushed topic to the matching piece of state
+   const applyTopic = (topic: string, value: any) => {
+      if (topic === "stats") {
+         setStats(value);
+         setApiError(value?.api_status === "error" ? (value.api_error || "Unknown Exchange API Error") : null);
+      } else if (topic === "trades") {
+         setTrades(value);
+      } else if (topic === "positions") {
+         setPositions(Array.from(new Map((value || []).map((item: any) => [item.symbol, item])).values()) as Position[]);
+      } else if (topic === "signals") {
+         setSignals(Array.isArray(value) ? value : []);
+      } else if (topic === "scanner") {
+         setSmcScanner(Array.isArray(value) ? value : []);
+      } else if (topic === "config" && value?.trade_usd !== undefined) {
+         setTradeUsd(value.trade_usd);
+         if (!isEditingTradeUsd.current) setTradeUsdDraft(String(value.trade_usd));
+      }
+   };
+
    useEffect(() => {
       if (initialized.current) return;
       initialized.current = true;
       loadData();
-      const i = setInterval(loadData, 5000);
-      return () => clearInterval(i);
+
+      // Polling only while the push stream is down or silent (heartbeat every 15s)
+      let poll: any = null;
+      let lastMessage = 0;
+      const startPolling = () => { if (!poll) poll = setInterval(loadData, 5000); };
+      const stopPolling = () => { if (poll) { clearInterval(poll); poll = null; } };
+
+      const live: Record<string, any> = {};
+      let keys: Record<string, string[]> = {};
+      const stream = new EventSource(`${API}/stream`);
+      streamRef.current = stream;
+      chartListeners.current.forEach((_, chart) => listenChart(chart));
+      // New connection (or a reconnect): resend the open charts under its client id
+      stream.addEventListener("hello", (e: MessageEvent) => {
+         streamClient.current = JSON.parse(e.data).client;
+         syncCharts();
+      });
+      const onTopic = (topic: string) => (e: MessageEvent) => {
+         lastMessage = Date.now();
+         stopPolling();
+         live[topic] = applyDelta(live[topic], JSON.parse(e.data), keys[topic]);
+         applyTopic(topic, live[topic]);
+         setLastSync(new Date().toISOString());
+      };
+      stream.addEventListener("snapshot", (e: MessageEvent) => {
+         lastMessage = Date.now();
+         const snap = JSON.parse(e.data);
+         keys = snap.keys || {};
+         Object.entries(snap.state || {}).forEach(([topic, value]) => {
+            live[topic] = value;
+            applyTopic(topic, value);
+         });
+         setBackendError(null);
+         setLastSync(new Date().toISOString());
+         setStreamLive(true);
+         stopPolling();
+      });
+      ["stats", "trades", "positions", "signals", "scanner", "config"].forEach(t => stream.addEventListener(t, onTopic(t)));
+      stream.addEventListener("ping", () => { lastMessage = Date.now(); setStreamLive(true); stopPolling(); });
+      stream.onerror = () => {
+         streamClient.current = null;
+         setStreamLive(false);
+         startPolling();
+      };
+      // Silent for 30s (heartbeat is every 15s): fall back to polling until it recovers
+      const watchdog = setInterval(() => {
+         if (Date.now() - lastMessage > 30000) { setStreamLive(false); startPolling(); }
+      }, 10000);
+
+      return () => {
+         stream.close();
+         streamRef.current = null;
+         listening.current.clear();
+         stopPolling();
+         clearInterval(watchdog);
+      };
    }, []);
 
    const autoRunning = stats?.mode === "auto";
@@ -580,6 +665,8 @@ export default function Dashboard() {
                         isDark={true}
                         ob={smcScanner.find(s => s.symbol === selectedCoin)}
                         position={positions.find(p => p.symbol === selectedCoin)}
+                        subscribe={subscribeChart}
+                        live={streamLive}
                      />
                   </div>
                </div>
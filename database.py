@@ -1,114 +1,388 @@
+import os
+import asyncio
+import sqlite3
 import aiosqlite
 import json
+import copy
 
-from datetime import date
-from typing import Dict, List, Optional, Any
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Any, Union
+
+from clock import clock as default_clock
+from models import Trade, TRADE_COLUMNS, MARK_COLUMNS, db_value
+from migrations import run_migrations, migrate_archive
 
 DB_FILE = "trades.db"
 
+# [PERF] Connection pool: one dedicated writer + N readers (WAL lets readers
+# run concurrently with the writer). Connections live for the whole process.
+DB_READERS = int(os.environ.get("DB_READERS", "3"))
+STATEMENT_CACHE = 256  # sqlite3 prepared statement cache per connection
+
+CONNECTION_PRAGMAS = [
+    "PRAGMA journal_mode=WAL;",     # [HARDENING] Enable WAL mode for concurrency
+    "PRAGMA synchronous=NORMAL;",   # Durable in WAL mode, no fsync per commit
+    "PRAGMA mmap_size=268435456;",  # 256MB memory-mapped reads
+    "PRAGMA cache_size=-16000;",    # 16MB page cache per connection
+    "PRAGMA temp_store=MEMORY;",
+    "PRAGMA busy_timeout=5000;",
+]
+
+# [PERF] Mark-to-market fields live in the narrow trade_marks table while a
+# trade is open; reads overlay them on the trades row. Explicit column list:
+# duplicate names from "t.*, m.*" would shadow each other in dict(row).
+# A mark flush counts as a change of the trade.
+CHANGED_AT = "MAX(COALESCE(t.updated_at, ''), COALESCE(m.updated_at, ''))"
+
+def trade_select(columns=TRADE_COLUMNS) -> str:
+    """SELECT ... FROM trades t LEFT JOIN trade_marks m for the given columns."""
+    exprs = []
+    for c in columns:
+        if c in MARK_COLUMNS:
+            exprs.append(f"COALESCE(m.{c}, t.{c}) AS {c}")
+        elif c == "updated_at":
+            exprs.append(f"{CHANGED_AT} AS updated_at")
+        else:
+            exprs.append(f"t.{c}")
+    return "SELECT " + ", ".join(exprs) + " FROM trades t LEFT JOIN trade_marks m ON m.trade_id = t.id"
+
+TRADE_SELECT = trade_select()
+
+# [PERF] Closed trades older than ARCHIVE_AFTER_DAYS move to <db>_archive.db (0 = never)
+ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", "90"))
+
+def utc_now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
 class Database:
-    def __init__(self, db_file=DB_FILE):
+    def __init__(self, db_file=DB_FILE, readers=DB_READERS, clock=default_clock):
         self.db_file = db_file
+        self.clock = clock
+        self.archive_file = os.path.splitext(db_file)[0] + "_archive.db"
+        self.readers = max(1, readers)
+        self._writer = None
+        self._read_pool = None
+        self._write_lock = asyncio.Lock()
+        self._open_lock = asyncio.Lock()
+        # [PERF] Write-through app_state cache (this process is the only writer)
+        self._state = None
+        self.state_version = 0
+        # [PERF] Bumped after every commit that changes trades, marks or aggregates (ETags)
+        self.trades_version = 0
+        # Active transaction of the current task: (owner_task, staged_state, changed)
+        self._tx = ContextVar(f"db_tx_{id(self)}", default=None)
+        # Clock time of the last commit (maintenance waits for quiet periods)
+        self.last_write_at = 0.0
 
-    async def init_db(self):
-        async with aiosqlite.connect(self.db_file) as db:
-            # [HARDENING] Enable WAL mode for concurrency
-            await db.execute("PRAGMA journal_mode=WAL;")
-            
-            # Create trades table
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS trades (
-                    id TEXT PRIMARY KEY,
-                    time TEXT,
-                    symbol TEXT,
-                    side TEXT,
-                    strategy TEXT,
-                    entry_price REAL,
-                    qty REAL,
-                    used_usd REAL,
-                    status TEXT,
-                    pnl REAL,
-                    sl REAL,
-                    tp REAL,
-                    exit_price REAL,
-                    exit_time TEXT, -- [NEW]
-                    current_price REAL,
-                    unrealized_pnl REAL,
-                    fees_usd REAL,
-                    highest_price REAL,
-                    trail_active INTEGER, -- Boolean stored as 1/0
-                    trail_sl REAL,
-                    is_partial INTEGER DEFAULT 0 -- 0=Full, 1=Partial Sold
-                )
-            """)
+    # ------------------
+    # CONNECTION POOL
+    # ------------------
+    async def _connect(self, read_only=False):
+        conn = await aiosqlite.connect(self.db_file, cached_statements=STATEMENT_CACHE)
+        conn.row_factory = aiosqlite.Row
+        if not read_only:
+            # Only takes effect on a new, empty file (before journal_mode=WAL writes
+            # the header). Existing files: `python migrations.py auto-vacuum`, offline.
+            await conn.execute("PRAGMA auto_vacuum=INCREMENTAL;")
+        for pragma in CONNECTION_PRAGMAS:
+            await conn.execute(pragma)
+        if read_only:
+            await conn.execute("PRAGMA query_only=1;")
+        return conn
 
-            # [MIGRATION] Add is_partial column if not exists
+    async def _ensure_open(self):
+        if self._writer is not None:
+            return
+        async with self._open_lock:
+            if self._writer is not None:
+                return
+            # Writer first: it switches the file to WAL before readers attach
+            writer = await self._connect()
+            pool = asyncio.Queue()
+            for _ in range(self.readers):
+                pool.put_nowait(await self._connect(read_only=True))
+            self._read_pool = pool
+            self._writer = writer
+
+    @asynccontextmanager
+    async def _read(self):
+        await self._ensure_open()
+        conn = await self._read_pool.get()
+        try:
+            yield conn
+        finally:
+            self._read_pool.put_nowait(conn)
+
+    def _current_tx(self):
+        tx = self._tx.get()
+        # Child tasks inherit the context var but must not share the transaction
+        if tx is not None and tx[0] is asyncio.current_task():
+            return tx
+        return None
+
+    def _trades_changed(self):
+        """Bump trades_version once the change is committed (readers tag before they read)."""
+        tx = self._current_tx()
+        if tx is not None:
+            tx[2].add("trades")  # bumped by the outer commit
+        else:
+            self.trades_version += 1
+
+    @asynccontextmanager
+    async def _write(self):
+        if self._current_tx() is not None:
+            # Inside db.transaction(): join it, the outer block commits
+            yield self._writer
+            return
+        await self._ensure_open()
+        async with self._write_lock:
             try:
-                await db.execute("ALTER TABLE trades ADD COLUMN is_partial INTEGER DEFAULT 0")
-            except Exception:
-                pass # Already exists
-
-            # Create users table
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    username TEXT PRIMARY KEY,
-                    hashed_password TEXT,
-                    role TEXT DEFAULT 'viewer',
-                    is_active INTEGER DEFAULT 1
-                )
-            """)
+                yield self._writer
+                await self._writer.commit()
+            except BaseException:
+                await self._writer.rollback()
+                raise
+            finally:
+                self.last_write_at = self.clock.time()
 
-            # Create app_state table
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS app_state (
-                    key TEXT PRIMARY KEY,
-                    value TEXT
-                )
-            """)
-            await db.commit()
+    @asynccontextmanager
+    async def transaction(self):
+        """
+        Group writes into ONE commit:
+
+            async with db.transaction():
+                await db.update_trade(...)
+                await db.set_state_key(...)
+
+        Trade and state writes inside the block share the writer connection and
+        commit together (or roll back together). State changes become visible
+        to other readers of the cache only after the commit. Nested blocks join
+        the outer one. Reads inside the block see committed rows only, except
+        app_state which also sees the block's own staged keys.
+        """
+        if self._current_tx() is not None:
+            yield
+            return
+        await self._ensure_open()
+        await self._load_state()
+        async with self._write_lock:
+            staged, changed = {}, set()
+            token = self._tx.set((asyncio.current_task(), staged, changed))
+            try:
+                yield
+                await self._writer.commit()
+            except BaseException:
+                await self._writer.rollback()  # staged state never reached the cache
+                raise
+            finally:
+                self._tx.reset(token)
+                self.last_write_at = self.clock.time()
+            if staged:
+                self._state = {**self._state, **staged}  # swap after the commit
+                self.state_version += 1
+            if "trades" in changed:
+                self.trades_version += 1
+
+    async def close(self):
+        if self._writer is None:
+            return
+        writer, pool = self._writer, self._read_pool
+        self._writer = None
+        self._read_pool = None
+        async with self._write_lock:
+            await writer.close()
+        while not pool.empty():
+            await pool.get_nowait().close()
+
+    async def init_db(self):
+        """Bring the schema up to date (see migrations.py)."""
+        applied = await run_migrations(self)
+        if os.path.exists(self.archive_file):
+            await self._migrate_archive()
+        if applied:
+            async with self._write() as db:
+                # Refresh planner statistics after schema changes
+                await db.execute("PRAGMA optimize;")
 
     # ------------------
     # TRADES
     # ------------------
-    async def get_trade(self, trade_id: str) -> Optional[Dict[str, Any]]:
-        async with aiosqlite.connect(self.db_file) as db:
-            db.row_factory = aiosqlite.Row
-            cursor = await db.execute("SELECT * FROM trades WHERE id = ?", (trade_id,))
+    async def get_trade(self, trade_id: str) -> Optional[Trade]:
+        async with self._read() as db:
+            cursor = await db.execute(f"{TRADE_SELECT} WHERE t.id = ?", (trade_id,))
             row = await cursor.fetchone()
             if row:
-                return dict(row)
+                return Trade.from_row(row)
             return None
 
-    async def get_open_trades(self) -> List[Dict[str, Any]]:
-        async with aiosqlite.connect(self.db_file) as db:
-            db.row_factory = aiosqlite.Row
-            cursor = await db.execute("SELECT * FROM trades WHERE status = 'open'")
+    async def get_open_trades(self) -> List[Trade]:
+        async with self._read() as db:
+            cursor = await db.execute(f"{TRADE_SELECT} WHERE t.status = 'open'")
             rows = await cursor.fetchall()
-            return [dict(r) for r in rows]
+            return [Trade.from_row(r) for r in rows]
 
-    async def get_all_trades_desc(self, limit=100) -> List[Dict[str, Any]]:
-        async with aiosqlite.connect(self.db_file) as db:
-            db.row_factory = aiosqlite.Row
-            cursor = await db.execute("SELECT * FROM trades ORDER BY time DESC LIMIT ?", (limit,))
+    async def get_all_trades_desc(self, limit=100) -> List[Trade]:
+        async with self._read() as db:
+            cursor = await db.execute(f"{TRADE_SELECT} ORDER BY t.time DESC, t.id DESC LIMIT ?", (limit,))
+            rows = await cursor.fetchall()
+            return [Trade.from_row(r) for r in rows]
+
+    async def get_trades_page(self, limit: int = 100, before: Optional[tuple] = None,
+                              columns=TRADE_COLUMNS, include_archive: bool = False) -> List[Dict[str, Any]]:
+        """
+        Keyset page, newest first: rows strictly after `before` = (time, id) in
+        (time DESC, id DESC) order. Cost is O(limit) at any depth. With
+        include_archive, a short page continues into the archive DB.
+        """
+        where, params = "", []
+        if before is not None:
+            where = "WHERE (t.time, t.id) < (?, ?)"
+            params = list(before)
+        sql = f"{trade_select(columns)} {where} ORDER BY t.time DESC, t.id DESC LIMIT ?"
+        async with self._read() as db:
+            cursor = await db.execute(sql, params + [limit])
+            rows = [dict(r) for r in await cursor.fetchall()]
+
+        if include_archive and len(rows) < limit and os.path.exists(self.archive_file):
+            if rows:
+                before = (rows[-1]["time"], rows[-1]["id"])
+            cols = ", ".join(columns)
+            where = "WHERE (time, id) < (?, ?)" if before is not None else ""
+            params = list(before) if before is not None else []
+            async with aiosqlite.connect(f"file:{self.archive_file}?mode=ro", uri=True) as adb:
+                adb.row_factory = aiosqlite.Row
+                cursor = await adb.execute(
+                    f"SELECT {cols} FROM trades {where} ORDER BY time DESC, id DESC LIMIT ?",
+                    params + [limit - len(rows)])
+                rows += [dict(r) for r in await cursor.fetchall()]
+        return rows
+
+    async def get_dashboard_rows(self, trades_limit: int = 0, aggregates: bool = False) -> Dict[str, Any]:
+        """
+        Recent trades (newest first) and the all-time aggregate row for
+        /dashboard, read in ONE transaction on one reader: a consistent snapshot.
+        """
+        out: Dict[str, Any] = {}
+        async with self._read() as db:
+            await db.execute("BEGIN")
+            try:
+                if aggregates:
+                    cursor = await db.execute("SELECT * FROM trade_aggregates WHERE scope = 'all' AND key = ''")
+                    row = await cursor.fetchone()
+                    out["aggregates"] = dict(row) if row else None
+                if trades_limit:
+                    cursor = await db.execute(f"{TRADE_SELECT} ORDER BY t.time DESC, t.id DESC LIMIT ?",
+                                              (trades_limit,))
+                    out["trades"] = [dict(r) for r in await cursor.fetchall()]
+            finally:
+                await db.execute("COMMIT")
+        return out
+
+    async def get_trades_changed_since(self, since: str, limit: int = 500, columns=TRADE_COLUMNS,
+                                       after_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Trades whose row or mark changed after `since` (ISO time), oldest change
+        first. With `after_id`, keyset on (updated_at, id) so rows sharing one
+        timestamp (a mark flush) are never skipped between pages.
+        """
+        if after_id is None:
+            after, params = f"{CHANGED_AT} > ?", (since,)
+        else:
+            after, params = f"({CHANGED_AT}, t.id) > (?, ?)", (since, after_id)
+        async with self._read() as db:
+            cursor = await db.execute(
+                f"{trade_select(columns)} "
+                "WHERE (t.updated_at >= ? OR t.id IN (SELECT trade_id FROM trade_marks WHERE updated_at >= ?)) "
+                f"AND {after} ORDER BY updated_at, t.id LIMIT ?",
+                (since, since, *params, limit)
+            )
             rows = await cursor.fetchall()
             return [dict(r) for r in rows]
 
-    async def add_trade(self, trade: Dict[str, Any]):
-        keys = list(trade.keys())
-        values = list(trade.values())
-        placeholders = ",".join(["?"] * len(keys))
-        columns = ",".join(keys)
-        
-        # Convert booleans to int for SQLite
-        if 'trail_active' in trade:
-            trade['trail_active'] = 1 if trade['trail_active'] else 0
-            # Update values list after modification
-            values = list(trade.values())
-
-        async with aiosqlite.connect(self.db_file) as db:
-            sql = f"INSERT OR REPLACE INTO trades ({columns}) VALUES ({placeholders})"
+    async def backup_to(self, dest: str) -> int:
+        """
+        Consistent copy of the live DB via the SQLite online backup API. One
+        step under a single WAL read snapshot: the bot keeps writing meanwhile.
+        Uses its own connection so the reader pool is not held. Returns bytes.
+        """
+        tmp = dest + ".part"
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        src = await aiosqlite.connect(f"file:{self.db_file}?mode=ro", uri=True)
+        target = sqlite3.connect(tmp, check_same_thread=False)
+        try:
+            await src.backup(target)
+        finally:
+            target.close()
+            await src.close()
+        os.replace(tmp, dest)
+        return os.path.getsize(dest)
+
+    async def archive_closed_trades(self, days: int = ARCHIVE_AFTER_DAYS, now: Optional[datetime] = None) -> int:
+        """
+        Move closed trades whose exit is older than `days` into the archive DB
+        (ATTACHed only for the move). Aggregates are unaffected.
+        """
+        if days <= 0:
+            return 0
+        now = now or datetime.now(timezone.utc)
+        cutoff = datetime.fromtimestamp(now.timestamp() - days * 86400, timezone.utc).isoformat()
+        await self._ensure_open()
+        async with self._write_lock:
+            db = self._writer
+            # ATTACH is not allowed inside a transaction; the writer is idle here
+            await db.execute("ATTACH DATABASE ? AS archive", (self.archive_file,))
+            try:
+                await migrate_archive(db)
+                cols = ", ".join(TRADE_COLUMNS)
+                cursor = await db.execute(
+                    f"INSERT OR REPLACE INTO archive.trades ({cols}) SELECT {cols} FROM main.trades "
+                    "WHERE status = 'closed' AND exit_time < ?", (cutoff,))
+                moved = cursor.rowcount
+                await db.execute("DELETE FROM main.trades WHERE status = 'closed' AND exit_time < ?", (cutoff,))
+                await db.commit()
+            except BaseException:
+                await db.rollback()
+                raise
+            finally:
+                await db.execute("DETACH DATABASE archive")
+        if moved:
+            self.trades_version += 1
+        return moved
+
+    async def _migrate_archive(self):
+        await self._ensure_open()
+        async with self._write_lock:
+            db = self._writer
+            await db.execute("ATTACH DATABASE ? AS archive", (self.archive_file,))
+            try:
+                await migrate_archive(db)
+                await db.commit()
+            except BaseException:
+                await db.rollback()
+                raise
+            finally:
+                await db.execute("DETACH DATABASE archive")
+
+    async def add_trade(self, trade: Union[Trade, Dict[str, Any]]):
+        if not isinstance(trade, Trade):
+            trade = Trade(**trade)
+        columns, values = trade.to_db()
+        if not trade.updated_at:
+            values[columns.index("updated_at")] = utc_now_iso()
+
+        async with self._write() as db:
+            sql = f"INSERT OR REPLACE INTO trades ({','.join(columns)}) VALUES ({','.join('?' * len(columns))})"
             await db.execute(sql, values)
-            await db.commit()
+        self._trades_changed()
+        trade.clear_dirty()
+
+    async def save_trade(self, trade: Trade):
+        """Write only the columns changed since the record was loaded/saved."""
+        await self.update_trade(trade.id, trade.dirty())
+        trade.clear_dirty()
 
     async def update_trade(self, trade_id: str, updates: Dict[str, Any]):
         if not updates:
@@ -117,58 +391,300 @@ class Database:
         set_clauses = []
         values = []
         for k, v in updates.items():
+            if k not in TRADE_COLUMNS:
+                raise ValueError(f"Unknown trade column: {k}")
             set_clauses.append(f"{k} = ?")
-             # Convert booleans to int for SQLite
-            if k == 'trail_active':
-                v = 1 if v else 0
-            values.append(v)
+            values.append(db_value(k, v))
+        if 'updated_at' not in updates:
+            set_clauses.append("updated_at = ?")
+            values.append(utc_now_iso())
         
         values.append(trade_id)
         sql = f"UPDATE trades SET {', '.join(set_clauses)} WHERE id = ?"
 
-        async with aiosqlite.connect(self.db_file) as db:
+        async with self._write() as db:
             await db.execute(sql, values)
-            await db.commit()
-            
-    async def get_trades_by_strategy(self, strategy: str) -> List[Dict[str, Any]]:
-        async with aiosqlite.connect(self.db_file) as db:
-             db.row_factory = aiosqlite.Row
-             cursor = await db.execute("SELECT * FROM trades WHERE strategy = ?", (strategy,))
-             rows = await cursor.fetchall()
-             return [dict(r) for r in rows]
-
-    async def get_trades_by_status_symbol_strategy(self, status: str, symbol: str, strategy: str) -> List[Dict[str, Any]]:
-        async with aiosqlite.connect(self.db_file) as db:
-            db.row_factory = aiosqlite.Row
+        self._trades_changed()
+
+    async def upsert_marks(self, rows: List[tuple]):
+        """rows: (trade_id, current_price, unrealized_pnl, highest_price, updated_at)"""
+        if not rows:
+            return
+        async with self._write() as db:
+            await db.executemany(
+                "INSERT OR REPLACE INTO trade_marks "
+                "(trade_id, current_price, unrealized_pnl, highest_price, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+        self._trades_changed()
+
+    async def delete_mark(self, trade_id: str):
+        async with self._write() as db:
+            await db.execute("DELETE FROM trade_marks WHERE trade_id = ?", (trade_id,))
+        self._trades_changed()
+
+    async def get_trades_by_strategy(self, strategy: str) -> List[Trade]:
+        async with self._read() as db:
+            cursor = await db.execute(f"{TRADE_SELECT} WHERE t.strategy = ?", (strategy,))
+            rows = await cursor.fetchall()
+            return [Trade.from_row(r) for r in rows]
+
+    async def get_trades_by_status_symbol_strategy(self, status: str, symbol: str, strategy: str) -> List[Trade]:
+        async with self._read() as db:
             cursor = await db.execute(
-                "SELECT * FROM trades WHERE status = ? AND symbol = ? AND strategy = ?",
+                f"{TRADE_SELECT} WHERE t.status = ? AND t.symbol = ? AND t.strategy = ?",
                 (status, symbol, strategy)
             )
             rows = await cursor.fetchall()
+            return [Trade.from_row(r) for r in rows]
+
+    # ------------------
+    # ORDER EVENTS
+    # ------------------
+    async def append_order_event(self, client_order_id: str, event: str, symbol: str, side: str,
+                                 amount: Optional[float] = None, filled: Optional[float] = None,
+                                 price: Optional[float] = None, exchange_order_id: Optional[str] = None,
+                                 trade_id: Optional[str] = None, detail: Optional[Dict[str, Any]] = None):
+        async with self._write() as db:
+            await db.execute(
+                "INSERT INTO order_events (client_order_id, event, symbol, side, amount, filled, price, "
+                "exchange_order_id, trade_id, detail, ts) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (client_order_id, event, symbol, side, amount, filled, price, exchange_order_id,
+                 trade_id, json.dumps(detail) if detail is not None else None, utc_now_iso())
+            )
+
+    async def get_in_doubt_orders(self) -> List[Dict[str, Any]]:
+        """
+        Orders whose latest event is 'intent' or 'submitted' (outcome unknown),
+        with the exchange order id seen so far and the intent's detail.
+        """
+        async with self._read() as db:
+            cursor = await db.execute("""
+                SELECT e.client_order_id, e.event, e.symbol, e.side, e.ts,
+                       (SELECT exchange_order_id FROM order_events s
+                        WHERE s.client_order_id = e.client_order_id AND s.exchange_order_id IS NOT NULL
+                        ORDER BY s.seq DESC LIMIT 1) AS exchange_order_id,
+                       (SELECT detail FROM order_events i
+                        WHERE i.client_order_id = e.client_order_id AND i.event = 'intent') AS detail
+                FROM order_events e
+                JOIN (SELECT client_order_id, MAX(seq) AS seq FROM order_events GROUP BY client_order_id) l
+                  ON l.seq = e.seq
+                WHERE e.event IN ('intent', 'submitted')
+                ORDER BY e.seq
+            """)
+            rows = [dict(r) for r in await cursor.fetchall()]
+        for r in rows:
+            r["detail"] = json.loads(r["detail"]) if r["detail"] else {}
+        return rows
+
+    async def prune_order_events(self, before: str) -> int:
+        """Delete the event trail of orders resolved (filled/failed) before `before` (ISO time)."""
+        async with self._write() as db:
+            cursor = await db.execute("""
+                DELETE FROM order_events WHERE client_order_id IN (
+                    SELECT e.client_order_id FROM order_events e
+                    JOIN (SELECT client_order_id, MAX(seq) AS seq FROM order_events GROUP BY client_order_id) l
+                      ON l.seq = e.seq
+                    WHERE e.event IN ('filled', 'failed') AND e.ts < ?
+                )
+            """, (before,))
+            return cursor.rowcount
+
+    # ------------------
+    # AGGREGATES
+    # ------------------
+    async def add_closed_trade_aggregates(self, strategy: str, day: str, pnl: float, fees: float):
+        """
+        Fold one closed trade into the 'all', strategy and day rows. A zero-PnL
+        close (phantom / sync cleanup: nothing was sold) only adds its fees:
+        it is not a trade for the trades / wins / losses counts.
+        """
+        counted, win, loss = int(pnl != 0), int(pnl > 0), int(pnl < 0)
+        rows = [(scope, key, counted, win, loss, pnl, fees)
+                for scope, key in (("all", ""), ("strategy", strategy or ""), ("day", day or ""))]
+        async with self._write() as db:
+            await db.executemany("""
+                INSERT INTO trade_aggregates (scope, key, trades, wins, losses, realized_pnl, fees_usd)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(scope, key) DO UPDATE SET
+                    trades = trades + excluded.trades,
+                    wins = wins + excluded.wins,
+                    losses = losses + excluded.losses,
+                    realized_pnl = realized_pnl + excluded.realized_pnl,
+                    fees_usd = fees_usd + excluded.fees_usd
+            """, rows)
+        self._trades_changed()
+
+    async def get_aggregates(self, scope: str, key: Optional[str] = None) -> List[Dict[str, Any]]:
+        async with self._read() as db:
+            if key is None:
+                cursor = await db.execute(
+                    "SELECT * FROM trade_aggregates WHERE scope = ? ORDER BY key", (scope,))
+            else:
+                cursor = await db.execute(
+                    "SELECT * FROM trade_aggregates WHERE scope = ? AND key = ?", (scope, key))
+            rows = await cursor.fetchall()
             return [dict(r) for r in rows]
 
     # ------------------
-    # STATE
+    # EQUITY SERIES
     # ------------------
-    async def get_state(self) -> Dict[str, Any]:
-        async with aiosqlite.connect(self.db_file) as db:
-            cursor = await db.execute("SELECT key, value FROM app_state")
+    async def upsert_equity(self, rows: List[tuple]):
+        """
+        rows: (res, bucket, equity, equity_min, equity_max, locked, free,
+        realized, unrealized, ts). Existing buckets keep their min/max and take
+        the newer last values.
+        """
+        if not rows:
+            return
+        async with self._write() as db:
+            await db.executemany("""
+                INSERT INTO equity_series
+                    (res, bucket, equity, equity_min, equity_max, locked, free, realized, unrealized, ts)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(res, bucket) DO UPDATE SET
+                    equity = excluded.equity,
+                    equity_min = MIN(equity_min, excluded.equity_min),
+                    equity_max = MAX(equity_max, excluded.equity_max),
+                    locked = excluded.locked,
+                    free = excluded.free,
+                    realized = excluded.realized,
+                    unrealized = excluded.unrealized,
+                    ts = excluded.ts
+            """, rows)
+
+    async def get_equity_series(self, res: int, start: int, end: int) -> List[Dict[str, Any]]:
+        async with self._read() as db:
+            cursor = await db.execute(
+                "SELECT bucket, equity, equity_min, equity_max, locked, free, realized, unrealized "
+                "FROM equity_series WHERE res = ? AND bucket BETWEEN ? AND ? ORDER BY bucket",
+                (res, start, end)
+            )
             rows = await cursor.fetchall()
+            return [dict(r) for r in rows]
+
+    async def prune_equity(self, cutoffs: Dict[int, int]):
+        """Drop buckets older than cutoffs[res] (epoch seconds)."""
+        async with self._write() as db:
+            await db.executemany(
+                "DELETE FROM equity_series WHERE res = ? AND bucket < ?",
+                list(cutoffs.items())
+            )
+
+    # ------------------
+    # MAINTENANCE
+    # ------------------
+    async def wal_checkpoint(self, mode: str = "PASSIVE") -> Dict[str, int]:
+        """
+        Checkpoint the WAL on the writer (holds the write lock, so no commit
+        races it). busy=1 means readers kept it from finishing (TRUNCATE).
+        Not counted as a write for last_write_at.
+        """
+        if mode not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+            raise ValueError(f"Unknown checkpoint mode: {mode}")
+        await self._ensure_open()
+        async with self._write_lock:
+            cursor = await self._writer.execute(f"PRAGMA wal_checkpoint({mode})")
+            busy, log, checkpointed = await cursor.fetchone()
+        return {"busy": busy, "log_pages": log, "checkpointed_pages": checkpointed}
+
+    async def incremental_vacuum(self, pages: int) -> int:
+        """Return up to `pages` free pages to the OS (auto_vacuum=INCREMENTAL). Returns pages freed."""
+        await self._ensure_open()
+        async with self._write_lock:
+            db = self._writer
+            before = (await (await db.execute("PRAGMA freelist_count")).fetchone())[0]
+            # sqlite3_exec steps to completion; execute() would free one page per call
+            await db.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+            after = (await (await db.execute("PRAGMA freelist_count")).fetchone())[0]
+        return before - after
+
+    async def storage_stats(self) -> Dict[str, int]:
+        async with self._read() as db:
+            stats = {}
+            for pragma in ("page_size", "page_count", "freelist_count", "auto_vacuum"):
+                stats[pragma] = (await (await db.execute(f"PRAGMA {pragma}")).fetchone())[0]
+        stats["db_bytes"] = os.path.getsize(self.db_file) if os.path.exists(self.db_file) else 0
+        stats["wal_bytes"] = self.wal_bytes()
+        return stats
+
+    def wal_bytes(self) -> int:
+        try:
+            return os.path.getsize(self.db_file + "-wal")
+        except OSError:
+            return 0
+
+    async def optimize(self):
+        await self._ensure_open()
+        async with self._write_lock:
+            await self._writer.execute("PRAGMA optimize;")
+
+    # ------------------
+    # USERS
+    # ------------------
+    async def get_user(self, username: str) -> Optional[Dict[str, Any]]:
+        async with self._read() as db:
+            cursor = await db.execute("SELECT * FROM users WHERE username = ?", (username,))
+            row = await cursor.fetchone()
+            return dict(row) if row else None
+
+    # ------------------
+    # STATE
+    # ------------------
+    async def _load_state(self) -> Dict[str, Any]:
+        if self._state is None:
+            async with self._read() as db:
+                cursor = await db.execute("SELECT key, value FROM app_state")
+                rows = await cursor.fetchall()
             state = {}
             for k, v in rows:
                 try:
                     state[k] = json.loads(v)
                 except:
                     state[k] = v
-            return state
+            self._state = state
+            self.state_version += 1
+        return self._state
+
+    async def get_state(self) -> Dict[str, Any]:
+        """
+        Served from memory after the first call. Returns a deep copy: edits
+        (nested dicts included) persist only through set_state_key(s).
+        """
+        state = dict(await self._load_state())
+        tx = self._current_tx()
+        if tx is not None:
+            state.update(tx[1])
+        return copy.deepcopy(state)
+
+    async def get_state_key(self, key: str, default: Any = None) -> Any:
+        tx = self._current_tx()
+        if tx is not None and key in tx[1]:
+            return copy.deepcopy(tx[1][key])
+        return copy.deepcopy((await self._load_state()).get(key, default))
 
     async def set_state_key(self, key: str, value: Any):
-        async with aiosqlite.connect(self.db_file) as db:
-            val_str = json.dumps(value)
-            await db.execute(
+        await self.set_state_keys({key: value})
+
+    async def set_state_keys(self, updates: Dict[str, Any]):
+        """Write several state keys in one statement batch and one commit."""
+        if not updates:
+            return
+        await self._load_state()
+        encoded = [(k, json.dumps(v)) for k, v in updates.items()]
+        async with self._write() as db:
+            await db.executemany(
                 "INSERT OR REPLACE INTO app_state (key, value) VALUES (?, ?)",
-                (key, val_str)
+                encoded
             )
-            await db.commit()
+        # Decode only the changed keys (also detaches the cache from the caller's objects)
+        decoded = {k: json.loads(v) for k, v in encoded}
+        tx = self._current_tx()
+        if tx is not None:
+            tx[1].update(decoded)  # applied to the cache on commit
+        else:
+            self._state = {**self._state, **decoded}  # swap after the commit
+            self.state_version += 1
 
 db = Database()
@@ -0,0 +1,99 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+from database import db as default_db
+
+logger = logging.getLogger("TradingBot")
+
+# ------------------------
+# EQUITY TIME SERIES
+# ------------------------
+# Samples are folded into the current 1m bucket in memory. When the minute
+# rolls over, the finished bucket is upserted into every resolution at once
+# (1m -> 15m -> 1h -> 1d) in one executemany, so rollups never re-read rows.
+
+RESOLUTIONS = (60, 900, 3600, 86400)
+RETENTION_SEC = {
+    60: 2 * 86400,       # 1m for 2 days
+    900: 30 * 86400,     # 15m for 30 days
+    3600: 365 * 86400,   # 1h for a year
+    86400: None,         # 1d forever
+}
+PRUNE_EVERY_SEC = 3600
+FIELDS = ("equity", "locked", "free", "realized", "unrealized")
+
+
+class EquitySeries:
+    def __init__(self, database=default_db):
+        self.db = database
+        self._cur: Optional[Dict[str, Any]] = None  # open 1m bucket
+        self._last_prune = 0.0
+
+    async def sample(self, ts: float, equity: float, locked: float, free: float,
+                     realized: float, unrealized: float):
+        bucket = int(ts // 60) * 60
+        if self._cur is not None and self._cur["bucket"] != bucket:
+            await self.flush()
+        if self._cur is None:
+            self._cur = {"bucket": bucket, "equity_min": equity, "equity_max": equity}
+        cur = self._cur
+        cur.update(equity=equity, locked=locked, free=free, realized=realized,
+                   unrealized=unrealized, ts=ts)
+        cur["equity_min"] = min(cur["equity_min"], equity)
+        cur["equity_max"] = max(cur["equity_max"], equity)
+
+    async def flush(self):
+        """Persist the open 1m bucket into all resolutions and prune if due."""
+        cur, self._cur = self._cur, None
+        if cur is None:
+            return
+        rows = [
+            (res, cur["bucket"] // res * res, cur["equity"], cur["equity_min"], cur["equity_max"],
+             cur["locked"], cur["free"], cur["realized"], cur["unrealized"], cur["ts"])
+            for res in RESOLUTIONS
+        ]
+        try:
+            await self.db.upsert_equity(rows)
+            if cur["ts"] - self._last_prune >= PRUNE_EVERY_SEC:
+                self._last_prune = cur["ts"]
+                await self.db.prune_equity({
+                    res: int(cur["ts"] - keep) for res, keep in RETENTION_SEC.items() if keep
+                })
+        except Exception as e:
+            logger.error(f"❌ [EQUITY] Persist failed: {e}")
+
+    @staticmethod
+    def pick_resolution(start: float, end: float, points: int, now: float) -> int:
+        """Finest resolution that fits `points` and is still retained at `start`."""
+        span = max(0.0, end - start)
+        for res in RESOLUTIONS:
+            keep = RETENTION_SEC[res]
+            if span / res <= points and (keep is None or start >= now - keep):
+                return res
+        return RESOLUTIONS[-1]
+
+    async def series(self, start: float, end: float, points: int, now: float) -> Dict[str, Any]:
+        """
+        Decimated series for [start, end]: a single PK range scan at the chosen
+        resolution, so the cost is O(points returned).
+        """
+        res = self.pick_resolution(start, end, points, now)
+        rows: List[Dict[str, Any]] = await self.db.get_equity_series(
+            res, int(start // res * res), int(end))
+
+        # Live tail: the open 1m bucket is not persisted yet
+        cur = self._cur
+        if cur is not None and start <= cur["bucket"] <= end:
+            bucket = cur["bucket"] // res * res
+            tail = {"bucket": bucket, **{k: cur[k] for k in FIELDS},
+                    "equity_min": cur["equity_min"], "equity_max": cur["equity_max"]}
+            if rows and rows[-1]["bucket"] == bucket:
+                tail["equity_min"] = min(tail["equity_min"], rows[-1]["equity_min"])
+                tail["equity_max"] = max(tail["equity_max"], rows[-1]["equity_max"])
+                rows[-1] = tail
+            else:
+                rows.append(tail)
+        return {"resolution": res, "points": rows}
+
+
+equity_series = EquitySeries()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Trade export: consistent snapshots and an incremental change feed.
+
+    python export.py snapshot --out trades_snapshot.db          # on the bot host
+    python export.py changes --since 2026-02-01 --out changes.ndjson.gz
+    python export.py pull --url http://<host>/api --replica trades_replica.db
+
+`snapshot` uses the SQLite online backup API, so it is consistent while the
+bot keeps writing. `changes` streams only trade rows changed after a cursor
+(gzip NDJSON, or Parquet when pyarrow is installed). `pull` keeps a local
+replica current over the API: the first run (or one over a stale copy without
+change tracking) downloads /export/snapshot, later runs fetch /export/changes
+after the replica's stored cursor and upsert them.
+"""
+import io
+import os
+import sys
+import gzip
+import json
+import base64
+import asyncio
+import sqlite3
+import argparse
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Tuple
+
+from models import TRADE_COLUMNS, MARK_COLUMNS, db_value
+
+EXPORT_BATCH = 5000
+# Each pull restarts this far behind its stored cursor; upserts are idempotent,
+# so a row committed slightly out of timestamp order is still picked up.
+PULL_OVERLAP_SEC = 60
+FORMATS = ("ndjson", "parquet")
+
+
+# ------------------------
+# CHANGE FEED
+# ------------------------
+def encode_change_cursor(updated_at: str, trade_id: str) -> str:
+    return base64.urlsafe_b64encode(f"{updated_at}\n{trade_id}".encode()).decode()
+
+
+def decode_change_cursor(cursor: str) -> Tuple[str, str]:
+    """(updated_at, id) of the last row already seen. Raises ValueError."""
+    try:
+        since, sep, trade_id = base64.urlsafe_b64decode(cursor.encode()).decode().partition("\n")
+    except Exception:
+        raise ValueError("invalid cursor")
+    if not sep:
+        raise ValueError("invalid cursor")
+    return since, trade_id
+
+
+async def fetch_changes(database, since: str = "", after_id: str = "",
+                        limit: int = EXPORT_BATCH) -> Tuple[List[Dict[str, Any]], str]:
+    """One batch of changed trades after (since, after_id) and the cursor that follows it."""
+    rows = await database.get_trades_changed_since(since, limit, after_id=after_id)
+    if rows:
+        since, after_id = rows[-1]["updated_at"], rows[-1]["id"]
+    return rows, encode_change_cursor(since, after_id)
+
+
+def serialize_changes(rows: List[Dict[str, Any]], fmt: str = "ndjson") -> Tuple[bytes, str]:
+    """(body, media type) for a batch of change rows."""
+    if fmt == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+        buf = io.BytesIO()
+        table = pa.Table.from_pylist(rows) if rows else pa.table({c: [] for c in TRADE_COLUMNS})
+        pq.write_table(table, buf, compression="zstd")
+        return buf.getvalue(), "application/vnd.apache.parquet"
+    text = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in rows)
+    return gzip.compress(text.encode(), compresslevel=6), "application/x-ndjson+gzip"
+
+
+def parse_ndjson_gz(body: bytes) -> List[Dict[str, Any]]:
+    return [json.loads(line) for line in gzip.decompress(body).splitlines() if line]
+
+
+# ------------------------
+# REPLICA
+# ------------------------
+_REPLICA_STATE = "CREATE TABLE IF NOT EXISTS replica_state (key TEXT PRIMARY KEY, value TEXT)"
+
+
+def install_snapshot(path: str):
+    """
+    Make a downloaded snapshot a self-contained replica: fold the trade_marks
+    overlay into trades (plain `SELECT * FROM trades` then sees live marks)
+    and start the cursor at the newest change the snapshot contains.
+    """
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode=DELETE")  # one file, easy to copy around
+        sets = ", ".join(f"{c} = m.{c}" for c in MARK_COLUMNS)
+        conn.execute(f"UPDATE trades SET {sets}, updated_at = MAX(COALESCE(trades.updated_at, ''), COALESCE(m.updated_at, '')) "
+                     "FROM trade_marks m WHERE m.trade_id = trades.id")
+        conn.execute("DELETE FROM trade_marks")
+        conn.execute(_REPLICA_STATE)
+        row = conn.execute("SELECT updated_at, id FROM trades ORDER BY updated_at DESC, id DESC LIMIT 1").fetchone()
+        conn.execute("INSERT OR REPLACE INTO replica_state VALUES ('cursor', ?)",
+                     (encode_change_cursor(*row) if row else encode_change_cursor("", ""),))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def needs_snapshot(replica: str) -> bool:
+    """
+    True unless `replica` is a replica this module installed: a missing file, or
+    a stale copy (old scp pulls) without replica_state or today's trade columns.
+    """
+    if not os.path.exists(replica):
+        return True
+    conn = sqlite3.connect(replica)
+    try:
+        tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        cols = {r[1] for r in conn.execute("PRAGMA table_info(trades)")}
+    finally:
+        conn.close()
+    return "replica_state" not in tables or not set(TRADE_COLUMNS) <= cols
+
+
+def apply_changes(conn: sqlite3.Connection, rows: List[Dict[str, Any]], cursor: str):
+    """Upsert one batch and advance the stored cursor in the same commit (resumable)."""
+    cols = ", ".join(TRADE_COLUMNS)
+    marks = ", ".join("?" * len(TRADE_COLUMNS))
+    with conn:
+        conn.executemany(f"INSERT OR REPLACE INTO trades ({cols}) VALUES ({marks})",
+                         [[db_value(c, r.get(c)) for c in TRADE_COLUMNS] for r in rows])
+        conn.execute("INSERT OR REPLACE INTO replica_state VALUES ('cursor', ?)", (cursor,))
+
+
+def rewind_cursor(cursor: str, seconds: int = PULL_OVERLAP_SEC) -> str:
+    since, _ = decode_change_cursor(cursor)
+    try:
+        since = (datetime.fromisoformat(since) - timedelta(seconds=seconds)).isoformat()
+    except ValueError:
+        return cursor
+    return encode_change_cursor(since, "")
+
+
+def pull(url: str, replica: str, user: str = None, password: str = None, token: str = None,
+         batch: int = EXPORT_BATCH) -> Dict[str, Any]:
+    import requests
+
+    url = url.rstrip("/")
+    session = requests.Session()
+    if not token:
+        resp = session.post(f"{url}/token", data={"username": user, "password": password}, timeout=30)
+        resp.raise_for_status()
+        token = resp.json()["access_token"]
+    session.headers["Authorization"] = f"Bearer {token}"
+
+    stats = {"snapshot_bytes": 0, "changes": 0, "batches": 0}
+    if needs_snapshot(replica):
+        part = replica + ".part"
+        with session.get(f"{url}/export/snapshot", stream=True, timeout=300) as resp:
+            resp.raise_for_status()
+            with open(part, "wb") as fh:
+                for chunk in resp.iter_content(1 << 20):
+                    fh.write(chunk)
+                    stats["snapshot_bytes"] += len(chunk)
+        install_snapshot(part)
+        for suffix in ("-wal", "-shm", "-journal"):  # a stale copy's sidecars must not outlive it
+            if os.path.exists(replica + suffix):
+                os.remove(replica + suffix)
+        os.replace(part, replica)
+
+    conn = sqlite3.connect(replica)
+    try:
+        conn.execute(_REPLICA_STATE)
+        row = conn.execute("SELECT value FROM replica_state WHERE key = 'cursor'").fetchone()
+        cursor = rewind_cursor(row[0]) if row else encode_change_cursor("", "")
+        while True:
+            resp = session.get(f"{url}/export/changes", params={"cursor": cursor, "limit": batch}, timeout=120)
+            resp.raise_for_status()
+            rows = parse_ndjson_gz(resp.content)
+            cursor = resp.headers.get("X-Next-Cursor", cursor)
+            apply_changes(conn, rows, cursor)
+            stats["changes"] += len(rows)
+            stats["batches"] += 1
+            if len(rows) < batch:
+                break
+    finally:
+        conn.close()
+    return stats
+
+
+# ------------------------
+# CLI
+# ------------------------
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Snapshot trades.db or export/pull trade changes.")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    sp = sub.add_parser("snapshot", help="Consistent copy of the live DB (online backup API)")
+    sp.add_argument("--db", default="trades.db")
+    sp.add_argument("--out", required=True)
+
+    cp = sub.add_parser("changes", help="Trade rows changed after a cursor / timestamp")
+    cp.add_argument("--db", default="trades.db")
+    cp.add_argument("--since", default="", help="ISO time (exclusive)")
+    cp.add_argument("--cursor", default=None, help="X-Next-Cursor of a previous export")
+    cp.add_argument("--format", choices=FORMATS, default="ndjson")
+    cp.add_argument("--out", required=True)
+
+    pp = sub.add_parser("pull", help="Create or update a local replica over the API")
+    pp.add_argument("--url", required=True, help="API base URL, e.g. http://host/api")
+    pp.add_argument("--replica", default="trades_replica.db")
+    pp.add_argument("--user", default=os.environ.get("EXPORT_USER"))
+    pp.add_argument("--password", default=os.environ.get("EXPORT_PASSWORD"))
+    pp.add_argument("--token", default=os.environ.get("EXPORT_TOKEN"))
+    pp.add_argument("--batch", type=int, default=EXPORT_BATCH)
+    args = ap.parse_args(argv)
+
+    if args.command == "pull":
+        if not args.token and not (args.user and args.password):
+            ap.error("pull needs --token or --user/--password (or EXPORT_* env)")
+        stats = pull(args.url, args.replica, args.user, args.password, args.token, args.batch)
+        print(f"✅ Replica {args.replica}: {stats['changes']} change(s) in {stats['batches']} batch(es)"
+              + (f", snapshot {stats['snapshot_bytes'] / 1e6:.1f} MB" if stats["snapshot_bytes"] else ""))
+        return 0
+
+    from database import Database
+
+    async def go():
+        database = Database(args.db, readers=1)
+        try:
+            if args.command == "snapshot":
+                size = await database.backup_to(args.out)
+                print(f"✅ Snapshot {args.out} ({size / 1e6:.1f} MB)")
+                return
+            since, after_id = decode_change_cursor(args.cursor) if args.cursor else (args.since, "")
+            rows = []
+            while True:
+                batch, cursor = await fetch_changes(database, since, after_id)
+                rows += batch
+                if len(batch) < EXPORT_BATCH:
+                    break
+                since, after_id = decode_change_cursor(cursor)
+            body, _ = serialize_changes(rows, args.format)
+            with open(args.out, "wb") as fh:
+                fh.write(body)
+            print(f"✅ {len(rows)} change(s) -> {args.out}")
+            print(f"   next cursor: {cursor}")
+        finally:
+            await database.close()
+
+    asyncio.run(go())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+import io
+import os
+import sys
+import json
+import struct
+import asyncio
+import hashlib
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+# ------------------------
+# DECISION JOURNAL
+# ------------------------
+# Append-only, one file per UTC day: journal/YYYY-MM-DD.jrnl
+# Each strategy cycle is one frame:
+#   [MAGIC 4B][cycle_id uint64 (ms)][payload_len uint32][payload]
+# The payload is a compressed .npz with columnar arrays:
+#   ohlcv_1h / ohlcv_entry : float64 (rows, 6), all symbols concatenated
+#   off_1h / off_entry     : int64 (symbols + 1) row offsets per symbol
+#   meta                   : uint8 JSON (tickers digest, contexts, decisions, timings)
+
+JOURNAL_DIR = os.environ.get("JOURNAL_DIR", "journal")
+JOURNAL_ENABLED = os.environ.get("JOURNAL_ENABLED", "1") == "1"
+
+MAGIC = b"AJR1"
+HEADER = struct.Struct("<4sQI")
+
+
+def _json_default(o):
+    if isinstance(o, (np.floating,)):
+        return float(o)
+    if isinstance(o, (np.integer,)):
+        return int(o)
+    if isinstance(o, (np.bool_,)):
+        return bool(o)
+    return str(o)
+
+
+def _normalize(obj):
+    """Round-trip through JSON so live and replayed diagnostics compare equal."""
+    return json.loads(json.dumps(obj, default=_json_default, sort_keys=True))
+
+
+def tickers_digest(tickers):
+    """Stable digest of the ticker fields the scanner actually uses."""
+    h = hashlib.sha256()
+    for s in sorted(tickers):
+        t = tickers[s]
+        h.update(f"{s}|{t.get('last')!r}|{t.get('percentage')!r};".encode())
+    return h.hexdigest()[:32]
+
+
+def _pack_ohlcv(series):
+    offsets = np.zeros(len(series) + 1, dtype=np.int64)
+    for i, rows in enumerate(series):
+        offsets[i + 1] = offsets[i] + len(rows)
+    data = np.empty((offsets[-1], 6), dtype=np.float64)
+    for i, rows in enumerate(series):
+        if rows:
+            data[offsets[i]:offsets[i + 1]] = np.asarray(rows, dtype=np.float64)
+    return data, offsets
+
+
+def _unpack_ohlcv(data, offsets, i):
+    rows = data[offsets[i]:offsets[i + 1]]
+    # ccxt delivers ts as int and OHLCV as float: rebuild exactly that
+    return [[int(r[0]), float(r[1]), float(r[2]), float(r[3]), float(r[4]), float(r[5])] for r in rows]
+
+
+class CycleRecorder:
+    """Collects everything one strategy cycle saw and decided."""
+
+    def __init__(self, now_ts=None):
+        now_ts = time.time() if now_ts is None else now_ts
+        self.cycle_id = int(now_ts * 1000)
+        self.meta = {
+            "cycle_id": self.cycle_id,
+            "started": datetime.fromtimestamp(now_ts, timezone.utc).isoformat(),
+            "tickers_digest": None,
+            "timings": {},
+            "scans": [],
+        }
+        self._ohlcv_1h = []
+        self._ohlcv_entry = []
+        self._t0 = time.perf_counter()
+
+    def record_tickers(self, tickers):
+        self.meta["tickers_digest"] = tickers_digest(tickers)
+        self.meta["tickers_count"] = len(tickers)
+
+    def record(self, key, value):
+        self.meta[key] = _normalize(value)
+
+    def record_timing(self, name, seconds):
+        self.meta["timings"][name] = round(seconds, 6)
+
+    def record_scan(self, symbol, ohlcv_1h, ohlcv_entry, context, is_valid, diagnostic, timings):
+        ctx = {k: v for k, v in context.items() if k != "ohlcv_1h"}
+        self.meta["scans"].append({
+            "symbol": symbol,
+            "context": _normalize(ctx),
+            "signal": bool(is_valid),
+            "diagnostic": _normalize(diagnostic),
+            "timings": {k: round(v, 6) for k, v in timings.items()},
+        })
+        self._ohlcv_1h.append(ohlcv_1h or [])
+        self._ohlcv_entry.append(ohlcv_entry or [])
+
+    def encode(self):
+        self.meta["timings"]["total"] = round(time.perf_counter() - self._t0, 6)
+        o1, off1 = _pack_ohlcv(self._ohlcv_1h)
+        oe, offe = _pack_ohlcv(self._ohlcv_entry)
+        meta = np.frombuffer(json.dumps(self.meta, default=_json_default).encode(), dtype=np.uint8)
+
+        buf = io.BytesIO()
+        np.savez_compressed(buf, ohlcv_1h=o1, off_1h=off1, ohlcv_entry=oe, off_entry=offe, meta=meta)
+        payload = buf.getvalue()
+        return HEADER.pack(MAGIC, self.cycle_id, len(payload)) + payload
+
+
+class DecisionJournal:
+    def __init__(self, root=JOURNAL_DIR, enabled=JOURNAL_ENABLED):
+        self.root = root
+        self.enabled = enabled
+
+    def begin_cycle(self, now_ts=None):
+        return CycleRecorder(now_ts) if self.enabled else None
+
+    def _path_for(self, cycle_id):
+        day = datetime.fromtimestamp(cycle_id / 1000, timezone.utc).strftime("%Y-%m-%d")
+        return os.path.join(self.root, f"{day}.jrnl")
+
+    def _append(self, frame, cycle_id):
+        os.makedirs(self.root, exist_ok=True)
+        with open(self._path_for(cycle_id), "ab") as f:
+            f.write(frame)
+        return len(frame)
+
+    def _write_cycle(self, rec):
+        return self._append(rec.encode(), rec.cycle_id)
+
+    async def commit(self, rec):
+        """Encode (np.savez_compressed) and append one cycle in a worker thread. Returns bytes written."""
+        if rec is None:
+            return 0
+        return await asyncio.to_thread(self._write_cycle, rec)
+
+    # ------------------
+    # READING
+    # ------------------
+    def iter_frames(self, path):
+        """Yield (cycle_id, offset, length) without decoding payloads."""
+        with open(path, "rb") as f:
+            while True:
+                head = f.read(HEADER.size)
+                if len(head) < HEADER.size:
+                    return
+                magic, cycle_id, length = HEADER.unpack(head)
+                if magic != MAGIC:
+                    raise ValueError(f"Corrupt journal frame in {path} at {f.tell() - HEADER.size}")
+                yield cycle_id, f.tell(), length
+                f.seek(length, os.SEEK_CUR)
+
+    def load_cycle(self, cycle_id=None, day=None):
+        """Decode one cycle (latest of the day when cycle_id is None)."""
+        if day is None:
+            ref = cycle_id if cycle_id is not None else int(time.time() * 1000)
+            path = self._path_for(ref)
+        else:
+            path = os.path.join(self.root, f"{day}.jrnl")
+
+        found = None
+        for cid, offset, length in self.iter_frames(path):
+            if cycle_id is None or cid == cycle_id:
+                found = (cid, offset, length)
+                if cycle_id is not None:
+                    break
+        if found is None:
+            raise KeyError(f"Cycle {cycle_id} not found in {path}")
+
+        with open(path, "rb") as f:
+            f.seek(found[1])
+            payload = f.read(found[2])
+        z = np.load(io.BytesIO(payload))
+        meta = json.loads(z["meta"].tobytes().decode())
+
+        scans = []
+        for i, scan in enumerate(meta["scans"]):
+            context = dict(scan["context"])
+            context["ohlcv_1h"] = _unpack_ohlcv(z["ohlcv_1h"], z["off_1h"], i)
+            scans.append({**scan, "context": context,
+                          "ohlcv_entry": _unpack_ohlcv(z["ohlcv_entry"], z["off_entry"], i)})
+        meta["scans"] = scans
+        return meta
+
+
+def replay_cycle(cycle, symbol=None):
+    """
+    Re-run check_signal on the exact inputs of a journaled cycle.
+    Returns a list of (symbol, recorded_signal, replayed_signal, match, diagnostic).
+    """
+    from logic.strategy import StrategyManager
+
+    results = []
+    for scan in cycle["scans"]:
+        if symbol and scan["symbol"] != symbol:
+            continue
+        sig, diag = StrategyManager.check_signal(scan["symbol"], scan["ohlcv_entry"], scan["context"])
+        match = bool(sig) == scan["signal"] and _normalize(diag) == scan["diagnostic"]
+        results.append((scan["symbol"], scan["signal"], bool(sig), match, _normalize(diag)))
+    return results
+
+
+journal = DecisionJournal()
+
+
+def main(argv):
+    """
+    Usage:
+        python journal.py list [YYYY-MM-DD]
+        python journal.py show <cycle_id|latest> [YYYY-MM-DD]
+        python journal.py replay <cycle_id|latest> [YYYY-MM-DD] [SYMBOL]
+    """
+    if len(argv) < 2 or argv[1] not in ("list", "show", "replay"):
+        print(main.__doc__)
+        return 1
+
+    cmd = argv[1]
+    if cmd == "list":
+        day = argv[2] if len(argv) > 2 else datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        path = os.path.join(journal.root, f"{day}.jrnl")
+        for cid, _, length in journal.iter_frames(path):
+            ts = datetime.fromtimestamp(cid / 1000, timezone.utc).strftime("%H:%M:%S")
+            print(f"{cid}  {ts} UTC  {length / 1024:.1f} KB")
+        return 0
+
+    cycle_id = None if len(argv) < 3 or argv[2] == "latest" else int(argv[2])
+    day = argv[3] if len(argv) > 3 else None
+    cycle = journal.load_cycle(cycle_id, day)
+
+    if cmd == "show":
+        summary = {k: v for k, v in cycle.items() if k != "scans"}
+        print(json.dumps(summary, indent=2))
+        for scan in cycle["scans"]:
+            print(f"{scan['symbol']:<16} signal={scan['signal']!s:<5} {scan['diagnostic'].get('reason', '')}")
+        return 0
+
+    symbol = argv[4] if len(argv) > 4 else None
+    results = replay_cycle(cycle, symbol)
+    mismatches = 0
+    for sym, recorded, replayed, match, diag in results:
+        mark = "✅" if match else "❌"
+        if not match:
+            mismatches += 1
+        print(f"{mark} {sym:<16} recorded={recorded!s:<5} replayed={replayed!s:<5} {diag.get('reason', '')}")
+    print(f"--- Replayed {len(results)} scans of cycle {cycle['cycle_id']}: {mismatches} mismatches ---")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,218 @@
+import uuid
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from serialization import dumps
+
+logger = logging.getLogger("TradingBot")
+
+# ------------------------
+# LIVE PUSH HUB (SSE)
+# ------------------------
+# One in-memory copy of what the dashboard shows. The watcher and strategy
+# loops publish() into it; every change is diffed against the previous value,
+# serialized ONCE and the same frame is queued for every connected client.
+# Cost per update does not depend on how many dashboards are open. A client
+# that falls behind (queue full) gets a fresh snapshot instead of a backlog.
+#
+# Frames (text/event-stream):
+#   event: snapshot  data: {"seq", "keys", "state": {topic: value}}
+#   event: <topic>   data: {"seq", "upsert": [...], "remove": [keys], "order": [keys]}  keyed lists
+#                    data: {"seq", "set": {...}, "unset": [...]}                         dicts
+#                    data: {"seq", "replace": value}                                    anything else
+#   event: hello     data: {"client"}   first frame: the id subscribe() takes
+#   event: ping      data: {}   heartbeat every HEARTBEAT_SEC while idle
+# Candle topics are "candle:<SYMBOL>@<interval>" and only go to clients that
+# subscribed to that chart. A dashboard keeps ONE stream and changes its charts
+# with subscribe() (POST /stream/charts) instead of opening one per chart.
+
+CLIENT_QUEUE_MAX = 256
+HEARTBEAT_SEC = 15
+CANDLE_PREFIX = "candle:"
+
+
+def _dumps(obj) -> str:
+    return dumps(obj).decode()
+
+
+def _row_key(row: Dict[str, Any], key: Tuple[str, ...]) -> str:
+    return "|".join(str(row.get(k, "")) for k in key)
+
+
+def _list_delta(old: Optional[List[Dict]], new: List[Dict], key: Tuple[str, ...]) -> Optional[Dict]:
+    old_by = {_row_key(r, key): r for r in (old or [])}
+    new_keys = [_row_key(r, key) for r in new]
+    upsert = [r for k, r in zip(new_keys, new) if old_by.get(k) != r]
+    present = set(new_keys)
+    remove = [k for k in old_by if k not in present]
+    delta: Dict[str, Any] = {}
+    if upsert:
+        delta["upsert"] = upsert
+    if remove:
+        delta["remove"] = remove
+    if list(old_by) != new_keys:
+        delta["order"] = new_keys
+    return delta or None
+
+
+def _dict_delta(old: Optional[Dict], new: Dict) -> Optional[Dict]:
+    old = old or {}
+    changed = {k: v for k, v in new.items() if k not in old or old[k] != v}
+    removed = [k for k in old if k not in new]
+    delta: Dict[str, Any] = {}
+    if changed:
+        delta["set"] = changed
+    if removed:
+        delta["unset"] = removed
+    return delta or None
+
+
+def _copy(value):
+    if isinstance(value, list):
+        return [dict(r) if isinstance(r, dict) else r for r in value]
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+class LiveClient:
+    def __init__(self, charts: Set[str]):
+        self.id = uuid.uuid4().hex
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=CLIENT_QUEUE_MAX)
+        self.charts = charts  # "SYMBOL@interval"
+        self.resync = False   # backlog dropped; next frame it reads is a full snapshot
+
+
+class LiveHub:
+    def __init__(self):
+        self.state: Dict[str, Any] = {}
+        self.keys: Dict[str, Tuple[str, ...]] = {}
+        self.seq = 0
+        self.clients: Dict[str, LiveClient] = {}
+        self.frames_sent = 0
+        self.resyncs = 0
+        self._snapshot: Optional[Tuple[int, str]] = None  # (seq, frame) without candle topics
+
+    @property
+    def has_clients(self) -> bool:
+        return bool(self.clients)
+
+    def chart_subscriptions(self) -> Set[str]:
+        subs: Set[str] = set()
+        for c in self.clients.values():
+            subs |= c.charts
+        return subs
+
+    # ------------------
+    # PUBLISH
+    # ------------------
+    def publish(self, topic: str, value: Any, key: Optional[Iterable[str]] = None) -> bool:
+        """Diff `value` against the current state of `topic`; broadcast if it changed."""
+        old = self.state.get(topic)
+        if key is not None:
+            self.keys[topic] = tuple(key)
+        if topic not in self.state:
+            delta = {"replace": value}
+        elif key is not None and isinstance(value, list):
+            delta = _list_delta(old, value, self.keys[topic])
+        elif isinstance(value, dict) and isinstance(old, dict):
+            delta = _dict_delta(old, value)
+        else:
+            delta = None if old == value else {"replace": value}
+        if delta is None:
+            return False
+
+        self.state[topic] = _copy(value)
+        self.seq += 1
+        frame = f"id: {self.seq}\nevent: {topic}\ndata: {_dumps({'seq': self.seq, **delta})}\n\n"
+        chart = topic[len(CANDLE_PREFIX):] if topic.startswith(CANDLE_PREFIX) else None
+        for c in list(self.clients.values()):
+            if c.resync or (chart is not None and chart not in c.charts):
+                continue
+            try:
+                c.queue.put_nowait(frame)
+                self.frames_sent += 1
+            except asyncio.QueueFull:
+                # Too slow: drop its backlog and resend the whole state instead
+                while not c.queue.empty():
+                    c.queue.get_nowait()
+                c.queue.put_nowait(None)
+                c.resync = True
+                self.resyncs += 1
+        return True
+
+    # ------------------
+    # CLIENTS
+    # ------------------
+    def _snapshot_frame(self, client: LiveClient) -> str:
+        if not client.charts and self._snapshot and self._snapshot[0] == self.seq:
+            return self._snapshot[1]
+        state = {
+            t: v for t, v in self.state.items()
+            if not t.startswith(CANDLE_PREFIX) or t[len(CANDLE_PREFIX):] in client.charts
+        }
+        data = {"seq": self.seq, "keys": {t: list(k) for t, k in self.keys.items()}, "state": state}
+        frame = f"id: {self.seq}\nevent: snapshot\ndata: {_dumps(data)}\n\n"
+        if not client.charts:
+            self._snapshot = (self.seq, frame)
+        return frame
+
+    def subscribe(self, client_id: str, charts: Iterable[str]) -> bool:
+        """Replace a connected client's chart subscriptions; False if it is gone."""
+        client = self.clients.get(client_id)
+        if client is None:
+            return False
+        charts = {c for c in charts if c}
+        for chart in sorted(charts - client.charts):
+            value = self.state.get(f"{CANDLE_PREFIX}{chart}")
+            if value is None or client.resync:
+                continue  # first publish for the chart delivers it
+            try:
+                client.queue.put_nowait(f"id: {self.seq}\nevent: {CANDLE_PREFIX}{chart}\n"
+                                        f"data: {_dumps({'seq': self.seq, 'replace': value})}\n\n")
+            except asyncio.QueueFull:
+                pass  # the next publish for the chart catches it up
+        client.charts = charts
+        return True
+
+    def disconnect(self, client: LiveClient):
+        self.clients.pop(client.id, None)
+
+    async def stream(self, charts: Iterable[str] = ()):
+        """
+        SSE body for one client. The client is registered on the first
+        iteration (a response that is never sent leaves nothing behind) and
+        unregistered when the connection closes.
+        """
+        client = LiveClient({c for c in charts if c})
+        self.clients[client.id] = client
+        try:
+            yield "retry: 3000\n\n"
+            yield f"event: hello\ndata: {_dumps({'client': client.id})}\n\n"
+            yield self._snapshot_frame(client)
+            while True:
+                try:
+                    frame = await asyncio.wait_for(client.queue.get(), HEARTBEAT_SEC)
+                except asyncio.TimeoutError:
+                    yield "event: ping\ndata: {}\n\n"  # visible to EventSource (liveness)
+                    continue
+                if frame is None:
+                    client.resync = False
+                    frame = self._snapshot_frame(client)
+                yield frame
+        finally:
+            self.disconnect(client)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "clients": len(self.clients),
+            "topics": len(self.state),
+            "seq": self.seq,
+            "frames_sent": self.frames_sent,
+            "resyncs": self.resyncs,
+            "charts": sorted(self.chart_subscriptions()),
+        }
+
+
+live_hub = LiveHub()
@@ -0,0 +1,177 @@
+import heapq
+from collections import Counter
+from datetime import datetime
+from typing import NamedTuple
+
+# ------------------------
+# PORTFOLIO CONSTRAINT SIMULATOR
+# ------------------------
+# Replays a stream of candidate signals through the same gates main.py applies
+# in execute_buy -> symbol_exposure_ok -> can_place_trade, in the same order,
+# with the same reason strings. Keep DEFAULT_LIMITS in sync with main.py.
+# Same semantics as main.py too: the daily reset follows the host's LOCAL date
+# (clock.today()), and the per-symbol cooldown matches any "strategy:symbol"
+# key that CONTAINS the symbol (so "ETH/USDT" is also cooled by "METH/USDT").
+
+DEFAULT_LIMITS = {
+    "base_balance": 200.0,            # BASE_BALANCE
+    "trade_usd": 20.0,                # app_state trade_usd (user cap)
+    "base_risk": 0.02,                # BASE_RISK in execute_buy
+    "commission_pct": 0.001,          # COMMISSION_PCT
+    "max_order_usd": 120.0,           # MAX_ORDER_USD
+    "max_position_count": 12,         # MAX_POSITION_COUNT
+    "max_trades_per_day": 30,         # MAX_TRADES_PER_DAY
+    "max_symbol_exposure_usd": 120.0,  # MAX_SYMBOL_EXPOSURE_USD
+    "per_symbol_cooldown_sec": 3600,  # PER_SYMBOL_COOLDOWN_SEC
+    "exit_cooldown_sec": 3600,        # register_trade_close cooldown
+}
+
+
+class Signal(NamedTuple):
+    ts: float          # entry time (epoch seconds)
+    symbol: str
+    strategy: str
+    entry: float
+    sl: float
+    exit_ts: float     # resolved exit time (epoch seconds)
+    exit_price: float
+
+
+def calculate_position_limits(equity, free, open_position_count, max_position_count=12, max_order_usd=120.0):
+    """Same rules as main.calculate_position_limits. Returns (max_positions, trade_usd)."""
+    calculated_max_pos = max(3, min(12, int(equity / 30)))
+    max_positions = min(calculated_max_pos, max_position_count)
+    if open_position_count >= max_positions:
+        return max_positions, 0.0
+    remaining_slots = max(1, max_positions - open_position_count)
+    trade_usd = max(10.0, (free * 0.95) / remaining_slots)
+    return max_positions, min(trade_usd, max_order_usd)
+
+
+def simulate(signals, **overrides):
+    """
+    Apply the portfolio constraints to `signals` (iterable of Signal, any order).
+
+    Open positions sit in a heap keyed by exit time and cooldowns in a heap
+    keyed by expiry, so each signal costs O(log n) regardless of history length.
+
+    Returns dict: accepted, rejected (Counter by reason), realized_pnl,
+    final_equity, max_open, trades (list of accepted (Signal, usd, pnl)).
+    """
+    lim = dict(DEFAULT_LIMITS, **overrides)
+    unknown = set(overrides) - set(DEFAULT_LIMITS)
+    if unknown:
+        raise ValueError(f"Unknown limits: {sorted(unknown)}")
+
+    signals = sorted(signals, key=lambda s: s.ts)
+
+    realized = 0.0
+    locked = 0.0
+    open_heap = []          # (exit_ts, seq, symbol, usd, pnl)
+    open_by_symbol = Counter()
+    exposure = Counter()
+    exit_cooldowns = {}     # symbol -> expiry
+    cooldown_heap = []      # (expiry, symbol)
+    last_open = {}          # "strategy:symbol" -> ts of last open (last_trade_ts_map)
+    trades_today = 0
+    current_day = None
+    rejected = Counter()
+    accepted = []
+    max_open = 0
+    seq = 0
+
+    def close_until(ts):
+        nonlocal realized, locked
+        while open_heap and open_heap[0][0] <= ts:
+            exit_ts, _, symbol, usd, pnl = heapq.heappop(open_heap)
+            realized += pnl
+            locked -= usd
+            open_by_symbol[symbol] -= 1
+            exposure[symbol] -= usd
+            expiry = exit_ts + lim["exit_cooldown_sec"]
+            exit_cooldowns[symbol] = expiry
+            heapq.heappush(cooldown_heap, (expiry, symbol))
+
+    for sig in signals:
+        ts = sig.ts
+        close_until(ts)
+
+        # Expired cooldowns fall off the heap (stale heap entries are skipped)
+        while cooldown_heap and cooldown_heap[0][0] <= ts:
+            expiry, symbol = heapq.heappop(cooldown_heap)
+            if exit_cooldowns.get(symbol) == expiry:
+                del exit_cooldowns[symbol]
+
+        # daily_reset_if_needed (local date, like clock.today())
+        day = datetime.fromtimestamp(ts).date()
+        if day != current_day:
+            current_day = day
+            trades_today = 0
+            last_open.clear()  # last_trade_ts_map is reset daily too
+
+        # execute_buy sizing (paper equity, unrealized ignored)
+        equity = lim["base_balance"] + realized
+        free = max(0.0, lim["base_balance"] + realized - locked)
+        sl_dist = sig.entry - sig.sl
+        if sig.entry <= 0 or sl_dist <= 0:
+            rejected["invalid_sl"] += 1
+            continue
+        risk_based_usd = (equity * lim["base_risk"] / sl_dist) * sig.entry
+        usd = min(risk_based_usd, lim["trade_usd"], equity * 0.50, free * 0.98)
+        if usd < 5:
+            rejected["size_too_small"] += 1
+            continue
+
+        # symbol_exposure_ok
+        if exposure[sig.symbol] + usd > lim["max_symbol_exposure_usd"]:
+            rejected["symbol_exposure"] += 1
+            continue
+
+        # can_place_trade
+        if usd > lim["max_order_usd"]:
+            rejected["order_too_large"] += 1
+            continue
+        if trades_today >= lim["max_trades_per_day"]:
+            rejected["trade_limit"] += 1
+            continue
+        n_open = len(open_heap)
+        max_positions, _ = calculate_position_limits(
+            equity, free, n_open, lim["max_position_count"], lim["max_order_usd"])
+        if n_open >= max_positions:
+            rejected["max_positions"] += 1
+            continue
+        if open_by_symbol[sig.symbol] > 0:
+            rejected["symbol_already_held"] += 1
+            continue
+        if sig.symbol in exit_cooldowns:
+            rejected["exit_cooldown_active"] += 1
+            continue
+        if any(sig.symbol in key and (ts - last_ts) < lim["per_symbol_cooldown_sec"]
+               for key, last_ts in last_open.items()):
+            rejected["symbol_cooldown"] += 1
+            continue
+
+        # Fill at entry, exit at the resolved exit
+        # (execute_sell books only the exit fee into pnl; entry fees live in fees_usd)
+        qty = usd / sig.entry
+        pnl = (sig.exit_price - sig.entry) * qty - (sig.exit_price * qty) * lim["commission_pct"]
+
+        heapq.heappush(open_heap, (max(sig.exit_ts, ts), seq, sig.symbol, usd, pnl))
+        seq += 1
+        locked += usd
+        open_by_symbol[sig.symbol] += 1
+        exposure[sig.symbol] += usd
+        last_open[f"{sig.strategy}:{sig.symbol}"] = ts
+        trades_today += 1
+        max_open = max(max_open, len(open_heap))
+        accepted.append((sig, usd, pnl))
+
+    close_until(float("inf"))
+    return {
+        "accepted": len(accepted),
+        "rejected": rejected,
+        "realized_pnl": realized,
+        "final_equity": lim["base_balance"] + realized,
+        "max_open": max_open,
+        "trades": accepted,
+    }
@@ -0,0 +1,191 @@
+import numpy as np
+
+# Outcome codes
+EXIT_OPEN = 0    # Neither level touched inside the window (time exit)
+EXIT_TP = 1      # Take profit touched first
+EXIT_SL = -1     # Stop loss touched first
+EXIT_AMBIGUOUS = 2  # Both levels inside the same candle, order unknown
+
+MINUTE_MS = 60 * 1000
+
+
+def build_windows(candles, starts_ms, ends_ms, width=None):
+    """
+    Gather per-trade candle windows from ONE symbol's sorted 1m candle array.
+
+    candles: (n, 6) array [ts, open, high, low, close, vol]
+    starts_ms / ends_ms: per-trade window bounds. The window begins with the
+    candle that CONTAINS the entry (so fast exits are not missed) and ends
+    before ends_ms.
+
+    Returns (ts, high, low, close) matrices of shape (trades, width). Slots past
+    a trade's window are padded so they can never trigger a hit:
+    high=-inf, low=+inf, ts=-1, close=NaN.
+    """
+    starts_ms = np.asarray(starts_ms, dtype=np.float64)
+    ends_ms = np.asarray(ends_ms, dtype=np.float64)
+    n_trades = len(starts_ms)
+    ts = candles[:, 0] if len(candles) else np.empty(0)
+
+    first = np.searchsorted(ts, starts_ms - MINUTE_MS + 1, side="left")
+    last = np.searchsorted(ts, ends_ms, side="left")
+    lengths = np.maximum(last - first, 0)
+
+    if width is None:
+        width = int(lengths.max()) if n_trades else 0
+    width = max(int(width), 1)
+
+    idx = first[:, None] + np.arange(width)[None, :]
+    valid = np.arange(width)[None, :] < lengths[:, None]
+
+    if len(candles) == 0:
+        valid[:] = False
+        idx = np.zeros_like(idx)
+    else:
+        idx = np.minimum(idx, len(candles) - 1)
+
+    win_ts = np.where(valid, candles[idx, 0] if len(candles) else 0, -1.0)
+    high = np.where(valid, candles[idx, 2] if len(candles) else 0, -np.inf)
+    low = np.where(valid, candles[idx, 3] if len(candles) else 0, np.inf)
+    close = np.where(valid, candles[idx, 4] if len(candles) else 0, np.nan)
+    return win_ts, high, low, close
+
+
+def first_passage(high, low, sl, tp):
+    """
+    Vectorized first-passage search.
+
+    high/low: (trades, width) candle matrices (padded with -inf/+inf).
+    sl: (trades,) stop levels, <= 0 disables the stop.
+    tp: (trades,) or (trades, k) targets, <= 0 disables the target.
+
+    Returns (idx_sl, idx_tp). An index equal to `width` means never touched.
+    Uses running extremes, so each index is a count over a monotone row and
+    the whole search is a handful of array ops regardless of trade count.
+    """
+    width = high.shape[1]
+    run_max = np.maximum.accumulate(high, axis=1)
+    run_min = np.minimum.accumulate(low, axis=1)
+
+    sl = np.asarray(sl, dtype=np.float64)
+    idx_sl = (run_min > sl[:, None]).sum(axis=1)
+    idx_sl = np.where(sl > 0, idx_sl, width)
+
+    tp = np.asarray(tp, dtype=np.float64)
+    if tp.ndim == 1:
+        idx_tp = (run_max < tp[:, None]).sum(axis=1)
+    else:
+        idx_tp = (run_max[:, :, None] < tp[:, None, :]).sum(axis=1)
+    idx_tp = np.where(tp > 0, idx_tp, width)
+
+    return idx_sl, idx_tp
+
+
+def classify(idx_sl, idx_tp, width):
+    """Map first-passage indices to outcome codes (see EXIT_*)."""
+    if idx_tp.ndim == 2:
+        idx_sl = idx_sl[:, None]
+    return np.where(
+        idx_tp < idx_sl, EXIT_TP,
+        np.where(idx_sl < idx_tp, EXIT_SL,
+                 np.where(idx_sl >= width, EXIT_OPEN, EXIT_AMBIGUOUS))
+    )
+
+
+def aggregate_trades_1s(ts_ms, prices):
+    """
+    Aggregate raw trades (ms timestamps, prices) into 1s high/low bars.
+    Returns (ts, high, low) arrays, ts being the second start in ms.
+    """
+    ts_ms = np.asarray(ts_ms, dtype=np.int64)
+    prices = np.asarray(prices, dtype=np.float64)
+    if len(ts_ms) == 0:
+        return np.empty(0), np.empty(0), np.empty(0)
+
+    order = np.argsort(ts_ms, kind="stable")
+    sec = (ts_ms[order] // 1000) * 1000
+    px = prices[order]
+    starts = np.flatnonzero(np.r_[True, sec[1:] != sec[:-1]])
+    return (sec[starts].astype(np.float64),
+            np.maximum.reduceat(px, starts),
+            np.minimum.reduceat(px, starts))
+
+
+def resolve_exits(win_ts, high, low, close, sl, tp, entry_ms=None,
+                  refine=None, ambiguous="pessimistic"):
+    """
+    Resolve the true SL/TP hit order for a batch of trades.
+
+    refine(trade_index, candle_open_ms) -> (ts, high, low) 1s bars or None.
+    It is only called for candles where both levels were touched (and the
+    entry candle, whose pre-entry prices are mixed in), so sub-minute data
+    is only fetched for the handful of trades that need it.
+
+    tp must be 1-D here; for grids of targets call first_passage/classify
+    directly with a (trades, k) tp matrix.
+
+    ambiguous: policy for unresolved same-candle hits:
+        "pessimistic" -> SL first, "optimistic" -> TP first, "keep" -> EXIT_AMBIGUOUS
+
+    Returns dict of arrays: outcome, exit_idx, exit_ts, exit_price.
+    """
+    width = high.shape[1]
+    sl = np.asarray(sl, dtype=np.float64)
+    tp = np.asarray(tp, dtype=np.float64)
+    idx_sl, idx_tp = first_passage(high, low, sl, tp)
+    outcome = classify(idx_sl, idx_tp, width)
+
+    # The entry candle also holds prices from BEFORE the fill: treat any hit
+    # there as ambiguous unless 1s data can prove the order.
+    if entry_ms is not None:
+        entry_ms = np.asarray(entry_ms, dtype=np.float64)
+        in_entry = (np.minimum(idx_sl, idx_tp) == 0) & (win_ts[:, 0] < entry_ms)
+        outcome = np.where(in_entry & (outcome != EXIT_OPEN), EXIT_AMBIGUOUS, outcome)
+
+    if refine is not None:
+        for i in np.flatnonzero(outcome == EXIT_AMBIGUOUS):
+            k = int(min(idx_sl[i], idx_tp[i]))
+            bars = refine(int(i), float(win_ts[i, k]))
+            if bars is None or len(bars[0]) == 0:
+                continue
+            b_ts, b_high, b_low = (np.asarray(a, dtype=np.float64) for a in bars)
+            if entry_ms is not None and k == 0:
+                keep = b_ts >= (entry_ms[i] // 1000) * 1000
+                b_high, b_low = b_high[keep], b_low[keep]
+                if len(b_high) == 0:
+                    continue
+            s, t = first_passage(b_high[None, :], b_low[None, :], sl[i:i + 1], tp[i:i + 1])
+            code = classify(s, t, len(b_high))[0]
+            if code == EXIT_OPEN:
+                if k != 0:
+                    continue  # 1s data incomplete, leave it ambiguous
+                # Entry-candle hit was pre-fill only: continue from the next candle
+                s2, t2 = first_passage(high[i:i + 1, 1:], low[i:i + 1, 1:], sl[i:i + 1], tp[i:i + 1])
+                code = classify(s2, t2, width - 1)[0]
+                idx_sl[i] = s2[0] + 1 if s2[0] < width - 1 else width
+                idx_tp[i] = t2[0] + 1 if t2[0] < width - 1 else width
+            outcome[i] = code
+
+    if ambiguous == "pessimistic":
+        outcome = np.where(outcome == EXIT_AMBIGUOUS, EXIT_SL, outcome)
+    elif ambiguous == "optimistic":
+        outcome = np.where(outcome == EXIT_AMBIGUOUS, EXIT_TP, outcome)
+
+    # Exit index: hit candle, or the last valid candle for time exits
+    last_valid = (win_ts >= 0).sum(axis=1) - 1
+    exit_idx = np.where(outcome == EXIT_TP, idx_tp,
+                        np.where(outcome == EXIT_OPEN, last_valid, np.minimum(idx_sl, idx_tp)))
+    exit_idx = np.clip(exit_idx, 0, width - 1)
+
+    rows = np.arange(len(sl))
+    exit_ts = win_ts[rows, exit_idx]
+    exit_price = np.where(outcome == EXIT_TP, tp,
+                          np.where(outcome == EXIT_OPEN, close[rows, exit_idx], sl))
+    exit_price = np.where(outcome == EXIT_AMBIGUOUS, np.nan, exit_price)
+
+    return {
+        "outcome": outcome,
+        "exit_idx": exit_idx,
+        "exit_ts": exit_ts,
+        "exit_price": exit_price,
+    }
@@ -4,10 +4,14 @@
 # Standard Imports
 import os
 import math
+import base64
 import uuid
+import shutil
+import tempfile
+import time
 import asyncio
 import logging
-from datetime import datetime, timezone, date
+from datetime import datetime, timezone
 
 
 # Third-Party Imports
@@ -15,16 +19,28 @@ import pandas as pd
 # import numpy as np # Unused
 from dotenv import load_dotenv
 import ccxt.async_support as ccxt
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from fastapi.middleware.cors import CORSMiddleware
 
-from database import db
+from database import db, TRADE_COLUMNS, ARCHIVE_AFTER_DAYS
+from positions import book
+from models import Trade, to_dicts
+from equity_series import equity_series
+from maintenance import db_maintenance, MAINTENANCE_INTERVAL
+from valuation import Valuation
+from live import live_hub, CANDLE_PREFIX
+from chart_series import chart_series, SERIES as CHART_SERIES
+from serialization import FastJSONResponse, CompressionMiddleware, json_response, dumps, round_row, round_rows
 from logic.strategy import StrategyManager
 from logic.indicators import check_volatility_ok
+from journal import journal
+from clock import clock
+from export import fetch_changes, serialize_changes, encode_change_cursor, decode_change_cursor, FORMATS as EXPORT_FORMATS
 
 # Auth Imports
 from fastapi import Depends, HTTPException, status
-import aiosqlite # for auth lookup
 
 load_dotenv()
 
@@ -38,8 +54,9 @@ from logging.handlers import RotatingFileHandler
 logger = logging.getLogger("TradingBot")
 logger.setLevel(logging.INFO)
 
-# File Handler with Rotation (10MB, keep 5)
-file_handler = RotatingFileHandler("server.log", maxBytes=10*1024*1024, backupCount=5)
+# File Handler with Rotation (10MB, keep 5); opened on the first record
+LOG_FILE = os.environ.get("LOG_FILE", "server.log")
+file_handler = RotatingFileHandler(LOG_FILE, maxBytes=10*1024*1024, backupCount=5, delay=True)
 file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
 
 # Stream Handler (Stdout)
@@ -63,6 +80,8 @@ ex_live = ccxt.binance({
         "recvWindow": 60000
     }
 })
+# [PERF] Live equity from memory: last balance + prices of held coins
+valuation = Valuation(ex_live)
 
 # ------------------------
 # LIVE / PAPER MODE
@@ -82,6 +101,12 @@ MAX_SYMBOL_EXPOSURE_USD = float(os.environ.get("MAX_SYMBOL_EXPOSURE_USD", "120.0
 MAX_HOLD_SECONDS = 8 * 3600
 MAX_FLAT_PNL_PCT = 0.5
 WATCHER_INTERVAL = 5
+# [PERF] Mark-to-market fields are flushed to trade_marks at this cadence
+MARK_FLUSH_INTERVAL = float(os.environ.get("MARK_FLUSH_INTERVAL", "30"))
+# Full exchange<->DB sync cadence (in-doubt orders are reconciled every cycle)
+FULL_SYNC_INTERVAL = float(os.environ.get("FULL_SYNC_INTERVAL", "3600"))
+# Equity sampling: every watcher tick in paper, throttled in live (balance + tickers per sample)
+EQUITY_SAMPLE_INTERVAL = float(os.environ.get("EQUITY_SAMPLE_INTERVAL", "60" if TRADE_MODE == "live" else "5"))
 STRATEGY_INTERVAL = 60 # Check every minute
 MIN_CLOSE_QTY_PCT = 0.15
 COMMISSION_PCT = float(os.environ.get("COMMISSION_PCT", "0.001"))
@@ -95,6 +120,7 @@ MAX_TRADES_PER_DAY = 30
 PER_SYMBOL_COOLDOWN_SEC = 1 * 3600 # 1 Hour
 
 near_hits = [] # Global storage for interesting setups
+scan_version = 0 # [PERF] Bumped whenever near_hits / smc_scanner_cache / market trend change (ETags)
 smc_scanner_cache = [] # Cache for frontend scanner
 
 # [HARDENING] Global Safety State
@@ -125,13 +151,15 @@ market_trend_label = "Neutral"
 # ------------------------
 # FASTAPI APP
 # ------------------------
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Next-Since"],
 )
+app.add_middleware(CompressionMiddleware)  # [PERF] br/gzip per Accept-Encoding
 
 # ------------------------
 # AUTHENTICATION LOGIC
@@ -147,10 +175,7 @@ class Token(BaseModel):
 @app.post("/token", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
     # 1. Fetch user from DB
-    async with aiosqlite.connect("trades.db") as dbconn:
-        dbconn.row_factory = aiosqlite.Row
-        cursor = await dbconn.execute("SELECT * FROM users WHERE username = ?", (form_data.username,))
-        user = await cursor.fetchone()
+    user = await db.get_user(form_data.username)
     
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect username or password")
@@ -174,9 +199,10 @@ async def get_current_admin(current_user: dict = Depends(get_current_user)):
 @app.on_event("startup")
 async def startup():
     await db.init_db()
+    await book.load()
     
-    # [SAFETY] Sync DB with Exchange on Boot
-    asyncio.create_task(sync_portfolio_with_exchange())
+    # [SAFETY] Reconcile in-doubt orders on boot (full sync only if needed)
+    asyncio.create_task(recover_on_boot())
     
     # Init default state
     state = await db.get_state()
@@ -187,7 +213,7 @@ async def startup():
     if "trades_today" not in state:
          await db.set_state_key("trades_today", 0)
     if "last_reset_date" not in state:
-        await db.set_state_key("last_reset_date", str(date.today()))
+        await db.set_state_key("last_reset_date", str(clock.today()))
     if "kill_switch" not in state:
         await db.set_state_key("kill_switch", False)
     if "trade_usd" not in state:
@@ -200,8 +226,14 @@ async def startup():
     except Exception as e:
         logger.error(f"❌ [EXCHANGE INIT ERROR] {e}")
 
-    asyncio.create_task(watcher_loop())
-    asyncio.create_task(strategy_loop())
+    for loop in CLOCK_LOOPS:
+        asyncio.create_task(loop())
+
+@app.on_event("shutdown")
+async def shutdown():
+    await equity_series.flush()
+    await book.stop()
+    await db.close()
 
 # ------------------------
 # UTILS
@@ -222,13 +254,14 @@ async def safe_fetch_ticker(symbol):
         ticker = await ex_live.fetch_ticker(symbol)
         async with err_lock:
             consecutive_api_errors = 0 
+        valuation.on_price(symbol, ticker.get("last"))
         return ticker
     except Exception as e:
         async with err_lock:
             consecutive_api_errors += 1
             logger.warning(f"⚠️ [API ERROR] {symbol}: {e} (Consecutive: {consecutive_api_errors})")
             if consecutive_api_errors >= 5:
-                pause_until_ts = datetime.now().timestamp() + (15 * 60)
+                pause_until_ts = clock.time() + (15 * 60)
                 logger.critical("🚨 [CRITICAL] 5+ Consecutive API Errors. Pausing for 15 mins.")
         return None
 
@@ -239,16 +272,25 @@ async def safe_fetch_ticker(symbol):
 # DAILY RESET
 # ------------------------
 async def daily_reset_if_needed():
-    state = await db.get_state()
-    today = str(date.today())
+    today = str(clock.today())
     # If it's a new day, clear all daily trackers
-    if state.get("last_reset_date") != today:
+    if await db.get_state_key("last_reset_date") != today:
         logger.info(f"[RESET] New day detected ({today}). Clearing daily stats.")
-        await db.set_state_key("last_reset_date", today)
-        await db.set_state_key("daily_realized_pnl", 0.0)
-        await db.set_state_key("daily_losses_count", 0)
-        await db.set_state_key("trades_today", 0)
-        await db.set_state_key("last_trade_ts_map", {})
+        # [ATOMIC] One commit for the whole reset
+        await db.set_state_keys({
+            "last_reset_date": today,
+            "daily_realized_pnl": 0.0,
+            "daily_losses_count": 0,
+            "trades_today": 0,
+            "last_trade_ts_map": {},
+        })
+        # [PERF] Once a day: move old closed trades to the archive DB
+        try:
+            moved = await db.archive_closed_trades(ARCHIVE_AFTER_DAYS, now=clock.now(timezone.utc))
+            if moved:
+                logger.info(f"🗄️ [ARCHIVE] Moved {moved} closed trades older than {ARCHIVE_AFTER_DAYS}d")
+        except Exception as e:
+            logger.error(f"[ARCHIVE ERROR] {e}")
 
 # ------------------------
 # STATE HELPERS
@@ -262,28 +304,12 @@ async def get_app_state():
 async def get_equity_locked_free():
     if TRADE_MODE == "live":
         try:
-            # Get all balances
-            balance = await ex_live.fetch_balance()
-            free_usdt = safe(balance.get("USDT", {}).get("free", 0))
-            
-            # Fetch tickers to value other coins
-            tickers = await ex_live.fetch_tickers()
-            
-            total_holdings_usd = 0.0
-            for coin, data in balance['total'].items():
-                if coin == 'USDT': continue
-                qty = num(data)
-                if qty <= 0: continue
-                
-                symbol = f"{coin}/USDT"
-                if symbol in tickers:
-                    price = num(tickers[symbol]['last'])
-                    total_holdings_usd += (qty * price)
-            
-            total_equity = safe(free_usdt + total_holdings_usd)
+            # [PERF] Served from the cached valuation (held assets only), refetched when stale
+            total_equity, free_usdt = await valuation.get(clock.time())
+            total_equity, free_usdt = safe(total_equity), safe(free_usdt)
             # "Locked" in the bot's context is the value of coins the bot is MANAGING
-            open_trades = await db.get_open_trades()
-            invested_by_bot = sum(t['used_usd'] for t in open_trades)
+            open_trades = book.open_trades()
+            invested_by_bot = sum(t.used_usd for t in open_trades)
             
             return total_equity, safe(invested_by_bot), free_usdt, "ok", None
         except Exception as e:
@@ -291,11 +317,11 @@ async def get_equity_locked_free():
             return 0.0, 0.0, 0.0, "error", str(e)
 
     # Paper mode calculation
-    open_trades = await db.get_open_trades()
+    open_trades = book.open_trades()
     state = await db.get_state()
     total_realized = state.get("total_realized_pnl", 0.0)
-    locked = sum(t['used_usd'] for t in open_trades)
-    unreal = sum(t['unrealized_pnl'] for t in open_trades)
+    locked = sum(t.used_usd for t in open_trades)
+    unreal = sum(t.unrealized_pnl for t in open_trades)
     
     equity = BASE_BALANCE + total_realized + unreal
     free = max(0.0, BASE_BALANCE + total_realized - locked)
@@ -353,7 +379,7 @@ async def can_place_trade(symbol, usd, strategy, equity, locked, free):
     state = await get_app_state()
     
     # [HARDENING] API Stability Check
-    if datetime.now().timestamp() < pause_until_ts:
+    if clock.time() < pause_until_ts:
         return False, "api_stability_pause"
 
     if state.get("kill_switch"): return False, "kill_switch"
@@ -361,30 +387,26 @@ async def can_place_trade(symbol, usd, strategy, equity, locked, free):
     if usd > MAX_ORDER_USD: return False, "order_too_large"
     if state.get("trades_today", 0) >= MAX_TRADES_PER_DAY: return False, "trade_limit"
 
-    open_trades = await db.get_open_trades()
+    n_open = book.count()
     
     # [DYNAMIC] Calculate position limits based on current capital (passed in)
-    max_positions, _ = calculate_position_limits(equity, locked, free, len(open_trades))
+    max_positions, _ = calculate_position_limits(equity, locked, free, n_open)
     
-    if len(open_trades) >= max_positions: 
-        return False, f"max_positions ({len(open_trades)}/{max_positions})"
+    if n_open >= max_positions: 
+        return False, f"max_positions ({n_open}/{max_positions})"
     
     # [QUANT] Prevent strategy stacking on same symbol
-    existing_symbol_trades = [t for t in open_trades if t['symbol'] == symbol]
-    if existing_symbol_trades:
+    if book.holds(symbol):
         return False, "symbol_already_held"
 
     # [QUANT] 3-State Regime Filter - REMOVED (User Request)
     
     # [QUANT] 3-Hour Post-Exit Cooldown
-
-    # [QUANT] 3-Hour Post-Exit Cooldown
-    state = await get_app_state()
     cooldowns = state.get("exit_cooldowns", {})
     if symbol in cooldowns:
         expiry = cooldowns[symbol]
-        if datetime.now().timestamp() < expiry:
-             remaining = int((expiry - datetime.now().timestamp()) / 60)
+        if clock.time() < expiry:
+             remaining = int((expiry - clock.time()) / 60)
              return False, f"exit_cooldown_active_{remaining}m"
 
     # [QUANT] Cooldown (6 Hours)
@@ -392,7 +414,7 @@ async def can_place_trade(symbol, usd, strategy, equity, locked, free):
     # Check if ANY strategy traded this symbol in last 6 hours
     for key, last_ts in ts_map.items():
         if symbol in key:
-            if (datetime.now().timestamp() - last_ts) < PER_SYMBOL_COOLDOWN_SEC:
+            if (clock.time() - last_ts) < PER_SYMBOL_COOLDOWN_SEC:
                 return False, "symbol_cooldown"
 
     return True, "ok"
@@ -406,36 +428,49 @@ async def register_trade_open(symbol, strategy):
     
     # Update trades today
     current_today = state.get("trades_today", 0) + 1
-    await db.set_state_key("trades_today", current_today)
     
     # Update Timestamp map
     ts_map = state.get("last_trade_ts_map", {})
-    ts_map[f"{strategy}:{symbol}"] = datetime.now().timestamp()
-    await db.set_state_key("last_trade_ts_map", ts_map)
+    ts_map[f"{strategy}:{symbol}"] = clock.time()
+
+    await db.set_state_keys({
+        "trades_today": current_today,
+        "last_trade_ts_map": ts_map,
+    })
 
 async def register_trade_close(pnl, symbol):
+    """Joins the caller's db.transaction() so the close and its bookkeeping commit together."""
     state = await get_app_state()
     
     # [QUANT] Set 1-Hour Cooldown
     cooldowns = state.get("exit_cooldowns", {})
     # Expire in 1 hour (3600 seconds)
-    cooldowns[symbol] = datetime.now().timestamp() + (1 * 3600)
-    await db.set_state_key("exit_cooldowns", cooldowns)
+    cooldowns[symbol] = clock.time() + (1 * 3600)
 
     # Daily PnL
     daily = state.get("daily_realized_pnl", 0.0) + pnl
-    await db.set_state_key("daily_realized_pnl", daily)
     
     # [QUANT] Count Losses - REMOVED
     
     # Total PnL
     total = state.get("total_realized_pnl", 0.0) + pnl
-    await db.set_state_key("total_realized_pnl", total)
+
+    await db.set_state_keys({
+        "exit_cooldowns": cooldowns,
+        "daily_realized_pnl": daily,
+        "total_realized_pnl": total,
+    })
+
+async def record_equity_sample():
+    equity, locked, free, status, _ = await get_equity_locked_free()
+    if status != "ok":
+        return
+    realized = await db.get_state_key("total_realized_pnl", 0.0)
+    unreal = sum((t.unrealized_pnl or 0.0) for t in book.open_trades())
+    await equity_series.sample(clock.time(), equity, locked, free, safe(realized), safe(unreal))
 
 async def symbol_exposure_ok(symbol, additional_usd):
-    trades = await db.get_open_trades()
-    exposure = sum(t['used_usd'] for t in trades if t['symbol'] == symbol)
-    return (exposure + additional_usd) <= MAX_SYMBOL_EXPOSURE_USD
+    return (book.exposure(symbol) + additional_usd) <= MAX_SYMBOL_EXPOSURE_USD
 
 # [HARDENING] Pre-Buy Sanity Checks
 def buy_sanity_check(symbol, price, qty, usd, sl, tp):
@@ -458,17 +493,18 @@ async def sync_portfolio_with_exchange():
 
     try:
         # 1. Fetch DB State
-        db_trades = await db.get_open_trades()
+        db_trades = book.open_trades()
         if not db_trades: return
         
         # 2. Fetch Exchange State
         bal = await ex_live.fetch_balance()
+        valuation.on_balance(bal, clock.time())
         total = bal.get('total', {})
         
         # 3. Compare and Prune
         for t in db_trades:
-            coin = t['symbol'].split('/')[0]
-            db_qty = t['qty']
+            coin = t.symbol.split('/')[0]
+            db_qty = t.qty
             real_qty = total.get(coin, 0.0)
             
             # [HARDENING] Strict Phantom Detection with Dust Consideration
@@ -476,23 +512,20 @@ async def sync_portfolio_with_exchange():
             # treat it as a closed position (phantom).
             if real_qty <= 1e-8 or real_qty < (db_qty * 0.05):
                 # [RACE CONDITION FIX] Re-check DB status before closing
-                current_db_trade = await db.get_trade(t['id'])
-                if not current_db_trade or current_db_trade['status'] != 'open':
+                current_db_trade = book.get(t.id)
+                if not current_db_trade:
                     # Trade was likely closed by execute_sell while we were fetching balance
                     continue
 
-                logger.warning(f"[SYNC] PHANTOM/DUST DETECTED: {t['symbol']} (DB: {db_qty} | Real: {real_qty}). Closing in DB.")
+                logger.warning(f"[SYNC] PHANTOM/DUST DETECTED: {t.symbol} (DB: {db_qty} | Real: {real_qty}). Closing in DB.")
                 
                 # [FIX] Do not delete. Preserve history. Mark as closed with 0 PnL.
-                # Use temporary connection for safety as before.
-                import aiosqlite
-                async with aiosqlite.connect("trades.db") as conn:
-                    await conn.execute("""
-                        UPDATE trades 
-                        SET status='closed', exit_time=?, pnl=0, exit_price=0, fees_usd=0 
-                        WHERE id=?
-                    """, (datetime.now(timezone.utc).isoformat(), t['id']))
-                    await conn.commit()
+                await book.close(t.id, {
+                    "exit_time": clock.now(timezone.utc).isoformat(),
+                    "pnl": 0,
+                    "exit_price": 0,
+                    "fees_usd": 0
+                })
             
     except Exception as e:
         logger.error(f"[SYNC] Error syncing portfolio: {e}")
@@ -512,19 +545,15 @@ async def sync_portfolio_with_exchange():
             # Check if this symbol exists in our Open DB Trades
             found = False
             for t in db_trades:
-                if t['symbol'] == symbol:
+                if t.symbol == symbol:
                     found = True
                     break
             
             # [HARDENING] Double Check DB before Import (Anti-Race Condition)
             if not found:
-                # Query DB directly to be absolutely sure it wasn't just opened
+                # Check the live book to be absolutely sure it wasn't just opened
                 # by the Strategy Manager in the last few milliseconds
-                check_scan = await db.get_open_trades() # Refresh
-                for scan_t in check_scan:
-                    if scan_t['symbol'] == symbol:
-                        found = True
-                        break
+                found = book.holds(symbol)
 
             if not found:
                  # Check if the value is significant (> $5)
@@ -542,28 +571,28 @@ async def sync_portfolio_with_exchange():
                      # or maybe 0. It's better to use current price so PnL starts at 0?
                      # Actually, PnL will be wrong initially, but better than not tracking it.
                      
-                     new_trade = {
-                        "id": str(uuid.uuid4()),
-                        "time": datetime.now(timezone.utc).isoformat(),
-                        "symbol": symbol,
-                        "side": "buy",
-                        "strategy": "Manual_Import", # distinct tag
-                        "entry_price": price, # Approximate
-                        "qty": qty,
-                        "used_usd": value_usd,
-                        "status": "open",
-                        "pnl": 0.0,
-                        "sl": 0.0,
-                        "tp": 0.0,
-                        "exit_price": 0.0,
-                        "current_price": price,
-                        "unrealized_pnl": 0.0,
-                        "fees_usd": 0.0,
-                        "highest_price": price,
-                        "trail_active": False,
-                        "trail_sl": 0.0
-                     }
-                     await db.add_trade(new_trade)
+                     new_trade = Trade(
+                        id=str(uuid.uuid4()),
+                        time=clock.now(timezone.utc).isoformat(),
+                        symbol=symbol,
+                        side="buy",
+                        strategy="Manual_Import", # distinct tag
+                        entry_price=price, # Approximate
+                        qty=qty,
+                        used_usd=value_usd,
+                        status="open",
+                        pnl=0.0,
+                        sl=0.0,
+                        tp=0.0,
+                        exit_price=0.0,
+                        current_price=price,
+                        unrealized_pnl=0.0,
+                        fees_usd=0.0,
+                        highest_price=price,
+                        trail_active=False,
+                        trail_sl=0.0
+                     )
+                     await book.open(new_trade)
                      logger.info(f"✅ [IMPORT] Successfully imported {symbol}")
 
     except Exception as e:
@@ -573,7 +602,109 @@ async def sync_portfolio_with_exchange():
 
 # EXECUTION & ORDER MANAGEMENT
 # ------------------------------------------------------------------------------
+# [RECOVERY] Every live order is logged to order_events: 'intent' before it is
+# sent, 'submitted' once the exchange accepted it, and 'filled' (in the same
+# commit as the trade row) or 'failed'. An order whose last event is intent or
+# submitted is in doubt and is resolved by reconcile_orders().
+orders_in_doubt = True  # unknown until the first reconcile
+
+def new_client_order_id():
+    # Binance newClientOrderId: <= 36 chars of [.A-Za-z0-9:/_-]
+    return f"atb-{uuid.uuid4().hex[:28]}"
+
+async def log_order_submitted(cid, symbol, side, order):
+    await db.append_order_event(cid, "submitted", symbol, side, exchange_order_id=order.get('id'),
+                                filled=num(order.get('filled') or 0))
+
+async def log_order_error(cid, symbol, side, err, submitted):
+    global orders_in_doubt
+    if submitted or isinstance(err, ccxt.NetworkError):
+        # Timeout / accepted-then-failed: the exchange may have filled it
+        orders_in_doubt = True
+        logger.warning(f"❓ [ORDER IN DOUBT] {side} {symbol} ({cid}): {err}")
+        return
+    await db.append_order_event(cid, "failed", symbol, side, detail={"error": str(err)})
+
+def with_fill_event(bookkeeping, cid, symbol, side, qty, price, trade_id):
+    async def run():
+        if bookkeeping:
+            await bookkeeping()
+        await db.append_order_event(cid, "filled", symbol, side, filled=qty, price=price, trade_id=trade_id)
+    return run
+
+def order_fees(order, symbol, exec_price, qty):
+    fee_obj = order.get('fee')
+    if fee_obj and fee_obj.get('cost') is not None:
+        fee_cost = num(fee_obj['cost'])
+        if fee_obj.get('currency') == symbol.split('/')[0]:
+            return safe(fee_cost * exec_price)
+        return safe(fee_cost)
+    return safe(exec_price * qty * COMMISSION_PCT)
+
+async def reconcile_orders():
+    """
+    Resolve in-doubt orders against the exchange by client order id.
+    Returns how many are still unresolved (exchange unreachable / order working).
+    """
+    global orders_in_doubt
+    if TRADE_MODE != "live":
+        orders_in_doubt = False
+        return 0
+
+    unresolved = 0
+    for ev in await db.get_in_doubt_orders():
+        cid, symbol, side, detail = ev['client_order_id'], ev['symbol'], ev['side'], ev['detail']
+        try:
+            order = await ex_live.fetch_order(ev['exchange_order_id'], symbol, params={"origClientOrderId": cid})
+        except ccxt.OrderNotFound:
+            # Never reached the exchange
+            await db.append_order_event(cid, "failed", symbol, side, detail={"error": "not_found_on_reconcile"})
+            continue
+        except Exception as e:
+            logger.warning(f"[RECONCILE] {cid} {symbol}: {e}")
+            unresolved += 1
+            continue
+
+        filled = num(order.get('filled') or 0)
+        if order.get('status') == 'open':
+            unresolved += 1
+            continue
+        if filled <= 1e-8:
+            await db.append_order_event(cid, "failed", symbol, side, exchange_order_id=order.get('id'),
+                                        detail={"error": f"status_{order.get('status')}"})
+            continue
+
+        exec_price = num(order.get('average') or order.get('price'))
+        fees = order_fees(order, symbol, exec_price, filled)
+        logger.warning(f"🩹 [RECONCILE] {side} {symbol} {cid}: filled {filled} @ {exec_price}. Booking.")
+        if side == "buy":
+            await apply_buy_fill(symbol, detail.get("strategy", "Recovered"), exec_price, filled,
+                                 safe(exec_price * filled), fees, detail.get("sl", 0.0), detail.get("tp", 0.0),
+                                 exec_price, cid)
+        else:
+            trade = book.get(detail.get("trade_id"))
+            if trade:
+                await apply_sell_fill(trade, filled, exec_price, fees, exec_price, 100.0 * filled / trade.qty,
+                                      detail.get("reason", "reconciled"), cid)
+            else:
+                await db.append_order_event(cid, "filled", symbol, side, filled=filled, price=exec_price,
+                                            detail={"untracked": "trade_not_open"})
+
+    orders_in_doubt = unresolved > 0
+    return unresolved
+
+async def recover_on_boot():
+    """[SAFETY] Reconcile only in-doubt orders; full exchange sync only if that fails."""
+    try:
+        unresolved = await reconcile_orders()
+    except Exception as e:
+        logger.error(f"[RECONCILE] Failed: {e}")
+        unresolved = 1
+    if unresolved:
+        await sync_portfolio_with_exchange()
+
 async def execute_buy(symbol, sl_pct, tp_pct, strategy, sl_absolute=None, btc_multiplier=1.0):
+    """Returns the trade id the fill was booked into, None if no order went through."""
     await daily_reset_if_needed()
     
     ticker = await safe_fetch_ticker(symbol)
@@ -611,8 +742,7 @@ async def execute_buy(symbol, sl_pct, tp_pct, strategy, sl_absolute=None, btc_mu
         risk_based_usd = 20.0 
         
     # [QUANT] 3. Apply Limits
-    state = await get_app_state()
-    user_cap_usd = float(state.get("trade_usd", 20.0))
+    user_cap_usd = float(await db.get_state_key("trade_usd", 20.0))
     
     # [RULE] Harmonized Sizing Logic
     # We take the SMALLEST of three values:
@@ -654,7 +784,9 @@ async def execute_buy(symbol, sl_pct, tp_pct, strategy, sl_absolute=None, btc_mu
     # ... (ticker fetch was moved up)
     
     # Execution
+    cid = None
     if TRADE_MODE == "live":
+        submitted = False
         try:
             # [HARDENING] Sanity check before order
             # SL is already calculated above
@@ -669,7 +801,14 @@ async def execute_buy(symbol, sl_pct, tp_pct, strategy, sl_absolute=None, btc_mu
             # [HARDENING] Move load_markets to startup and remove here
             amount = num(ex_live.amount_to_precision(symbol, qty_pre))
             
-            order = await ex_live.create_market_buy_order(symbol, amount)
+            # [RECOVERY] Log intent before the order leaves, keyed by our client order id
+            cid = new_client_order_id()
+            await db.append_order_event(cid, "intent", symbol, "buy", amount=amount, price=price,
+                                        detail={"strategy": strategy, "sl": sl, "tp": tp})
+            order = await ex_live.create_market_buy_order(symbol, amount, params={"newClientOrderId": cid})
+            submitted = True
+            valuation.invalidate()
+            await log_order_submitted(cid, symbol, "buy", order)
             # Success: reset global error counter
             global consecutive_api_errors
             async with err_lock:
@@ -690,26 +829,21 @@ async def execute_buy(symbol, sl_pct, tp_pct, strategy, sl_absolute=None, btc_mu
             # This prevents 0-qty "Phantom Trades" from hitting the DB.
             if qty <= 1e-8 or safe(exec_price * qty) < 5.0:
                  logger.error(f"❌ [PHANTOM BUY DETECTED] {symbol}: Qty {qty}, Cost {safe(exec_price * qty)}. Aborting DB insert.")
+                 await db.append_order_event(cid, "filled" if qty > 1e-8 else "failed", symbol, "buy",
+                                             filled=qty, price=exec_price, detail={"untracked": "phantom_buy"})
                  return
 
             used = safe(exec_price * qty)
             logger.info(f"✅ [TRADE OPEN] {strategy} | {symbol} @ {exec_price} | Qty: {qty} | SL: {sl} | TP: {tp}")
 
             # Fee handling
-            fee_obj = order.get('fee')
-            if fee_obj and fee_obj.get('cost') is not None:
-                fee_cost = num(fee_obj['cost'])
-                fee_currency = fee_obj.get('currency')
-                if fee_currency and fee_currency == symbol.split('/')[0]:
-                    fees = safe(fee_cost * exec_price)
-                else:
-                    fees = safe(fee_cost)
-            else:
-                fees = safe(used * COMMISSION_PCT)
+            fees = order_fees(order, symbol, exec_price, qty)
         except Exception as e:
             async with err_lock:
                 consecutive_api_errors += 1
             logger.error(f"❌ [BUY FAIL] {symbol}: {e}")
+            if cid:
+                await log_order_error(cid, symbol, "buy", e, submitted)
             return
     else:
         # Paper
@@ -721,86 +855,92 @@ async def execute_buy(symbol, sl_pct, tp_pct, strategy, sl_absolute=None, btc_mu
         tp = safe(exec_price * (1 + tp_pct / 100)) if tp_pct else 0.0
         logger.info(f"📑 [PAPER OPEN] {strategy} | {symbol} @ {exec_price} | Qty: {qty} | SL: {sl} | TP: {tp}")
 
-    # Merge or New
-    existing = await db.get_trades_by_status_symbol_strategy("open", symbol, strategy)
+    return await apply_buy_fill(symbol, strategy, exec_price, qty, used, fees, sl, tp, price, cid)
+
+async def apply_buy_fill(symbol, strategy, exec_price, qty, used, fees, sl, tp, price, cid=None):
+    """Book a buy fill: merge into the open position of the same strategy or open a new one."""
+    pos = book.find(symbol, strategy)
+    trade_id = pos.id if pos else str(uuid.uuid4())
     
-    if existing:
-        pos = existing[0]
-        old_qty, old_entry = pos['qty'], pos['entry_price']
+    # [ATOMIC] Position row + daily counters (+ the order's fill event) persist in one commit
+    bookkeeping = lambda: register_trade_open(symbol, strategy)
+    if cid:
+        bookkeeping = with_fill_event(bookkeeping, cid, symbol, "buy", qty, exec_price, trade_id)
+    if pos:
+        old_qty, old_entry = pos.qty, pos.entry_price
         total_qty = safe(old_qty + qty)
         avg_entry = safe(((old_qty * old_entry) + (qty * exec_price)) / total_qty)
-        
-        await db.update_trade(pos['id'], {
-            "qty": total_qty,
-            "entry_price": avg_entry,
-            "used_usd": safe(pos['used_usd'] + used),
-            "fees_usd": safe(pos['fees_usd'] + fees),
-            "sl": min(pos['sl'], sl) if sl and pos['sl'] else (pos['sl'] or sl),
-            "tp": max(pos['tp'], tp) if tp and pos['tp'] else (pos['tp'] or tp)
-        })
+
+        pos.sl = min(pos.sl, sl) if sl and pos.sl else (pos.sl or sl)
+        pos.tp = max(pos.tp, tp) if tp and pos.tp else (pos.tp or tp)
+        pos.used_usd = safe(pos.used_usd + used)
+        pos.fees_usd = safe(pos.fees_usd + fees)
+        pos.qty = total_qty
+        pos.entry_price = avg_entry
+        await book.save(pos, bookkeeping=bookkeeping)
     else:
-        trade = {
-            "id": str(uuid.uuid4()),
-            "time": datetime.now(timezone.utc).isoformat(),
-            "symbol": symbol,
-            "side": "buy",
-            "strategy": strategy,
-            "entry_price": exec_price,
-            "qty": qty,
-            "used_usd": used,
-            "status": "open",
-            "pnl": 0.0,
-            "sl": sl,
-            "tp": tp,
-            "exit_price": 0.0,
-            "current_price": price,
-            "unrealized_pnl": 0.0,
-            "fees_usd": fees,
-            "highest_price": price,
-            "trail_active": False,
-            "trail_sl": 0.0
-        }
-        await db.add_trade(trade)
-    
-    await register_trade_open(symbol, strategy)
+        trade = Trade(
+            id=trade_id,
+            time=clock.now(timezone.utc).isoformat(),
+            symbol=symbol,
+            side="buy",
+            strategy=strategy,
+            entry_price=exec_price,
+            qty=qty,
+            used_usd=used,
+            status="open",
+            pnl=0.0,
+            sl=sl,
+            tp=tp,
+            exit_price=0.0,
+            current_price=price,
+            unrealized_pnl=0.0,
+            fees_usd=fees,
+            highest_price=price,
+            trail_active=False,
+            trail_sl=0.0
+        )
+        await book.open(trade, bookkeeping=bookkeeping)
     logger.info(f"[BUY] {symbol} @ {exec_price}")
+    return trade_id
 
 # ------------------------
 # SELL LOGIC
 # ------------------------
 async def execute_sell(trade_id, pct=100.0, reason="manual"):
     try:
-        trade = await db.get_trade(trade_id)
-        if not trade or trade['status'] != 'open': return
+        trade = book.get(trade_id)
+        if not trade: return
 
-        ticker = await safe_fetch_ticker(trade['symbol'])
+        ticker = await safe_fetch_ticker(trade.symbol)
         if not ticker: return
             
         price = num(ticker["last"])
         
-        sell_qty = safe(trade['qty'] * pct / 100)
+        sell_qty = safe(trade.qty * pct / 100)
         if sell_qty <= 0: return
 
         # Execution
+        cid = None
         if TRADE_MODE == "live":
+            submitted = False
             try:
                 bal = await ex_live.fetch_balance()
-                base = trade['symbol'].split('/')[0]
+                valuation.on_balance(bal, clock.time())
+                base = trade.symbol.split('/')[0]
                 available = bal.get(base, {}).get('free', 0)
                 
                 # [HARDENING] Check for Phantom Sell
                 # If we are trying to sell but exchange says we have 0, 
                 # then this DB entry is stale/phantom. Close it immediately.
                 if available <= 1e-8:
-                     logger.error(f"❌ [PHANTOM SELL DETECTED] {trade['symbol']}: Wallet Empty ({available}). Marking Closed.")
-                     await db.update_trade(trade_id, {
-                        "status": "closed", 
-                        "exit_time": datetime.now(timezone.utc).isoformat(), 
+                     logger.error(f"❌ [PHANTOM SELL DETECTED] {trade.symbol}: Wallet Empty ({available}). Marking Closed.")
+                     # [FIX] Registry update for consistency (same commit)
+                     await book.close(trade_id, {
+                        "exit_time": clock.now(timezone.utc).isoformat(), 
                         "pnl": 0,
                         "exit_price": price
-                     }) 
-                     # [FIX] Registry update for consistency
-                     await register_trade_close(0.0, trade['symbol'])
+                     }, bookkeeping=lambda: register_trade_close(0.0, trade.symbol))
                      return
 
                 # Dust Safety
@@ -812,16 +952,24 @@ async def execute_sell(trade_id, pct=100.0, reason="manual"):
                      return
 
                 # Precision
-                sell_qty_prec = num(ex_live.amount_to_precision(trade['symbol'], sell_qty))
+                sell_qty_prec = num(ex_live.amount_to_precision(trade.symbol, sell_qty))
                 
-                order = await ex_live.create_market_sell_order(trade['symbol'], sell_qty_prec)
+                # [RECOVERY] Log intent before the order leaves
+                cid = new_client_order_id()
+                await db.append_order_event(cid, "intent", trade.symbol, "sell", amount=sell_qty_prec, price=price,
+                                            trade_id=trade_id, detail={"trade_id": trade_id, "reason": reason})
+                order = await ex_live.create_market_sell_order(trade.symbol, sell_qty_prec,
+                                                               params={"newClientOrderId": cid})
+                submitted = True
+                valuation.invalidate()
+                await log_order_submitted(cid, trade.symbol, "sell", order)
                 # Robust price fetching
                 exec_price = num(order.get("average") or order.get("price") or price)
                 qty_sold = num(order.get("filled") or sell_qty_prec)
                 
                 if num(order.get("filled", 0)) <= 0:
                      try:
-                        order = await ex_live.fetch_order(order['id'], trade['symbol'])
+                        order = await ex_live.fetch_order(order['id'], trade.symbol)
                         exec_price = num(order.get("average") or order.get("price") or price)
                         qty_sold = num(order.get("filled") or sell_qty_prec)
                      except: pass
@@ -838,95 +986,112 @@ async def execute_sell(trade_id, pct=100.0, reason="manual"):
             except Exception as e:
                 global consecutive_api_errors, pause_until_ts
                 consecutive_api_errors += 1
-                logger.error(f"❌ [SELL FAIL] {trade['symbol']}: {e} (Consecutive: {consecutive_api_errors})")
+                logger.error(f"❌ [SELL FAIL] {trade.symbol}: {e} (Consecutive: {consecutive_api_errors})")
                 if consecutive_api_errors >= 5:
-                    pause_until_ts = datetime.now().timestamp() + (15 * 60)
+                    pause_until_ts = clock.time() + (15 * 60)
                     logger.critical("🚨 [CRITICAL] 5+ Consecutive API Errors. Pausing for 15 mins.")
+                if cid:
+                    await log_order_error(cid, trade.symbol, "sell", e, submitted)
                 return
         else:
             exec_price = price
             fees = safe(exec_price * sell_qty * COMMISSION_PCT)
 
-        pnl = safe((exec_price - trade['entry_price']) * sell_qty - fees)
-        
-        remaining = safe(trade['qty'] - sell_qty)
-        
-        # Clean Dust
-        if remaining * price < 2.0 or pct >= 99.0:
-            await db.update_trade(trade_id, {
-                "status": "closed",
-                "qty": 0,
-                # "used_usd": 0, # [FIX] Preserve used_usd for history/stats
-                "exit_price": exec_price,
-                "pnl": safe(trade['pnl'] + pnl),
-                "fees_usd": safe(trade['fees_usd'] + fees),
-                "exit_time": datetime.now(timezone.utc).isoformat()
-            })
-            await register_trade_close(pnl, trade['symbol'])
-            logger.info(f"💰 [TRADE CLOSED] {trade['symbol']} | PnL: {pnl:.4f} | Reason: {reason}")
-        else:
-            await db.update_trade(trade_id, {
-                "qty": remaining,
-                "used_usd": safe(trade['used_usd'] * (remaining / trade['qty'])),
-                "pnl": safe(trade['pnl'] + pnl),
-                "fees_usd": safe(trade['fees_usd'] + fees)
-            })
-            logger.info(f"📉 [SELL PARTIAL] {trade['symbol']} PnL: {pnl:.4f}")
+        await apply_sell_fill(trade, sell_qty, exec_price, fees, price, pct, reason, cid)
             
     except Exception as e:
         logger.exception(f"[EXECUTE SELL ERROR] {trade_id}")
 
+async def apply_sell_fill(trade, sell_qty, exec_price, fees, price, pct=100.0, reason="manual", cid=None):
+    """Book a sell fill against `trade`: close it (dust/full) or shrink it (partial)."""
+    trade_id = trade.id
+    pnl = safe((exec_price - trade.entry_price) * sell_qty - fees)
+    
+    remaining = safe(trade.qty - sell_qty)
+    
+    # Clean Dust
+    if remaining * price < 2.0 or pct >= 99.0:
+        # [ATOMIC] Trade row + cooldown/PnL state (+ the order's fill event) in one commit
+        bookkeeping = lambda: register_trade_close(pnl, trade.symbol)
+        if cid:
+            bookkeeping = with_fill_event(bookkeeping, cid, trade.symbol, "sell", sell_qty, exec_price, trade_id)
+        await book.close(trade_id, {
+            "qty": 0,
+            # "used_usd": 0, # [FIX] Preserve used_usd for history/stats
+            "exit_price": exec_price,
+            "pnl": safe(trade.pnl + pnl),
+            "fees_usd": safe(trade.fees_usd + fees),
+            "exit_time": clock.now(timezone.utc).isoformat()
+        }, bookkeeping=bookkeeping)
+        logger.info(f"💰 [TRADE CLOSED] {trade.symbol} | PnL: {pnl:.4f} | Reason: {reason}")
+    else:
+        trade.used_usd = safe(trade.used_usd * (remaining / trade.qty))
+        trade.qty = remaining
+        trade.pnl = safe(trade.pnl + pnl)
+        trade.fees_usd = safe(trade.fees_usd + fees)
+        fill_event = with_fill_event(None, cid, trade.symbol, "sell", sell_qty, exec_price, trade_id) if cid else None
+        await book.save(trade, bookkeeping=fill_event)
+        logger.info(f"📉 [SELL PARTIAL] {trade.symbol} PnL: {pnl:.4f}")
+
 # ------------------------
 # LOOPS
 # ------------------------
 async def watcher_loop():
     logger.info("Watcher started")
+    last_mark_flush = clock.time()
+    last_equity_sample = 0.0
     while True:
         try:
             # [HARDENING] Daily Circuit Breaker - REMOVED
+
+            # [NEW] Equity time series (also while flat)
+            if clock.time() - last_equity_sample >= EQUITY_SAMPLE_INTERVAL:
+                last_equity_sample = clock.time()
+                await record_equity_sample()
+
+            # [PERF] Push dashboard state (one fetch per tick, not per client)
+            await publish_live()
             
-            trades = await db.get_open_trades()
+            trades = book.open_trades()
             if not trades:
-                await asyncio.sleep(WATCHER_INTERVAL)
+                await clock.sleep(WATCHER_INTERVAL)
                 continue
 
             # [HARDENING] Watcher Safety Cleanup
             if TRADE_MODE == "live":
                 try:
                     bal = await ex_live.fetch_balance()
+                    valuation.on_balance(bal, clock.time())
                     total = bal.get('total', {})
                     for t in trades:
-                        coin = t['symbol'].split('/')[0]
+                        coin = t.symbol.split('/')[0]
                         real_qty = total.get(coin, 0.0)
-                        if real_qty <= 1e-8 or real_qty < (t['qty'] * 0.05):
-                            logger.warning(f"🧹 [WATCHER CLEANUP] {t['symbol']} found empty/dust ({real_qty}). Auto-closing.")
-                            await db.update_trade(t['id'], {
-                                "status": "closed",
-                                "exit_time": datetime.now(timezone.utc).isoformat(),
+                        if real_qty <= 1e-8 or real_qty < (t.qty * 0.05):
+                            logger.warning(f"🧹 [WATCHER CLEANUP] {t.symbol} found empty/dust ({real_qty}). Auto-closing.")
+                            await book.close(t.id, {
+                                "exit_time": clock.now(timezone.utc).isoformat(),
                                 "pnl": 0,
                                 "exit_price": 0
-                            })
-                            await register_trade_close(0.0, t['symbol'])
+                            }, bookkeeping=lambda sym=t.symbol: register_trade_close(0.0, sym))
                 except Exception as e:
                     logger.error(f"[WATCHER CLEANUP ERROR] {e}")
 
             for t in trades:
                 try:
-                    symbol = t['symbol']
+                    symbol = t.symbol
                     
                     # Check if it was just closed by cleanup
-                    current_trade_check = await db.get_trade(t['id'])
-                    if not current_trade_check or current_trade_check['status'] != 'open':
+                    if book.get(t.id) is None:
                         continue
 
                     # [HARDENING] Max Hold Time Enforcement
                     try:
-                        start_str = t['time'].replace('Z', '+00:00')
+                        start_str = t.time.replace('Z', '+00:00')
                         start_time = datetime.fromisoformat(start_str)
-                        duration_sec = (datetime.now(timezone.utc) - start_time).total_seconds()
+                        duration_sec = (clock.now(timezone.utc) - start_time).total_seconds()
                         if duration_sec > MAX_HOLD_SECONDS:
                             logger.info(f"⏳ [TIME EXIT] {symbol} held for {int(duration_sec)}s. Closing.")
-                            await execute_sell(t['id'], 100, "time_exit")
+                            await execute_sell(t.id, 100, "time_exit")
                             continue
                     except: pass
 
@@ -934,8 +1099,8 @@ async def watcher_loop():
                     if not ticker: continue
                     price = num(ticker['last'])
                     
-                    unreal = (price - t['entry_price']) * t['qty']
-                    highest = max(t['highest_price'], price)
+                    unreal = (price - t.entry_price) * t.qty
+                    highest = max(t.highest_price, price)
                     
                     updates = {
                         "current_price": price,
@@ -946,34 +1111,38 @@ async def watcher_loop():
                     # -----------------------------------------------
                     # STOP LOSS & TAKE PROFIT CHECKS (UNIVERSAL)
                     # -----------------------------------------------
-                    t_sl = t.get('sl', 0.0)
-                    t_tp = t.get('tp', 0.0)
+                    t_sl = t.sl
+                    t_tp = t.tp
                     
                     if t_sl > 0 and price <= t_sl:
                          logger.info(f"🛑 [SL HIT] {symbol} @ {price} (SL: {t_sl})")
-                         await db.update_trade(t['id'], updates)
-                         await execute_sell(t['id'], 100, "stop_loss")
+                         book.mark(t.id, updates)
+                         await execute_sell(t.id, 100, "stop_loss")
                          continue
                     
                     if t_tp > 0 and price >= t_tp:
                          logger.info(f"🎯 [TP HIT] {symbol} @ {price} (TP: {t_tp})")
-                         await db.update_trade(t['id'], updates)
-                         await execute_sell(t['id'], 100, "take_profit")
+                         book.mark(t.id, updates)
+                         await execute_sell(t.id, 100, "take_profit")
                          continue
 
                     # [RULE] No trailing stop or partial exits.
-                    # Simple update of PnL stats.
-                    await db.update_trade(t['id'], updates)
+                    # Simple update of PnL stats (memory only, flushed below).
+                    book.mark(t.id, updates)
 
                 except Exception as e:
-                    logger.error(f"[WATCHER ERROR] {t['symbol']}: {e}")
+                    logger.error(f"[WATCHER ERROR] {t.symbol}: {e}")
+
+            if clock.time() - last_mark_flush >= MARK_FLUSH_INTERVAL:
+                book.flush_marks(clock.now(timezone.utc).isoformat())
+                last_mark_flush = clock.time()
             
-            await asyncio.sleep(WATCHER_INTERVAL)
+            await clock.sleep(WATCHER_INTERVAL)
 
         except Exception as e:
             logger.exception("Watcher error")
         
-        await asyncio.sleep(WATCHER_INTERVAL)
+        await clock.sleep(WATCHER_INTERVAL)
 
 # ------------------------------------------------------------------------------
 # BACKGROUND LOOPS
@@ -985,14 +1154,18 @@ async def watcher_loop():
 # ------------------------
 scan_sem = asyncio.Semaphore(10) # Limit concurrent requests
 
-async def scan_smc_target(symbol, ex, active_strategies):
+async def scan_smc_target(symbol, ex, active_strategies, rec=None):
     """
     Returns: (symbol, scanner_items, diagnostic, should_buy, bullish_trend_found)
+    rec: optional journal CycleRecorder, receives the exact check_signal inputs.
     """
     async with scan_sem:
         try:
+            timings = {}
+            t0 = time.perf_counter()
             # 1. [CONTEXT] Fetch 1h for Directional Bias (Higher TF)
             ohlcv_context = await ex.fetch_ohlcv(symbol, '1h', limit=100)
+            timings["fetch_1h"] = time.perf_counter() - t0
             if not ohlcv_context or len(ohlcv_context) < 50: return (symbol, None, None, False, False)
             
             df_context = pd.DataFrame(ohlcv_context, columns=['ts', 'open', 'high', 'low', 'close', 'vol'])
@@ -1020,13 +1193,21 @@ async def scan_smc_target(symbol, ex, active_strategies):
             }
 
             # 2. [ENTRY] Fetch 15m for Entry (Strong Trend Strategy)
+            t0 = time.perf_counter()
             ohlcv_entry = await ex.fetch_ohlcv(symbol, '15m', limit=100)
+            timings["fetch_15m"] = time.perf_counter() - t0
             if not ohlcv_entry or len(ohlcv_entry) < 60:
                 logger.warning(f"[DEBUG] {symbol} not enough 15m data: {len(ohlcv_entry) if ohlcv_entry else 0}")
                 return (symbol, None, None, False, False)
             
             # 3. Check Signal with Multi-Timeframe Logic
+            t0 = time.perf_counter()
             is_valid_signal, diagnostic = StrategyManager.check_signal(symbol, ohlcv_entry, context)
+            timings["check_signal"] = time.perf_counter() - t0
+
+            # [JOURNAL] Record inputs before anything mutates the diagnostic
+            if rec is not None:
+                rec.record_scan(symbol, ohlcv_context, ohlcv_entry, context, is_valid_signal, diagnostic, timings)
             
             # Enrich diagnostic with Context
             if diagnostic:
@@ -1053,26 +1234,77 @@ async def scan_smc_target(symbol, ex, active_strategies):
             return (symbol, None, None, False, False)
 
 
+# ------------------------
+# LIVE PUSH
+# ------------------------
+live_versions = {"positions": -1, "trades": -1}
+
+async def publish_live(force: bool = False):
+    """
+    Refresh the push hub's positions/stats/trades/config and the last candle
+    of every subscribed chart. Skipped while no dashboard is connected, unless
+    forced (a connecting client's snapshot).
+    """
+    if not (force or live_hub.has_clients):
+        return
+    try:
+        if book.version != live_versions["positions"]:
+            live_versions["positions"] = book.version
+            live_hub.publish("positions", round_rows(to_dicts(book.open_trades())), key=("id",))
+        # Committed rows only: tagged before the read, so a commit landing mid-read republishes next tick
+        trades_version = db.trades_version
+        if trades_version != live_versions["trades"]:
+            live_hub.publish("trades", round_rows(await db.get_trades_page(100)), key=("id",))
+            live_versions["trades"] = trades_version
+        live_hub.publish("stats", round_row(await build_stats()))
+        live_hub.publish("config", {"trade_usd": await db.get_state_key("trade_usd", 10.0)})
+        for chart in live_hub.chart_subscriptions():
+            symbol, _, interval = chart.partition("@")
+            ohlcv = await ex_live.fetch_ohlcv(symbol, interval or "15m", limit=2)
+            live_hub.publish(f"{CANDLE_PREFIX}{chart}", {"candles": [
+                {"time": int(c[0] / 1000), "open": c[1], "high": c[2], "low": c[3], "close": c[4]}
+                for c in ohlcv
+            ]})
+    except Exception as e:
+        logger.warning(f"[LIVE] Publish failed: {e}")
+
+async def maintenance_loop():
+    """[PERF] WAL checkpoints, retention and incremental vacuum (see maintenance.py)."""
+    while True:
+        try:
+            await db_maintenance.tick(clock.time())
+        except Exception as e:
+            logger.error(f"[MAINT ERROR] {e}")
+        await clock.sleep(MAINTENANCE_INTERVAL)
+
 async def strategy_loop():
     logger.info("Strategy Loop Started (Parallelized V2)...")
     ignored = ["USDC", "USDP", "FDUSD", "TUSD", "EUR", "GBP", "DAI", 
                "SAPIEN", "DATA", "FTT", "BTTC", "GUN"] 
-    global smc_scanner_cache
+    global smc_scanner_cache, scan_version
     global market_trend_score, market_trend_label
     
+    last_full_sync = 0.0  # full sync on the first pass: drift is most likely right after a restart
     while True:
+        rec = None
         try:
-            start_ts = datetime.now()
+            start_ts = clock.now()
             logger.info(f"[DEBUG] Loop Cycle Start {start_ts}")
-            # [SAFETY] Periodic Sync
-            await sync_portfolio_with_exchange()
+            # [SAFETY] Periodic Sync: in-doubt orders each cycle, full sync rarely
+            t0 = time.perf_counter()
+            if orders_in_doubt:
+                await reconcile_orders()
+            if clock.time() - last_full_sync >= FULL_SYNC_INTERVAL:
+                await sync_portfolio_with_exchange()
+                last_full_sync = clock.time()
+            sync_sec = time.perf_counter() - t0
             
             # [RESET] Check for new day immediately
             await daily_reset_if_needed()
             
             state = await get_app_state()
             if not state.get("auto_trading") or state.get("kill_switch"):
-                await asyncio.sleep(5)
+                await clock.sleep(5)
                 continue
                 
             # [SAFETY] Daily Loss Count Limit - REMOVED
@@ -1080,24 +1312,38 @@ async def strategy_loop():
             # [OPTIMIZATION] Time Filter: Avoid Late NY (Death Zone)
             # 17:00 - 20:00 UTC (User stats show -33% WR / Negative PnL here)
             # [UPDATE] Disabled upon user request. Strict logic handles quality now.
-            # now_utc = datetime.now(timezone.utc)
+            # now_utc = clock.now(timezone.utc)
             # if 17 <= now_utc.hour < 20:
             #      logger.warning(f"💤 [TIME FILTER] Late NY Session ({now_utc.strftime('%H:%M')} UTC). Sleeping until 20:00 UTC.")
             #      smc_scanner_cache = []
-            #      await asyncio.sleep(60)
+            #      await clock.sleep(60)
             #      continue
             
             # [STRATEGY RESET] 1. Market Regime - REMOVED (User Request)
             # We assume Bullish unless Time Filter hits.
+            if (market_trend_label, market_trend_score) != ("Bullish", 100):
+                scan_version += 1
             market_trend_label = "Bullish"
             market_trend_score = 100
             
+            # [JOURNAL] Start recording this cycle
+            rec = journal.begin_cycle(clock.time())
+            if rec:
+                rec.record_timing("sync", sync_sec)
+
             # 1. Fetch all tickers
             try:
+                t0 = time.perf_counter()
                 tickers = await ex_live.fetch_tickers()
+                valuation.on_tickers(tickers, clock.time())
+                if rec:
+                    rec.record_timing("fetch_tickers", time.perf_counter() - t0)
+                    rec.record_tickers(tickers)
             except Exception as e:
                 logger.error(f"[SCAN ERROR] Fetch tickers failed: {e}")
-                await asyncio.sleep(10)
+                if rec:
+                    rec.record("outcome", f"fetch_tickers failed: {e}")
+                await clock.sleep(10)
                 continue
 
             # 2. Filter and Sort
@@ -1120,8 +1366,8 @@ async def strategy_loop():
             all_candidates.sort(key=lambda x: float(x['percentage'] or 0), reverse=True)
             top_gainers = [t['symbol'] for t in all_candidates[:35]] # Focus on Top 35 Leaders 
             
-            open_trades = await db.get_open_trades()
-            active_strats = [t['strategy'] for t in open_trades] # Not strictly needed inside scan, but good for context if needed later
+            open_trades = book.open_trades()
+            active_strats = [t.strategy for t in open_trades] # Not strictly needed inside scan, but good for context if needed later
             
             # ---------------------------------------------------------
             # MARKET INTELLIGENCE (Aligned with Trading Logic)
@@ -1152,12 +1398,21 @@ async def strategy_loop():
             # Context Object for passing BTC data
             scan_context = {"btc_pct": btc_pct}
 
+            if rec:
+                rec.record("candidates", top_gainers)
+                rec.record("btc_pct", btc_pct)
+
             # We fetch all candidates in parallel
-            smc_tasks = [scan_smc_target(s, ex_live, scan_context) for s in top_gainers]
+            t0 = time.perf_counter()
+            smc_tasks = [scan_smc_target(s, ex_live, scan_context, rec) for s in top_gainers]
             smc_results = await asyncio.gather(*smc_tasks)
+            if rec:
+                rec.record_timing("scan", time.perf_counter() - t0)
+            t0 = time.perf_counter()
             
             new_smc_cache = []
             bullish_count = 0
+            executed = []
             
             # Process SMC Results (Sequential Execution for safety)
             for res in smc_results:
@@ -1168,7 +1423,7 @@ async def strategy_loop():
                     new_smc_cache.extend(data)
                 
                 if diag:
-                    diag['time'] = datetime.now(timezone.utc).isoformat()
+                    diag['time'] = clock.now(timezone.utc).isoformat()
                     near_hits.insert(0, diag)
                 
                 if sig:
@@ -1178,7 +1433,8 @@ async def strategy_loop():
                     strategy_name = f"SMC_{trigger_type}"
                     
                     if btc_multiplier > 0:
-                        await execute_buy(sym, None, None, strategy_name, sl_absolute=sl_abs, btc_multiplier=btc_multiplier)
+                        if await execute_buy(sym, None, None, strategy_name, sl_absolute=sl_abs, btc_multiplier=btc_multiplier):
+                            executed.append(sym)
                     else:
                         logger.info(f"🛑 [REGIME BLOCK] {sym}: Signal ignored due to Bearish BTC Regime")
                 
@@ -1188,8 +1444,13 @@ async def strategy_loop():
                      # No, log all for now to prove it works).
                      logger.info(f"🛡️ [FILTER BLOCK] {sym}: {diag['reason']}")
                 
+            if rec:
+                rec.record_timing("execute", time.perf_counter() - t0)
+                rec.record("signals", [r[0] for r in smc_results if r[3]])
+                rec.record("executed", executed)  # buys that were actually booked
+
             # [FIX] Also Scan Active Positions for Dashboard Visualization
-            active_symbols = [t['symbol'] for t in open_trades]
+            active_symbols = [t.symbol for t in open_trades]
             missing_active = [s for s in active_symbols if s not in top_gainers]
             
             if missing_active:
@@ -1201,6 +1462,8 @@ async def strategy_loop():
             # Update Global Cache
             smc_scanner_cache = new_smc_cache[:20]
             while len(near_hits) > 20: near_hits.pop()
+            live_hub.publish("scanner", round_rows(smc_scanner_cache), key=("symbol",))
+            live_hub.publish("signals", round_rows(near_hits))
 
             # UI SYNC
             if len(top_gainers) > 0:
@@ -1215,37 +1478,75 @@ async def strategy_loop():
                 else:
                     market_trend_score = raw
                     market_trend_label = "Bullish"
+            scan_version += 1
             
             logger.info(f"📈 [MARKET TREND] Score: {market_trend_score}/100 ({market_trend_label}) | Regime: {btc_regime} ({btc_multiplier}x)")
 
             # ---------------------------------------------------------
             # END OF LOOP
             # ---------------------------------------------------------
-            duration = (datetime.now() - start_ts).total_seconds()
+            duration = (clock.now() - start_ts).total_seconds()
             logger.info(f"[SCANNER] Cycle complete in {duration:.2f}s.")
+            if rec:
+                rec.record("outcome", "complete")
             
         except Exception as e:
             logger.exception("Strategy loop crashed")
+            if rec:
+                rec.record("outcome", f"crashed: {e}")
+        finally:
+            # [JOURNAL] Every begun cycle is written: complete, stopped early or crashed
+            if rec:
+                if "outcome" not in rec.meta:
+                    rec.record("outcome", "aborted")
+                try:
+                    await journal.commit(rec)
+                except Exception as e:
+                    logger.error(f"[JOURNAL] Write failed: {e}")
         
-        await asyncio.sleep(60)
+        await clock.sleep(60)
+
+# Background loops startup() launches; each one sleeps only via clock.sleep()
+# (timewarp.py makes every one of them a VirtualClock participant)
+CLOCK_LOOPS = (watcher_loop, strategy_loop, maintenance_loop)
 
 
 # ------------------------------------------------------------------------------
 # FASTAPI ENDPOINTS
 # ------------------------------------------------------------------------------
 @app.get("/stats", dependencies=[Depends(get_current_user)])
-async def stats():
+async def stats(request: Request, response: Response):
+    version = stats_version()
+    if version is not None:
+        cached = not_modified(request, response, etag("stats", *version))
+        if cached:
+            return cached
+    return json_response(round_row(await build_stats()), response)
+
+def stats_version():
+    """Everything /stats depends on, or None in live mode while the cached valuation is stale."""
+    base = (book.version, db.state_version, db.trades_version, scan_version, clock.now().date().isoformat())
+    if TRADE_MODE == "live":
+        if valuation.is_stale(clock.time()):
+            return None
+        return (valuation.version,) + base
+    return base
+
+async def build_stats(agg=None):
+    """`agg`: the 'all' trade_aggregates row when the caller already read it."""
     equity, locked, free, api_status, api_error = await get_equity_locked_free()
     state = await get_app_state()
     
-    all_trades = await db.get_all_trades_desc(limit=500)
-    closed = [t for t in all_trades if t['status'] == 'closed']
-    wins = [t for t in closed if t['pnl'] > 0]
-    total_realized_pnl = sum(t['pnl'] for t in closed)
+    # [PERF] Exact over all history: one row of trade_aggregates
+    if agg is None:
+        rows = await db.get_aggregates("all", "")
+        agg = rows[0] if rows else None
+    agg = agg or {"trades": 0, "wins": 0, "realized_pnl": 0.0}
+    total_realized_pnl = agg['realized_pnl']
     
     # [NEW] Unrealized PnL from open trades
-    open_trades = await db.get_open_trades()
-    total_unrealized_pnl = sum((t.get('unrealized_pnl') or 0.0) for t in open_trades)
+    open_trades = book.open_trades()
+    total_unrealized_pnl = sum((t.unrealized_pnl or 0.0) for t in open_trades)
     
     return {
         "balance": equity,
@@ -1255,9 +1556,9 @@ async def stats():
         "total_pnl": safe(total_realized_pnl + total_unrealized_pnl),
         "realized_pnl": safe(total_realized_pnl),
         "unrealized_pnl": safe(total_unrealized_pnl),
-        "win_rate": safe((len(wins)/len(closed)*100) if closed else 0),
+        "win_rate": safe((agg['wins']/agg['trades']*100) if agg['trades'] else 0),
 
-        "total_trades": len(closed),
+        "total_trades": agg['trades'],
         "api_status": api_status,
         "api_error": api_error,
         
@@ -1267,81 +1568,269 @@ async def stats():
         
         # [CIRCUIT BREAKER] - DISABLED
         "circuit_breaker_triggered": False, # state.get("daily_losses_count", 0) >= MAX_DAILY_LOSING_TRADES,
-        "reset_time_ts": int(datetime.now().replace(hour=23, minute=59, second=59, microsecond=0).timestamp() * 1000)
+        "reset_time_ts": int(clock.now().replace(hour=23, minute=59, second=59, microsecond=0).timestamp() * 1000)
+    }
+
+# [PERF] One request for the whole dashboard. Each section is serialized once
+# per version (same counters as the ETags) and the cached JSON is spliced into
+# the body; only stale sections are rebuilt, and all SQLite reads they need
+# happen in one read transaction.
+DASHBOARD_SECTIONS = ("stats", "positions", "trades", "config", "signals", "scanner")
+dashboard_cache = {}  # section -> (version, json bytes)
+
+@app.get("/dashboard", dependencies=[Depends(get_current_user)])
+async def get_dashboard(
+    request: Request,
+    response: Response,
+    sections: str = Query(None, description=f"Comma-separated subset of {','.join(DASHBOARD_SECTIONS)}"),
+    trades_limit: int = Query(100, ge=1, le=1000),
+):
+    """stats, positions, recent trades, trade_usd, signals and scanner rows in one consistent snapshot."""
+    wanted = DASHBOARD_SECTIONS
+    if sections:
+        wanted = tuple(s.strip() for s in sections.split(",") if s.strip())
+        unknown = set(wanted) - set(DASHBOARD_SECTIONS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"unknown sections: {sorted(unknown)}")
+
+    # Versions first (before any read): a racing write can only cost a rebuild
+    versions = {
+        "stats": stats_version(),
+        "positions": book.version,
+        "trades": (db.trades_version, trades_limit),
+        "config": db.state_version,
+        "signals": scan_version,
+        "scanner": scan_version,
     }
+    tag = None
+    if versions["stats"] is not None or "stats" not in wanted:
+        parts = []
+        for s in wanted:
+            parts.extend(versions[s] if isinstance(versions[s], tuple) else (versions[s],))
+        tag = etag("dashboard", *parts)
+        cached = not_modified(request, response, tag)
+        if cached:
+            return cached
+
+    stale = [s for s in wanted if versions[s] is None or dashboard_cache.get(s, (None,))[0] != versions[s]]
+    rows = {}
+    if "trades" in stale or "stats" in stale:
+        rows = await db.get_dashboard_rows(trades_limit if "trades" in stale else 0, "stats" in stale)
+
+    for section in stale:
+        if section == "stats":
+            value = await build_stats(rows.get("aggregates"))
+        elif section == "positions":
+            value = to_dicts(book.open_trades())
+        elif section == "trades":
+            value = rows["trades"]
+        elif section == "config":
+            value = {"trade_usd": await db.get_state_key("trade_usd", 10.0)}
+        elif section == "signals":
+            value = near_hits
+        else:
+            value = smc_scanner_cache
+        if isinstance(value, list):
+            value = round_rows(value)
+        elif section == "stats":
+            value = round_row(value)
+        dashboard_cache[section] = (versions[section], dumps(value))
+
+    body = b"{" + b",".join(b'"%s":%s' % (s.encode(), dashboard_cache[s][1]) for s in wanted) + b"}"
+    headers = {"ETag": tag, "Cache-Control": "private, no-cache"} if tag else None
+    return Response(body, media_type="application/json", headers=headers)
+
+@app.get("/stats/breakdown", dependencies=[Depends(get_current_user)])
+async def stats_breakdown(scope: str = Query("strategy", pattern="^(strategy|day)$")):
+    """Per-strategy or per-day closed-trade totals."""
+    return await db.get_aggregates(scope)
+
+# [PERF] Conditional GET: strong ETags from the version counters of each piece of
+# state (book.version, db.trades_version, db.state_version, scan_version).
+# Counters restart with the process, hence the boot id. Handlers build the tag
+# BEFORE reading, so a write racing the read can only cost an extra 200.
+BOOT_ID = uuid.uuid4().hex[:8]
+
+def etag(*parts) -> str:
+    return '"' + "-".join([BOOT_ID, *map(str, parts)]) + '"'
+
+def not_modified(request: Request, response: Response, tag: str):
+    """Tag the response; returns a bare 304 if the client already holds this version."""
+    headers = {"ETag": tag, "Cache-Control": "private, no-cache"}
+    response.headers.update(headers)
+    sent = request.headers.get("if-none-match")
+    if sent and (sent.strip() == "*" or tag in {t.strip().removeprefix("W/") for t in sent.split(",")}):
+        return Response(status_code=304, headers=headers)
+    return None
+
+def encode_cursor(row):
+    return base64.urlsafe_b64encode(f"{row['time']}\n{row['id']}".encode()).decode()
+
+def decode_cursor(cursor):
+    try:
+        t, _, trade_id = base64.urlsafe_b64decode(cursor.encode()).decode().partition("\n")
+        return t, trade_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="invalid cursor")
 
 @app.get("/trades", dependencies=[Depends(get_current_user)])
-async def get_trades():
-    return await db.get_all_trades_desc()
+async def get_trades(
+    request: Request,
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: str = Query(None, description="X-Next-Cursor of the previous page"),
+    fields: str = Query(None, description="Comma-separated columns (id and time always included)"),
+    since: str = Query(None, description="Only trades changed after this updated_at"),
+    archive: bool = Query(False, description="Continue into archived trades"),
+):
+    """
+    Newest first, keyset-paginated on (time, id). Same list shape as before;
+    the next page's cursor is in the X-Next-Cursor header. With `since`, returns
+    changed trades oldest change first; X-Next-Cursor then holds the last
+    (updated_at, id) seen, so pass it back with `since` to continue (rows that
+    share one updated_at are never skipped). X-Next-Since: last updated_at.
+    """
+    columns = TRADE_COLUMNS
+    if fields:
+        wanted = {f.strip() for f in fields.split(",") if f.strip()}
+        unknown = wanted - set(TRADE_COLUMNS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"unknown fields: {sorted(unknown)}")
+        wanted |= {"id", "time"} | ({"updated_at"} if since else set())
+        columns = tuple(c for c in TRADE_COLUMNS if c in wanted)
+
+    cached = not_modified(request, response, etag("trades", db.trades_version))
+    if cached:
+        return cached
+
+    if since:
+        after_id = None
+        if cursor:
+            try:
+                since, after_id = decode_change_cursor(cursor)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="invalid cursor")
+        rows = await db.get_trades_changed_since(since, limit, columns, after_id=after_id)
+        if rows:
+            since, after_id = rows[-1]["updated_at"], rows[-1]["id"]
+        response.headers["X-Next-Since"] = since
+        response.headers["X-Next-Cursor"] = encode_change_cursor(since, after_id or "")
+        return json_response(round_rows(rows), response)
+
+    before = decode_cursor(cursor) if cursor else None
+    rows = await db.get_trades_page(limit + 1, before, columns, include_archive=archive)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1])
+    return json_response(round_rows(rows), response)
+
+@app.get("/export/snapshot", dependencies=[Depends(get_current_admin)])
+async def export_snapshot():
+    """Consistent copy of trades.db taken with the online backup API (bot keeps running)."""
+    tmpdir = tempfile.mkdtemp(prefix="export_")
+    path = os.path.join(tmpdir, "trades_snapshot.db")
+    try:
+        await db.backup_to(path)
+    except Exception:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+        raise
+    return FileResponse(path, filename="trades_snapshot.db", media_type="application/vnd.sqlite3",
+                        background=BackgroundTask(shutil.rmtree, tmpdir, ignore_errors=True))
+
+@app.get("/export/changes", dependencies=[Depends(get_current_admin)])
+async def export_changes(
+    cursor: str = Query(None, description="X-Next-Cursor of the previous batch"),
+    since: str = Query("", description="ISO time to start from when there is no cursor"),
+    limit: int = Query(5000, ge=1, le=50000),
+    format: str = Query("ndjson", description="ndjson (gzip) or parquet"),
+):
+    """Trade rows changed after the cursor, oldest change first; replicas upsert them by id."""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {EXPORT_FORMATS}")
+    try:
+        since, after_id = decode_change_cursor(cursor) if cursor else (since, "")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid cursor")
+    rows, next_cursor = await fetch_changes(db, since, after_id, limit)
+    try:
+        body, media_type = serialize_changes(rows, format)
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    return Response(body, media_type=media_type, headers={"X-Next-Cursor": next_cursor})
+
+@app.get("/equity", dependencies=[Depends(get_current_user)])
+async def get_equity(start: float = Query(None), end: float = Query(None),
+                     points: int = Query(500, ge=10, le=5000)):
+    """Equity/PnL series for [start, end] (epoch seconds, default last 24h), decimated to <= points."""
+    now = clock.time()
+    end = end or now
+    start = start or (end - 86400)
+    return await equity_series.series(start, end, points, now)
+
+@app.get("/stream", dependencies=[Depends(get_current_user)])
+async def stream(charts: str = Query("", description="Comma-separated SYMBOL@interval candle subscriptions")):
+    """Server-sent events: one snapshot, then deltas for positions, stats, trades, scanner and charts."""
+    await publish_live(force=True)  # the snapshot starts from fresh state
+    return StreamingResponse(live_hub.stream(c.strip() for c in charts.split(",")), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/stream/charts", dependencies=[Depends(get_current_user)])
+async def stream_charts(client: str = Query(..., description="Id from the stream's hello event"),
+                        charts: str = Query("", description="Comma-separated SYMBOL@interval candle subscriptions")):
+    """Change the candle subscriptions of an open /stream (replaces the previous set)."""
+    if not live_hub.subscribe(client, (c.strip() for c in charts.split(","))):
+        raise HTTPException(status_code=404, detail="Stream not connected")
+    subscribed = sorted(live_hub.clients[client].charts)
+    await publish_live()  # last candles of a newly subscribed chart right away
+    return {"status": "ok", "charts": subscribed}
 
 @app.get("/positions", dependencies=[Depends(get_current_user)])
-async def get_positions():
-    # [OPTIMIZATION] Read from DB directly. Background worker handles sync.
-    return await db.get_open_trades()
+async def get_positions(request: Request, response: Response):
+    # [OPTIMIZATION] Served from the in-memory position book.
+    cached = not_modified(request, response, etag("positions", book.version))
+    if cached:
+        return cached
+    return json_response(round_rows(to_dicts(book.open_trades())), response)
 
 @app.get("/signals", dependencies=[Depends(get_current_user)])
-async def get_signals():
-    return near_hits
+async def get_signals(request: Request, response: Response):
+    cached = not_modified(request, response, etag("scan", scan_version))
+    if cached:
+        return cached
+    return json_response(round_rows(near_hits), response)
 
 @app.get("/history", dependencies=[Depends(get_current_user)])
-async def get_history(symbol: str, interval: str = "15m"):
-    """Fetch primitive OHLCV history for custom charts"""
+async def get_history(request: Request, response: Response, symbol: str, interval: str = "15m",
+                      format: str = Query("columns", pattern="^(columns|rows)$")):
+    """
+    OHLCV + EMA5/EMA50/RSI for custom charts. Default: parallel arrays
+    (time, open, high, low, close, ema5, ema50, rsi); format=rows: the original
+    candles / ema5 / ema50 / rsi lists of {time, ...} objects.
+    """
     try:
-        if symbol.lower() == "btc/usdt":
-             ohlcv = await ex_live.fetch_ohlcv(symbol, interval, limit=200)
-        else:
-             # Use the same exchange instance as strategy
-             ohlcv = await ex_live.fetch_ohlcv(symbol, interval, limit=200)
-             
-
-        # Convert to Pandas for Indicators
-        df_hist = pd.DataFrame(ohlcv, columns=['time', 'open', 'high', 'low', 'close', 'volume'])
-        df_hist['ema5'] = df_hist['close'].ewm(span=5, adjust=False).mean() # [NEW] EMA 5
-        df_hist['ema50'] = df_hist['close'].ewm(span=50, adjust=False).mean()
-
-        # [NEW] Simple RSI Calc
-        delta = df_hist['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / (loss.replace(0, 0.0001))
-        df_hist['rsi'] = 100 - (100 / (1 + rs))
-
-        candles = []
-        ema5 = [] # [NEW]
-        ema50 = []
-        rsi = []
-
-        for i, row in df_hist.iterrows():
-            t_sec = int(row['time'] / 1000)
-            candles.append({
-                "time": t_sec, 
-                "open": row['open'],
-                "high": row['high'],
-                "low": row['low'],
-                "close": row['close']
-            })
-            
-            if not pd.isna(row['ema5']):
-                ema5.append({"time": t_sec, "value": row['ema5']})
-            if not pd.isna(row['ema50']):
-                ema50.append({"time": t_sec, "value": row['ema50']})
-            if not pd.isna(row['rsi']):
-                rsi.append({"time": t_sec, "value": row['rsi']})
-
-        return {
-            "candles": candles,
-            "ema20": ema5, # Hack: Send EMA 5 in the "ema20" slot for now to keep frontend working
-            "ema5": ema5,  # Send correct key too for future update
-            "ema50": ema50,
-            "rsi": rsi
-        }
+        ohlcv = await ex_live.fetch_ohlcv(symbol, interval, limit=200)
+
+        # [PERF] Cached per (symbol, interval, last candle ts): only the live candle is recomputed
+        series = chart_series.update(symbol, interval, ohlcv)
+        cached = not_modified(request, response, etag("history", series.version))
+        if cached:
+            return cached
+        if format == "rows":
+            return json_response(series.rows(), response)
+        return Response(series.columns_json(), media_type="application/json",
+                        headers={k: response.headers[k] for k in ("etag", "cache-control")})
     except Exception as e:
         logger.error(f"History fetch error: {e}")
-        return {"candles": [], "ema20": [], "ema50": [], "rsi": []}
+        if format == "rows":
+            return {"candles": [], "ema20": [], "ema50": [], "rsi": []}
+        return {k: [] for k in CHART_SERIES}
 
 @app.get("/smc-scanner", dependencies=[Depends(get_current_user)])
-async def get_smc_scanner():
-    return smc_scanner_cache
+async def get_smc_scanner(request: Request, response: Response):
+    cached = not_modified(request, response, etag("scan", scan_version))
+    if cached:
+        return cached
+    return json_response(round_rows(smc_scanner_cache), response)
 
 @app.post("/paper-sell", dependencies=[Depends(get_current_admin)])
 async def paper_sell(trade_id: str = Query(...), sell_pct: float = Query(100.0)):
@@ -1350,7 +1839,12 @@ async def paper_sell(trade_id: str = Query(...), sell_pct: float = Query(100.0))
 
 @app.post("/update-sl-tp", dependencies=[Depends(get_current_admin)])
 async def update_sl_tp(trade_id: str = Query(...), sl: float = Query(...), tp: float = Query(...)):
-    await db.update_trade(trade_id, {"sl": sl, "tp": tp})
+    trade = book.get(trade_id)
+    if trade is not None:
+        trade.sl, trade.tp = sl, tp
+        await book.save(trade)
+    else:
+        await db.update_trade(trade_id, {"sl": sl, "tp": tp})
     return {"status": "ok"}
 
 @app.post("/admin/kill", dependencies=[Depends(get_current_admin)])
@@ -1365,10 +1859,33 @@ async def resume():
     await db.set_state_key("auto_trading", True)
     return {"status": "resumed"}
 
+@app.get("/admin/db-metrics", dependencies=[Depends(get_current_admin)])
+async def get_db_metrics():
+    """WAL / page counts, checkpoint durations and the last housekeeping pass."""
+    return await db_maintenance.metrics(clock.time())
+
+@app.get("/admin/live-metrics", dependencies=[Depends(get_current_admin)])
+async def get_live_metrics():
+    """Connected push clients, chart subscriptions and frames sent."""
+    return live_hub.metrics()
+
+@app.get("/admin/valuation-metrics", dependencies=[Depends(get_current_admin)])
+async def get_valuation_metrics():
+    """Cached live equity: snapshot ages, memory hits vs exchange refreshes."""
+    return valuation.metrics(clock.time())
+
+@app.post("/admin/refresh-valuation", dependencies=[Depends(get_current_admin)])
+async def refresh_valuation():
+    """Refetch balance and held-asset prices now, ignoring the staleness bound."""
+    try:
+        await valuation.refresh(clock.time(), force=True)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Valuation refresh failed: {e}")
+    return valuation.metrics(clock.time())
+
 @app.get("/admin/trade-usd", dependencies=[Depends(get_current_admin)])
 async def get_trade_usd():
-    state = await get_app_state()
-    return {"trade_usd": state.get("trade_usd", 10.0)}
+    return {"trade_usd": await db.get_state_key("trade_usd", 10.0)}
 
 @app.post("/admin/set-trade-usd", dependencies=[Depends(get_current_admin)])
 async def set_trade_usd(amount: float = Query(..., gt=0)):
@@ -0,0 +1,144 @@
+import os
+import time
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict
+
+from database import db as default_db
+
+logger = logging.getLogger("TradingBot")
+
+# ------------------------
+# DB MAINTENANCE
+# ------------------------
+# main.maintenance_loop calls tick(clock.time()) every MAINTENANCE_INTERVAL
+# seconds; all scheduling runs on that clock, so time-warp replays drive it too.
+# WAL: a PASSIVE checkpoint once the WAL passes WAL_PASSIVE_BYTES or
+# CHECKPOINT_EVERY_SEC has elapsed (never blocks readers or waits on them).
+# TRUNCATE (checkpoint + reset the file to 0 bytes) once it passes
+# WAL_TRUNCATE_BYTES, or earlier at a quiet moment, but only right after a
+# PASSIVE checkpoint drained the whole log. TRUNCATE holds the write lock while
+# it waits on readers (busy_timeout): a reader pinning the WAL (a dashboard
+# read, backup_to) makes it busy, and TRUNCATE then backs off (doubling, up to
+# CHECKPOINT_EVERY_SEC) instead of stalling writers on every tick.
+# Housekeeping (retention, incremental vacuum, PRAGMA optimize) runs at most
+# every HOUSEKEEPING_EVERY_SEC and only in a quiet period: no commit for QUIET_SEC.
+
+MAINTENANCE_INTERVAL = int(os.environ.get("MAINTENANCE_INTERVAL", "15"))
+WAL_PASSIVE_BYTES = int(os.environ.get("WAL_PASSIVE_BYTES", str(4 << 20)))
+WAL_TRUNCATE_BYTES = int(os.environ.get("WAL_TRUNCATE_BYTES", str(64 << 20)))
+CHECKPOINT_EVERY_SEC = int(os.environ.get("CHECKPOINT_EVERY_SEC", "300"))
+QUIET_SEC = float(os.environ.get("MAINTENANCE_QUIET_SEC", "5"))
+HOUSEKEEPING_EVERY_SEC = int(os.environ.get("HOUSEKEEPING_EVERY_SEC", "3600"))
+ORDER_EVENTS_RETENTION_DAYS = int(os.environ.get("ORDER_EVENTS_RETENTION_DAYS", "30"))  # 0 = keep
+VACUUM_MIN_FREE_PAGES = 256   # below this, not worth a vacuum step
+VACUUM_STEP_PAGES = 2048      # pages returned per housekeeping pass (bounded lock time)
+
+
+class DbMaintenance:
+    def __init__(self, database=default_db):
+        self.db = database
+        self._last_checkpoint = None  # clock time; set on the first tick
+        self._last_housekeeping = None
+        self._truncate_after = 0.0    # no TRUNCATE before this clock time (backoff)
+        self._truncate_backoff = 0.0
+        self._wal_seen = 0  # WAL file size at the last checkpoint (PASSIVE never shrinks it)
+        self._warned_auto_vacuum = False
+        self.stats: Dict[str, Any] = {
+            "checkpoints": {},  # mode -> count / busy / last_ms / max_ms / total_ms
+            "last_checkpoint": None,
+            "housekeeping": None,
+        }
+
+    def quiet(self, now: float) -> bool:
+        return now - self.db.last_write_at >= QUIET_SEC
+
+    async def checkpoint(self, mode: str, now: float) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        result = await self.db.wal_checkpoint(mode)
+        ms = (time.perf_counter() - t0) * 1000
+        self._last_checkpoint = now
+
+        s = self.stats["checkpoints"].setdefault(
+            mode, {"count": 0, "busy": 0, "last_ms": 0.0, "max_ms": 0.0, "total_ms": 0.0})
+        s["count"] += 1
+        s["busy"] += result["busy"]
+        s["last_ms"] = round(ms, 3)
+        s["max_ms"] = round(max(s["max_ms"], ms), 3)
+        s["total_ms"] = round(s["total_ms"] + ms, 3)
+        self.stats["last_checkpoint"] = {"mode": mode, "at": now, "ms": round(ms, 3), **result}
+        if result["busy"]:
+            logger.warning(f"🧹 [MAINT] {mode} checkpoint busy ({result['checkpointed_pages']}/{result['log_pages']} pages)")
+        return result
+
+    async def housekeeping(self, now: float) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        done: Dict[str, Any] = {"order_events_pruned": 0, "vacuum_pages_freed": 0}
+        if ORDER_EVENTS_RETENTION_DAYS > 0:
+            cutoff = (datetime.fromtimestamp(now, timezone.utc)
+                      - timedelta(days=ORDER_EVENTS_RETENTION_DAYS)).isoformat()
+            done["order_events_pruned"] = await self.db.prune_order_events(cutoff)
+        storage = await self.db.storage_stats()
+        if storage["auto_vacuum"] != 2:
+            if not self._warned_auto_vacuum:
+                self._warned_auto_vacuum = True
+                logger.warning("🧹 [MAINT] auto_vacuum is not INCREMENTAL, skipping vacuum steps "
+                               "(convert offline: python migrations.py auto-vacuum)")
+        elif storage["freelist_count"] >= VACUUM_MIN_FREE_PAGES:
+            done["vacuum_pages_freed"] = await self.db.incremental_vacuum(VACUUM_STEP_PAGES)
+        await self.db.optimize()
+        done["ms"] = round((time.perf_counter() - t0) * 1000, 3)
+        done["at"] = now
+        self.stats["housekeeping"] = done
+        if done["order_events_pruned"] or done["vacuum_pages_freed"]:
+            logger.info(f"🧹 [MAINT] Pruned {done['order_events_pruned']} order events, "
+                        f"freed {done['vacuum_pages_freed']} pages ({done['ms']:.0f} ms)")
+        return done
+
+    async def _truncate(self, now: float):
+        """PASSIVE first; TRUNCATE only once it drained the whole log, else back off."""
+        result = await self.checkpoint("PASSIVE", now)
+        if not result["busy"] and result["log_pages"] == result["checkpointed_pages"]:
+            result = await self.checkpoint("TRUNCATE", now)
+            if not result["busy"]:
+                self._truncate_backoff = 0.0
+                return
+        self._truncate_backoff = min(max(2 * self._truncate_backoff, MAINTENANCE_INTERVAL), CHECKPOINT_EVERY_SEC)
+        self._truncate_after = now + self._truncate_backoff
+
+    async def tick(self, now: float):
+        if self._last_checkpoint is None:
+            self._last_checkpoint = now
+        quiet = self.quiet(now)
+        if quiet and (self._last_housekeeping is None or now - self._last_housekeeping >= HOUSEKEEPING_EVERY_SEC):
+            self._last_housekeeping = now
+            await self.housekeeping(now)
+
+        wal = self.db.wal_bytes()
+        grew = wal > self._wal_seen
+        if (wal >= WAL_TRUNCATE_BYTES or (quiet and wal >= WAL_PASSIVE_BYTES)) and now >= self._truncate_after:
+            await self._truncate(now)
+        elif (grew and wal >= WAL_PASSIVE_BYTES) or (wal and now - self._last_checkpoint >= CHECKPOINT_EVERY_SEC):
+            await self.checkpoint("PASSIVE", now)
+        else:
+            return
+        self._wal_seen = self.db.wal_bytes()
+
+    async def metrics(self, now: float) -> Dict[str, Any]:
+        storage = await self.db.storage_stats()
+        storage["free_bytes"] = storage["freelist_count"] * storage["page_size"]
+        return {
+            "storage": storage,
+            **self.stats,
+            "quiet": self.quiet(now),
+            "truncate_backoff_sec": self._truncate_backoff,
+            "thresholds": {
+                "wal_passive_bytes": WAL_PASSIVE_BYTES,
+                "wal_truncate_bytes": WAL_TRUNCATE_BYTES,
+                "checkpoint_every_sec": CHECKPOINT_EVERY_SEC,
+                "housekeeping_every_sec": HOUSEKEEPING_EVERY_SEC,
+            },
+        }
+
+
+db_maintenance = DbMaintenance()
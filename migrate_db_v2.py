@@ -1,22 +1,9 @@
-import aiosqlite
-import asyncio
+import sys
 
-DB_FILE = "trades.db"
+from migrations import main
 
-async def migrate():
-    print("🔄 Migrating Database...")
-    async with aiosqlite.connect(DB_FILE) as db:
-        try:
-            await db.execute("ALTER TABLE trades ADD COLUMN exit_time TEXT")
-            print("✅ Added 'exit_time' column.")
-        except Exception as e:
-            if "duplicate column" in str(e):
-                print("ℹ️ 'exit_time' column already exists.")
-            else:
-                print(f"⚠️ Error adding column: {e}")
-        
-        await db.commit()
-    print("✅ Migration Complete.")
+DB_FILE = "trades.db"
 
+# Superseded by migrations.py (versioned, resumable). Kept as an entry point.
 if __name__ == "__main__":
-    asyncio.run(migrate())
+    sys.exit(main(["--db", sys.argv[1] if len(sys.argv) > 1 else DB_FILE, "up"]))
@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+Versioned schema migrations for trades.db.
+
+    python migrations.py                 # apply pending migrations to trades.db
+    python migrations.py --db x.db status
+    python migrations.py auto-vacuum     # one-off, bot stopped: switch to incremental vacuum
+
+Each migration runs once and is recorded in `schema_version`. DDL steps commit
+as one unit. Backfills over large tables run in rowid chunks: every chunk
+commits together with its progress cursor, so the write lock is released
+between chunks and an interrupted backfill resumes where it stopped.
+"""
+import os
+import sys
+import time
+import asyncio
+import sqlite3
+import logging
+import argparse
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, List, NamedTuple, Optional
+
+import aiosqlite
+
+logger = logging.getLogger("TradingBot")
+
+BACKFILL_CHUNK = 20_000  # rows per committed chunk
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    ddl: Optional[Callable[..., Awaitable[None]]] = None  # async (conn)
+    backfill: Optional["Backfill"] = None
+
+
+class Backfill(NamedTuple):
+    table: str
+    sql: str  # ";\n"-separated statements, bound with :lo/:hi rowids
+
+
+# ------------------------
+# HELPERS
+# ------------------------
+async def column_exists(conn, table: str, column: str) -> bool:
+    cursor = await conn.execute(f"PRAGMA table_info({table})")
+    return any(r[1] == column for r in await cursor.fetchall())
+
+
+def add_column(table: str, column: str, decl: str):
+    async def ddl(conn):
+        if not await column_exists(conn, table, column):
+            await conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+    return ddl
+
+
+def statements(*sql: str):
+    async def ddl(conn):
+        for s in sql:
+            await conn.execute(s)
+    return ddl
+
+
+# ------------------------
+# MIGRATIONS (append only, never renumber)
+# ------------------------
+async def _baseline(conn):
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS trades (
+            id TEXT PRIMARY KEY,
+            time TEXT,
+            symbol TEXT,
+            side TEXT,
+            strategy TEXT,
+            entry_price REAL,
+            qty REAL,
+            used_usd REAL,
+            status TEXT,
+            pnl REAL,
+            sl REAL,
+            tp REAL,
+            exit_price REAL,
+            exit_time TEXT,
+            current_price REAL,
+            unrealized_pnl REAL,
+            fees_usd REAL,
+            highest_price REAL,
+            trail_active INTEGER, -- Boolean stored as 1/0
+            trail_sl REAL,
+            is_partial INTEGER DEFAULT 0 -- 0=Full, 1=Partial Sold
+        )
+    """)
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            username TEXT PRIMARY KEY,
+            hashed_password TEXT,
+            role TEXT DEFAULT 'viewer',
+            is_active INTEGER DEFAULT 1
+        )
+    """)
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS app_state (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    """)
+
+
+async def _incremental_auto_vacuum(conn):
+    # No VACUUM here: it rewrites and locks the whole file at boot. New files
+    # are created INCREMENTAL by Database._connect; existing ones are
+    # converted offline with `python migrations.py auto-vacuum`.
+    cursor = await conn.execute("PRAGMA auto_vacuum")
+    if (await cursor.fetchone())[0] != 2:
+        logger.warning("🧱 [MIGRATE] auto_vacuum is not INCREMENTAL: free pages are not returned. "
+                       "Stop the bot and run `python migrations.py auto-vacuum` to convert.")
+
+
+async def convert_auto_vacuum(database) -> bool:
+    """
+    One-off offline conversion to auto_vacuum=INCREMENTAL (full VACUUM: rewrites
+    the file and holds the write lock throughout). False if already converted.
+    """
+    await database._ensure_open()
+    async with database._write_lock:
+        # On the writer: readers keep the mode they saw when they opened
+        if (await (await database._writer.execute("PRAGMA auto_vacuum")).fetchone())[0] == 2:
+            return False
+        # VACUUM cannot run inside a transaction: executescript commits first
+        await database._writer.executescript("PRAGMA auto_vacuum=INCREMENTAL; VACUUM;")
+    return True
+
+
+# (scope, SQL key expression over trades) for trade_aggregates
+AGGREGATE_SCOPES = (
+    ("all", "''"),
+    ("strategy", "COALESCE(strategy, '')"),
+    ("day", "COALESCE(substr(exit_time, 1, 10), '')"),
+)
+
+_AGGREGATE_BACKFILL = ";\n".join(f"""
+    INSERT INTO trade_aggregates (scope, key, trades, wins, losses, realized_pnl, fees_usd)
+    SELECT '{scope}', {key_expr}, COUNT(*), SUM(pnl > 0), SUM(pnl < 0),
+           COALESCE(SUM(pnl), 0), COALESCE(SUM(fees_usd), 0)
+    FROM trades WHERE rowid BETWEEN :lo AND :hi AND status = 'closed'
+    GROUP BY {key_expr}
+    ON CONFLICT(scope, key) DO UPDATE SET
+        trades = trades + excluded.trades,
+        wins = wins + excluded.wins,
+        losses = losses + excluded.losses,
+        realized_pnl = realized_pnl + excluded.realized_pnl,
+        fees_usd = fees_usd + excluded.fees_usd""" for scope, key_expr in AGGREGATE_SCOPES)
+
+# Zero-PnL closes (phantom / sync cleanups: nothing was sold) are not trades for
+# the trades count; wins and losses never included them. Subtracted per key
+# from the live rows (chunked) and, once, from the archive DB.
+_ZERO_PNL_COUNTS = "SELECT {key_expr} AS key, COUNT(*) AS n FROM trades WHERE {where} GROUP BY 1"
+_ZERO_PNL_CLOSED = "status = 'closed' AND COALESCE(pnl, 0) = 0"
+_UNCOUNT = """
+    UPDATE trade_aggregates SET trades = MAX(0, trades - z.n)
+    FROM ({counts}) z WHERE trade_aggregates.scope = '{scope}' AND trade_aggregates.key = z.key"""
+
+_UNCOUNT_ZERO_PNL = ";\n".join(_UNCOUNT.format(scope=scope, counts=_ZERO_PNL_COUNTS.format(
+    key_expr=key_expr, where=f"rowid BETWEEN :lo AND :hi AND {_ZERO_PNL_CLOSED}")) for scope, key_expr in AGGREGATE_SCOPES)
+
+
+async def _uncount_archived_zero_pnl(conn):
+    """Archived closes were counted before they moved: read the archive on its own connection."""
+    cursor = await conn.execute("PRAGMA database_list")
+    main_file = next((r[2] for r in await cursor.fetchall() if r[1] == "main"), "")
+    archive = os.path.splitext(main_file)[0] + "_archive.db" if main_file else ""
+    if not archive or not os.path.exists(archive):
+        return
+    updates = []
+    try:
+        async with aiosqlite.connect(f"file:{archive}?mode=ro", uri=True) as adb:
+            for scope, key_expr in AGGREGATE_SCOPES:
+                cursor = await adb.execute(_ZERO_PNL_COUNTS.format(key_expr=key_expr, where=_ZERO_PNL_CLOSED))
+                updates += [(n, scope, key) for key, n in await cursor.fetchall()]
+    except sqlite3.OperationalError as e:
+        logger.warning(f"🧱 [MIGRATE] Archive zero-pnl recount skipped: {e}")
+        return
+    await conn.executemany(
+        "UPDATE trade_aggregates SET trades = MAX(0, trades - ?) WHERE scope = ? AND key = ?", updates)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "baseline: trades, users, app_state", _baseline),
+    # Formerly migrate_db_v2.py / the try-except ALTERs in init_db
+    Migration(2, "trades.exit_time", add_column("trades", "exit_time", "TEXT")),
+    Migration(3, "trades.is_partial", add_column("trades", "is_partial", "INTEGER DEFAULT 0")),
+    Migration(4, "hot-query indexes", statements(
+        # get_open_trades / open merge lookup: partial index, only open rows
+        "CREATE INDEX IF NOT EXISTS idx_trades_open ON trades(symbol, strategy) WHERE status = 'open'",
+        # get_all_trades_desc / get_trades_page: ORDER BY time DESC, id DESC (keyset)
+        "DROP INDEX IF EXISTS idx_trades_time",
+        "CREATE INDEX IF NOT EXISTS idx_trades_time_id ON trades(time DESC, id DESC)",
+        # get_trades_by_status_symbol_strategy (status is a bound parameter there)
+        "CREATE INDEX IF NOT EXISTS idx_trades_symbol_strategy_status ON trades(symbol, strategy, status)",
+        # get_trades_by_strategy
+        "CREATE INDEX IF NOT EXISTS idx_trades_strategy_time ON trades(strategy, time)",
+    )),
+    Migration(5, "trade_marks side table", statements("""
+        CREATE TABLE IF NOT EXISTS trade_marks (
+            trade_id TEXT PRIMARY KEY,
+            current_price REAL,
+            unrealized_pnl REAL,
+            highest_price REAL,
+            updated_at TEXT
+        ) WITHOUT ROWID
+    """)),
+    Migration(6, "equity_series", statements("""
+        CREATE TABLE IF NOT EXISTS equity_series (
+            res INTEGER,
+            bucket INTEGER,
+            equity REAL,
+            equity_min REAL,
+            equity_max REAL,
+            locked REAL,
+            free REAL,
+            realized REAL,
+            unrealized REAL,
+            ts REAL, -- time of the last sample in the bucket
+            PRIMARY KEY (res, bucket)
+        ) WITHOUT ROWID
+    """)),
+    # scope: 'all' (key ''), 'strategy' (key = strategy), 'day' (key = UTC exit date)
+    Migration(7, "trade_aggregates", statements("""
+        CREATE TABLE IF NOT EXISTS trade_aggregates (
+            scope TEXT,
+            key TEXT,
+            trades INTEGER DEFAULT 0,
+            wins INTEGER DEFAULT 0,
+            losses INTEGER DEFAULT 0,
+            realized_pnl REAL DEFAULT 0,
+            fees_usd REAL DEFAULT 0,
+            PRIMARY KEY (scope, key)
+        ) WITHOUT ROWID
+    """, "DELETE FROM trade_aggregates"), Backfill("trades", _AGGREGATE_BACKFILL)),
+    Migration(8, "trades.updated_at", add_column("trades", "updated_at", "TEXT"), Backfill("trades", """
+        UPDATE trades SET updated_at = COALESCE(exit_time, time)
+        WHERE rowid BETWEEN :lo AND :hi AND updated_at IS NULL""")),
+    Migration(9, "idx_trades_updated_at", statements(
+        "CREATE INDEX IF NOT EXISTS idx_trades_updated_at ON trades(updated_at)")),
+    # Append-only exchange order log: intent -> submitted -> filled | failed
+    Migration(10, "order_events", statements("""
+        CREATE TABLE IF NOT EXISTS order_events (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            client_order_id TEXT NOT NULL,
+            event TEXT NOT NULL,
+            symbol TEXT,
+            side TEXT,
+            amount REAL,
+            filled REAL,
+            price REAL,
+            exchange_order_id TEXT,
+            trade_id TEXT,
+            detail TEXT, -- JSON
+            ts TEXT
+        )
+    """, "CREATE INDEX IF NOT EXISTS idx_order_events_cid ON order_events(client_order_id, seq)")),
+    # Lets maintenance.py hand free pages back with PRAGMA incremental_vacuum.
+    # Check only: existing files switch mode offline (`migrations.py auto-vacuum`).
+    Migration(11, "auto_vacuum=INCREMENTAL", _incremental_auto_vacuum),
+    # v7 (and closes recorded before this version) counted zero-PnL closes as trades
+    Migration(12, "trade_aggregates: zero-pnl closes are not trades", _uncount_archived_zero_pnl,
+              Backfill("trades", _UNCOUNT_ZERO_PNL)),
+]
+
+
+# ------------------------
+# ARCHIVE DB (<db>_archive.db, see Database.archive_closed_trades)
+# ------------------------
+# Same columns and key as main.trades. Columns a later migration adds to
+# main.trades are added here too by migrate_archive(), before every archive
+# move and at boot, so INSERT ... SELECT <TRADE_COLUMNS> never goes stale.
+_ARCHIVE_TRADES = """
+    CREATE TABLE IF NOT EXISTS archive.trades (
+        id TEXT PRIMARY KEY,
+        time TEXT,
+        symbol TEXT,
+        side TEXT,
+        strategy TEXT,
+        entry_price REAL,
+        qty REAL,
+        used_usd REAL,
+        status TEXT,
+        pnl REAL,
+        sl REAL,
+        tp REAL,
+        exit_price REAL,
+        exit_time TEXT,
+        current_price REAL,
+        unrealized_pnl REAL,
+        fees_usd REAL,
+        highest_price REAL,
+        trail_active INTEGER,
+        trail_sl REAL,
+        is_partial INTEGER DEFAULT 0,
+        updated_at TEXT
+    )
+"""
+
+
+async def _table_info(conn, schema: str, table: str):
+    cursor = await conn.execute(f"PRAGMA {schema}.table_info({table})")
+    return await cursor.fetchall()  # (cid, name, type, notnull, default, pk)
+
+
+async def migrate_archive(conn):
+    """Bring archive.trades (ATTACHed as `archive`) up to main.trades. Idempotent."""
+    info = await _table_info(conn, "archive", "trades")
+    if info and not any(r[5] for r in info):
+        # Created by the old CREATE TABLE AS (no PRIMARY KEY): rebuild with the key,
+        # keeping the newest copy of any id that was archived twice
+        logger.info("🧱 [MIGRATE] Rebuilding archive.trades with a primary key")
+        await conn.execute("ALTER TABLE archive.trades RENAME TO trades_legacy")
+        await conn.execute(_ARCHIVE_TRADES)
+        legacy = [r[1] for r in await _table_info(conn, "archive", "trades_legacy")]
+        keep = [c for c in legacy if c in {r[1] for r in await _table_info(conn, "archive", "trades")}]
+        cols = ", ".join(keep)
+        await conn.execute(f"INSERT OR REPLACE INTO archive.trades ({cols}) "
+                           f"SELECT {cols} FROM archive.trades_legacy ORDER BY rowid")
+        await conn.execute("DROP TABLE archive.trades_legacy")
+    else:
+        await conn.execute(_ARCHIVE_TRADES)
+    have = {r[1] for r in await _table_info(conn, "archive", "trades")}
+    for _, name, decl, _, default, _ in await _table_info(conn, "main", "trades"):
+        if name not in have:
+            extra = f" DEFAULT {default}" if default is not None else ""
+            await conn.execute(f"ALTER TABLE archive.trades ADD COLUMN {name} {decl}{extra}")
+    await conn.execute("CREATE INDEX IF NOT EXISTS archive.idx_archive_time_id ON trades(time DESC, id DESC)")
+
+
+# ------------------------
+# RUNNER
+# ------------------------
+_BOOKKEEPING = [
+    """CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        name TEXT,
+        applied_at TEXT
+    )""",
+    # In-flight chunked backfills: last rowid done (row removed once applied)
+    """CREATE TABLE IF NOT EXISTS schema_backfill (
+        version INTEGER PRIMARY KEY,
+        cursor INTEGER
+    )""",
+]
+
+
+async def applied_versions(database) -> set:
+    async with database._write() as conn:
+        for s in _BOOKKEEPING:
+            await conn.execute(s)
+        cursor = await conn.execute("SELECT version FROM schema_version")
+        return {r[0] for r in await cursor.fetchall()}
+
+
+async def _run_backfill(database, m: Migration, chunk: int):
+    bf = m.backfill
+    async with database._write() as conn:
+        cursor = await conn.execute("SELECT cursor FROM schema_backfill WHERE version = ?", (m.version,))
+        row = await cursor.fetchone()
+        done = row[0] if row else 0
+        cursor = await conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {bf.table}")
+        last = (await cursor.fetchone())[0]
+    if done:
+        logger.info(f"🧱 [MIGRATE] v{m.version} resuming backfill at rowid {done}")
+
+    sqls = [s for s in bf.sql.split(";\n") if s.strip()]
+    while done < last:
+        hi = done + chunk
+        # One chunk + its cursor per commit; the lock is free between chunks
+        async with database._write() as conn:
+            for s in sqls:
+                await conn.execute(s, {"lo": done + 1, "hi": hi})
+            await conn.execute(
+                "INSERT OR REPLACE INTO schema_backfill (version, cursor) VALUES (?, ?)", (m.version, hi))
+        done = hi
+        await asyncio.sleep(0)
+
+
+async def run_migrations(database, chunk: int = BACKFILL_CHUNK) -> List[int]:
+    """Apply pending migrations in order. Returns the versions applied."""
+    done = await applied_versions(database)
+    applied = []
+    for m in MIGRATIONS:
+        if m.version in done:
+            continue
+        # DDL once: a resumed backfill must not re-run it (e.g. the DELETE in v7)
+        async with database._write() as conn:
+            cursor = await conn.execute("SELECT 1 FROM schema_backfill WHERE version = ?", (m.version,))
+            resuming = await cursor.fetchone() is not None
+            if m.ddl and not resuming:
+                await m.ddl(conn)
+            if m.backfill and not resuming:
+                await conn.execute(
+                    "INSERT INTO schema_backfill (version, cursor) VALUES (?, 0)", (m.version,))
+        if m.backfill:
+            await _run_backfill(database, m, chunk)
+        async with database._write() as conn:
+            await conn.execute("DELETE FROM schema_backfill WHERE version = ?", (m.version,))
+            await conn.execute(
+                "INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+                (m.version, m.name, datetime.now(timezone.utc).isoformat()))
+        logger.info(f"🧱 [MIGRATE] v{m.version} {m.name}")
+        applied.append(m.version)
+    return applied
+
+
+def main(argv=None):
+    from database import Database
+
+    ap = argparse.ArgumentParser(description="Apply or inspect schema migrations.")
+    ap.add_argument("--db", default="trades.db")
+    ap.add_argument("command", nargs="?", choices=["up", "status", "auto-vacuum"], default="up")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    async def go():
+        database = Database(args.db)
+        try:
+            if args.command == "status":
+                done = await applied_versions(database)
+                for m in MIGRATIONS:
+                    print(f"{'✅' if m.version in done else '⏳'} v{m.version:<3} {m.name}")
+            elif args.command == "auto-vacuum":
+                t0 = time.perf_counter()
+                if await convert_auto_vacuum(database):
+                    print(f"✅ auto_vacuum=INCREMENTAL ({time.perf_counter() - t0:.1f}s)")
+                else:
+                    print("ℹ️ Already auto_vacuum=INCREMENTAL.")
+            else:
+                applied = await run_migrations(database)
+                print(f"✅ Applied {len(applied)} migration(s)" if applied else "ℹ️ Schema up to date.")
+        finally:
+            await database.close()
+
+    asyncio.run(go())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+from typing import Any, Dict, Iterable, Tuple
+
+# ------------------------
+# TRADE RECORD
+# ------------------------
+# Column order of the trades table. Mark-to-market fields are also stored in
+# trade_marks while a trade is open (see database.TRADE_SELECT).
+TRADE_COLUMNS: Tuple[str, ...] = (
+    "id", "time", "symbol", "side", "strategy", "entry_price", "qty", "used_usd",
+    "status", "pnl", "sl", "tp", "exit_price", "exit_time", "current_price",
+    "unrealized_pnl", "fees_usd", "highest_price", "trail_active", "trail_sl", "is_partial",
+    "updated_at",
+)
+MARK_COLUMNS: Tuple[str, ...] = ("current_price", "unrealized_pnl", "highest_price")
+BOOL_COLUMNS = frozenset({"trail_active"})  # stored as 1/0
+
+_FLOATS = {
+    "entry_price", "qty", "used_usd", "pnl", "sl", "tp", "exit_price", "current_price",
+    "unrealized_pnl", "fees_usd", "highest_price", "trail_sl",
+}
+DEFAULTS: Dict[str, Any] = {
+    c: 0.0 if c in _FLOATS else None for c in TRADE_COLUMNS
+}
+DEFAULTS.update(side="buy", status="open", trail_active=False, is_partial=0)
+
+
+class Trade:
+    """
+    One trades row. Slotted (no per-instance __dict__) and dirty-tracked:
+    every attribute assignment is remembered so save paths write only the
+    columns that changed. Decoding from SQLite rows skips tracking.
+    """
+    __slots__ = TRADE_COLUMNS + ("_dirty",)
+
+    def __init__(self, **fields: Any):
+        unknown = set(fields) - set(TRADE_COLUMNS)
+        if unknown:
+            raise TypeError(f"Unknown trade fields: {sorted(unknown)}")
+        setter = object.__setattr__
+        for c in TRADE_COLUMNS:
+            setter(self, c, fields.get(c, DEFAULTS[c]))
+        setter(self, "_dirty", set())
+
+    def __setattr__(self, name: str, value: Any):
+        object.__setattr__(self, name, value)
+        self._dirty.add(name)
+
+    def __repr__(self):
+        return f"Trade(id={self.id!r}, symbol={self.symbol!r}, strategy={self.strategy!r}, status={self.status!r})"
+
+    @classmethod
+    def from_row(cls, row) -> "Trade":
+        """Decode an sqlite Row (any subset of TRADE_COLUMNS, missing -> defaults)."""
+        t = cls.__new__(cls)
+        setter = object.__setattr__
+        values = dict(zip(row.keys(), row))
+        for c in TRADE_COLUMNS:
+            v = values.get(c, DEFAULTS[c])
+            if v is None and c in _FLOATS:
+                v = 0.0
+            setter(t, c, v)
+        setter(t, "trail_active", bool(t.trail_active))
+        setter(t, "_dirty", set())
+        return t
+
+    # ------------------
+    # DIRTY TRACKING
+    # ------------------
+    def dirty(self) -> Dict[str, Any]:
+        return {c: getattr(self, c) for c in self._dirty}
+
+    def clear_dirty(self):
+        self._dirty.clear()
+
+    def apply(self, updates: Dict[str, Any], track: bool = True):
+        for k, v in updates.items():
+            if k not in DEFAULTS:
+                raise AttributeError(f"Unknown trade field: {k}")
+            if track:
+                setattr(self, k, v)
+            else:
+                object.__setattr__(self, k, v)
+
+    def copy(self) -> "Trade":
+        t = Trade.__new__(Trade)
+        setter = object.__setattr__
+        for c in TRADE_COLUMNS:
+            setter(t, c, getattr(self, c))
+        setter(t, "_dirty", set(self._dirty))
+        return t
+
+    # ------------------
+    # SERIALIZATION
+    # ------------------
+    def to_dict(self) -> Dict[str, Any]:
+        """API shape (same keys as the old dict rows)."""
+        return {c: getattr(self, c) for c in TRADE_COLUMNS}
+
+    def to_db(self) -> Tuple[Tuple[str, ...], list]:
+        """(columns, values) for an INSERT, booleans as 1/0."""
+        return TRADE_COLUMNS, [db_value(c, getattr(self, c)) for c in TRADE_COLUMNS]
+
+
+def db_value(column: str, value: Any) -> Any:
+    if column in BOOL_COLUMNS:
+        return 1 if value else 0
+    return value
+
+
+def to_dicts(trades: Iterable[Trade]):
+    return [t.to_dict() for t in trades]
@@ -1,21 +1,47 @@
-
-import sqlite3
+import sys
 import pandas as pd
 import numpy as np
 
-def optimize():
-    conn = sqlite3.connect('trades_vps.db')
-    df = pd.read_sql_query("SELECT * FROM trades WHERE status = 'closed'", conn)
+from analytics import load_trades
+from logic.exits import build_windows, resolve_exits, EXIT_TP, EXIT_SL, EXIT_OPEN
+
+MAX_HOLD_MS = 8 * 3600 * 1000  # Mirrors MAX_HOLD_SECONDS in main.py
+
+def load_intrabar_windows(df):
+    """
+    Fetch/load 1m candles for every trade and build the candle matrices
+    used by the exit resolver. Candles are cached on disk (see candle_store.py).
+    """
+    import ccxt
+    from candle_store import CandleStore
+
+    store = CandleStore(exchange=ccxt.binance())
+    entry_ms = df['time'].astype('int64')  # datetime64[ms] -> epoch ms
+    df = df.assign(entry_ms=entry_ms.values)
+
+    width = MAX_HOLD_MS // 60000 + 1
+    n = len(df)
+    ts = np.full((n, width), -1.0)
+    high = np.full((n, width), -np.inf)
+    low = np.full((n, width), np.inf)
+    close = np.full((n, width), np.nan)
+
+    for symbol, grp in df.groupby('symbol'):
+        starts = grp['entry_ms'].to_numpy()
+        ends = starts + MAX_HOLD_MS
+        candles = store.get(symbol, starts.min() - 60000, ends.max())
+        rows = df.index.get_indexer(grp.index)
+        ts[rows], high[rows], low[rows], close[rows] = build_windows(candles, starts, ends, width)
+
+    return df['entry_ms'].to_numpy(), ts, high, low, close
+
+def optimize(intrabar=False):
+    df = load_trades('trades_vps.db', status='closed')
     
     if df.empty:
         print("No trades found.")
         return
 
-    # Convert columns
-    cols = ['entry_price', 'highest_price', 'sl', 'pnl', 'fees_usd', 'qty', 'side']
-    for c in cols:
-        df[c] = pd.to_numeric(df[c], errors='coerce').fillna(0)
-
     # Base Constants
     total_fees = df['fees_usd'].sum()
     
@@ -24,8 +50,21 @@ def optimize():
     # Grid Search: TP Multipliers
     tp_range = [0.5, 0.8, 1.0, 1.2, 1.5, 1.8, 2.0, 2.2, 2.5, 3.0, 4.0, 5.0, 6.0, 8.0, 10.0]
 
-    print(f"--- 🚀 STRATEGY OPTIMIZER (Grid Search) ---")
-    print(f"Analyzing {len(df)} Trades...")
+    # Only trades with a defined risk can be simulated (win rate keeps the full count)
+    total_count = len(df)
+    df = df[(df['entry_price'] - df['sl']).abs() > 0].reset_index(drop=True)
+    entry = df['entry_price'].to_numpy()
+    sl = df['sl'].to_numpy()
+    qty = df['qty'].to_numpy()
+    risk_per_share = np.abs(entry - sl)
+    risk_usd = risk_per_share * qty
+
+    if intrabar:
+        print("Loading 1m candles for intrabar exit resolution...")
+        entry_ms, w_ts, w_high, w_low, w_close = load_intrabar_windows(df)
+
+    print(f"--- 🚀 STRATEGY OPTIMIZER (Grid Search{' | Intrabar 1m' if intrabar else ''}) ---")
+    print(f"Analyzing {total_count} Trades...")
     print(f"Fees Fixed Cost: ${total_fees:.2f}")
     print("-" * 60)
     print(f"{'TP (R)':<8} {'Win Rate':<10} {'Gross PnL':<12} {'Net PnL':<12} {'Trade Count':<12}")
@@ -35,49 +74,30 @@ def optimize():
     best_rr = 0
 
     for rr in tp_range:
-        sim_wins = 0
-        sim_losses = 0
-        gross_pnl = 0.0
-        
-        for _, row in df.iterrows():
-            entry = row['entry_price']
-            sl = row['sl']
-            qty = row['qty']
-            side = str(row.get('side', 'BUY')).upper()
-            
-            if side == 'NAN' or side == 'NONE': side = 'BUY'
-            
-            # Calculate Risk
-            risk_per_share = abs(entry - sl)
-            if risk_per_share == 0: continue
-            
-            risk_usd = risk_per_share * qty
-            
-            # Determine Target Price
-            if side == 'SELL':
-                target_price = entry - (rr * risk_per_share)
-                # For SHORT: Win if LOW <= Target
-                # Note: DB might not have 'lowest_price'. Assuming Long-only or 'highest_price' represents favorable excursion
-                # If bot is Long/Short, we need logic. 
-                # Assuming Long-Only for simplicity based on previous chats (trend following)
-                # If Short supported, we need correct column.
-                # Let's assume Long for now.
-                target_price = entry + (rr * risk_per_share) # Fallback to Long logic check
-            else:
-                target_price = entry + (rr * risk_per_share)
-            
-            # Check Outcome
-            if row['highest_price'] >= target_price:
-                # Win
-                sim_wins += 1
-                gross_pnl += (risk_usd * rr)
-            else:
-                # Loss
-                sim_losses += 1
-                gross_pnl -= risk_usd
-        
+        # Long-only bot: target is always above entry
+        target_price = entry + (rr * risk_per_share)
+
+        if intrabar:
+            # [INTRABAR] True SL/TP hit order. Same-candle hits count as losses.
+            res = resolve_exits(w_ts, w_high, w_low, w_close, sl, target_price, entry_ms=entry_ms)
+            outcome = res['outcome']
+            time_exit_pnl = np.nan_to_num((res['exit_price'] - entry) * qty)
+            pnl = np.where(outcome == EXIT_TP, risk_usd * rr,
+                           np.where(outcome == EXIT_OPEN, time_exit_pnl, -risk_usd))
+            sim_wins = int((outcome == EXIT_TP).sum())
+            sim_losses = int((outcome == EXIT_SL).sum())
+            sim_time = int((outcome == EXIT_OPEN).sum())
+        else:
+            # Optimistic: a win whenever the high ever reached the target
+            hit = df['highest_price'].to_numpy() >= target_price
+            pnl = np.where(hit, risk_usd * rr, -risk_usd)
+            sim_wins = int(hit.sum())
+            sim_losses = len(df) - sim_wins
+            sim_time = 0
+
+        gross_pnl = float(pnl.sum())
         net_pnl = gross_pnl - total_fees
-        win_rate = (sim_wins / len(df)) * 100
+        win_rate = (sim_wins / total_count) * 100
         
         results.append((rr, net_pnl))
         
@@ -85,7 +105,8 @@ def optimize():
         pnl_str = f"${net_pnl:.2f}"
         if net_pnl > 0: pnl_str = f"+{pnl_str}"
         
-        print(f"{rr:<8} {win_rate:>6.1f}%    ${gross_pnl:>9.2f}   {pnl_str:>10}   {sim_wins}W/{sim_losses}L")
+        count_str = f"{sim_wins}W/{sim_losses}L" + (f"/{sim_time}T" if sim_time else "")
+        print(f"{rr:<8} {win_rate:>6.1f}%    ${gross_pnl:>9.2f}   {pnl_str:>10}   {count_str}")
         
         if net_pnl > best_pnl:
             best_pnl = net_pnl
@@ -96,4 +117,4 @@ def optimize():
     print(f"💰 POTENTIAL NET PROFIT: ${best_pnl:.2f}")
 
 if __name__ == "__main__":
-    optimize()
+    optimize(intrabar="--intrabar" in sys.argv)
@@ -0,0 +1,223 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from database import db as default_db
+from models import Trade, MARK_COLUMNS
+
+logger = logging.getLogger("TradingBot")
+
+Bookkeeping = Optional[Callable[[], Awaitable[Any]]]
+
+
+class PositionBook:
+    """
+    Authoritative in-memory book of OPEN trades, indexed by id and symbol.
+
+    Reads are dict lookups. Every mutation is applied to memory immediately and
+    queued for persistence; a single writer task applies the queue to SQLite in
+    order. Each mutation returns a future that resolves once it is committed,
+    so callers that need durability (opens, closes) await it and hot-path
+    callers (watcher marks) don't.
+
+    Mark-to-market fields (current_price, unrealized_pnl, highest_price) are
+    kept by mark() in memory only and flushed to trade_marks in one
+    executemany by flush_marks(); the trades row changes only on lifecycle
+    events (open, merge, partial sell, close).
+
+    `bookkeeping` callbacks (e.g. register_trade_close) and the
+    trade_aggregates update of a close run inside the same db.transaction()
+    as the row write. The DB stays the recovery source:
+    load() rebuilds the book from it at startup or after a failed write.
+    """
+
+    def __init__(self, database=default_db):
+        self.db = database
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._by_symbol: Dict[str, set] = defaultdict(set)
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._needs_reload = False
+        self._dirty_marks: set = set()
+        self.version = 0  # any change, marks included
+
+    # ------------------
+    # LIFECYCLE
+    # ------------------
+    async def load(self):
+        """(Re)build the book from the DB."""
+        trades = await self.db.get_open_trades()
+        self._by_id = {t.id: t for t in trades}
+        self._dirty_marks = set()
+        self._by_symbol = defaultdict(set)
+        for t in trades:
+            self._by_symbol[t.symbol].add(t.id)
+        self.version += 1
+        if self._writer_task is None or self._writer_task.done():
+            self._queue = asyncio.Queue()
+            self._writer_task = asyncio.create_task(self._writer())
+        logger.info(f"📒 [BOOK] Loaded {len(trades)} open positions")
+
+    async def flush(self):
+        """Wait until every queued mutation is persisted."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def stop(self):
+        if self._writer_task is not None and not self._writer_task.done():
+            self.flush_marks()
+            await self.flush()
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+            self._writer_task = None
+
+    async def _writer(self):
+        while True:
+            job, fut = await self._queue.get()
+            try:
+                await job()
+                if not fut.done():
+                    fut.set_result(None)
+            except Exception as e:
+                logger.error(f"❌ [BOOK] Persist failed: {e}")
+                self._needs_reload = True
+                if not fut.done():
+                    fut.set_exception(e)
+            finally:
+                self._queue.task_done()
+
+            # Memory may be ahead of a write that failed: resync once drained
+            if self._needs_reload and self._queue.empty():
+                self._needs_reload = False
+                try:
+                    await self.load()
+                except Exception as e:
+                    logger.error(f"❌ [BOOK] Reload failed: {e}")
+
+    def _submit(self, job) -> asyncio.Future:
+        fut = asyncio.get_running_loop().create_future()
+        # Nobody may await the future: don't warn about unretrieved exceptions
+        fut.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._queue.put_nowait((job, fut))
+        self.version += 1
+        return fut
+
+    # ------------------
+    # READS (copies: callers mutate them freely and save() the diff)
+    # ------------------
+    def open_trades(self) -> List[Trade]:
+        return [t.copy() for t in self._by_id.values()]
+
+    def get(self, trade_id: str) -> Optional[Trade]:
+        t = self._by_id.get(trade_id)
+        return t.copy() if t else None
+
+    def by_symbol(self, symbol: str) -> List[Trade]:
+        return [self._by_id[i].copy() for i in self._by_symbol.get(symbol, ())]
+
+    def find(self, symbol: str, strategy: str) -> Optional[Trade]:
+        for i in self._by_symbol.get(symbol, ()):
+            if self._by_id[i].strategy == strategy:
+                return self._by_id[i].copy()
+        return None
+
+    def count(self) -> int:
+        return len(self._by_id)
+
+    def holds(self, symbol: str) -> bool:
+        return bool(self._by_symbol.get(symbol))
+
+    def exposure(self, symbol: str) -> float:
+        return sum(self._by_id[i].used_usd for i in self._by_symbol.get(symbol, ()))
+
+    # ------------------
+    # MUTATIONS
+    # ------------------
+    def open(self, trade: Trade, bookkeeping: Bookkeeping = None) -> asyncio.Future:
+        trade = trade.copy()
+        trade.clear_dirty()
+        self._by_id[trade.id] = trade
+        self._by_symbol[trade.symbol].add(trade.id)
+        row = trade.copy()
+
+        async def job():
+            async with self.db.transaction():
+                await self.db.add_trade(row)
+                if bookkeeping:
+                    await bookkeeping()
+        return self._submit(job)
+
+    def update(self, trade_id: str, updates: Dict[str, Any], bookkeeping: Bookkeeping = None) -> asyncio.Future:
+        if trade_id in self._by_id:
+            self._by_id[trade_id].apply(updates, track=False)
+        updates = dict(updates)
+
+        async def job():
+            async with self.db.transaction():
+                await self.db.update_trade(trade_id, updates)
+                if bookkeeping:
+                    await bookkeeping()
+        return self._submit(job)
+
+    def save(self, trade: Trade, bookkeeping: Bookkeeping = None) -> asyncio.Future:
+        """Persist only the fields changed on `trade` (a copy from a read)."""
+        updates = trade.dirty()
+        trade.clear_dirty()
+        return self.update(trade.id, updates, bookkeeping)
+
+    def mark(self, trade_id: str, marks: Dict[str, Any]):
+        """Memory-only mark-to-market update; persisted by the next flush_marks()."""
+        trade = self._by_id.get(trade_id)
+        if trade is None:
+            return
+        trade.apply(marks, track=False)
+        self._dirty_marks.add(trade_id)
+        self.version += 1
+
+    def flush_marks(self, updated_at: Optional[str] = None) -> Optional[asyncio.Future]:
+        """Queue one executemany with every mark changed since the last flush."""
+        if not self._dirty_marks:
+            return None
+        updated_at = updated_at or datetime.now(timezone.utc).isoformat()
+        rows = [
+            (i, *(getattr(self._by_id[i], c) for c in MARK_COLUMNS), updated_at)
+            for i in self._dirty_marks if i in self._by_id
+        ]
+        self._dirty_marks = set()
+        return self._submit(lambda: self.db.upsert_marks(rows))
+
+    def close(self, trade_id: str, updates: Dict[str, Any], bookkeeping: Bookkeeping = None) -> asyncio.Future:
+        """Remove from the book and persist the closing updates (status='closed' implied)."""
+        trade = self._by_id.pop(trade_id, None)
+        self._dirty_marks.discard(trade_id)
+        agg = None  # not known as open: don't count it twice
+        if trade is not None:
+            ids = self._by_symbol.get(trade.symbol)
+            if ids is not None:
+                ids.discard(trade_id)
+                if not ids:
+                    del self._by_symbol[trade.symbol]
+            # Final marks go into the audit row; the side-table row is dropped
+            updates = {**{c: getattr(trade, c) for c in MARK_COLUMNS}, **updates}
+            trade.apply(updates, track=False)
+            agg = (trade.strategy, (trade.exit_time or "")[:10], trade.pnl or 0.0, trade.fees_usd or 0.0)
+        updates = {**updates, "status": "closed"}
+
+        async def job():
+            async with self.db.transaction():
+                await self.db.update_trade(trade_id, updates)
+                await self.db.delete_mark(trade_id)
+                if agg:
+                    await self.db.add_closed_trade_aggregates(*agg)
+                if bookkeeping:
+                    await bookkeeping()
+        return self._submit(job)
+
+
+book = PositionBook()
@@ -1,29 +1,17 @@
-
-import pexpect
 import sys
 
+from export import main as export_main
+
 HOST = "89.116.34.45"
-USER = "root"
-PASS = "Saklain@061524"
-REMOTE_DB = "/opt/gitco/alpha-trader-bot/trades.db"
+API_URL = f"http://{HOST}/api"
 LOCAL_DB = "trades_vps_check.db"
 
 def pull_db():
-    print(f"📥 Pulling {REMOTE_DB} from {HOST}...")
-    cmd = f"scp {USER}@{HOST}:{REMOTE_DB} {LOCAL_DB}"
-    
-    child = pexpect.spawn(cmd, encoding='utf-8', timeout=60)
-    i = child.expect(['password:', 'continue connecting', pexpect.EOF, pexpect.TIMEOUT])
-    
-    if i == 0:
-        child.sendline(PASS)
-    elif i == 1:
-        child.sendline('yes')
-        child.expect('password:')
-        child.sendline(PASS)
-        
-    child.expect(pexpect.EOF)
-    print("✅ Database pulled as trades_vps_check.db")
+    # [PERF] Incremental: first run downloads an online-backup snapshot, later
+    # runs only fetch trades changed since the last pull (see export.py).
+    # Credentials: EXPORT_USER / EXPORT_PASSWORD (admin) or EXPORT_TOKEN.
+    print(f"📥 Updating {LOCAL_DB} from {API_URL}...")
+    return export_main(["pull", "--url", API_URL, "--replica", LOCAL_DB] + sys.argv[1:])
 
 if __name__ == "__main__":
-    pull_db()
+    sys.exit(pull_db())
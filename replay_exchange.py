@@ -0,0 +1,169 @@
+import numpy as np
+import ccxt.async_support as ccxt
+
+MINUTE_MS = 60 * 1000
+TIMEFRAME_MS = {
+    "1m": MINUTE_MS, "5m": 5 * MINUTE_MS, "15m": 15 * MINUTE_MS,
+    "1h": 60 * MINUTE_MS, "4h": 240 * MINUTE_MS, "1d": 1440 * MINUTE_MS,
+}
+
+
+class ReplayExchange:
+    """
+    Drop-in for the ccxt async exchange used by main.py, served from recorded
+    1m candles at the current (virtual) clock time.
+
+    Only candles that have fully CLOSED at clock time are visible, so there
+    is no look-ahead: ticker 'last' is the close of the latest completed
+    minute and higher timeframes are resampled from completed minutes.
+    Market orders fill at 'last' with a flat fee and settle into an in-memory
+    wallet, so live-mode code paths (fetch_balance, orders) work too.
+    """
+
+    def __init__(self, candles, clock, quote_balance=200.0, fee_pct=0.001):
+        # candles: {symbol: (n, 6) array [ts, open, high, low, close, vol]}
+        self.candles = {s: np.asarray(a, dtype=np.float64) for s, a in candles.items() if len(a)}
+        self.clock = clock
+        self.fee_pct = fee_pct
+        self.balances = {"USDT": float(quote_balance)}
+        self.orders = {}
+        self.rateLimit = 0
+        self.markets = {
+            s: {"symbol": s, "limits": {"cost": {"min": 5.0}}}
+            for s in self.candles
+        }
+        self.stats = {"calls": 0}
+
+    # ------------------
+    # MARKET DATA
+    # ------------------
+    def _visible(self, symbol):
+        arr = self.candles.get(symbol)
+        if arr is None:
+            raise KeyError(f"ReplayExchange: no data for {symbol}")
+        now_ms = self.clock.time() * 1000
+        # A 1m candle is closed once ts + 1m <= now
+        end = np.searchsorted(arr[:, 0], now_ms - MINUTE_MS, side="right")
+        return arr[:end]
+
+    def _ticker(self, symbol):
+        arr = self._visible(symbol)
+        if not len(arr):
+            return None
+        last = float(arr[-1, 4])
+        day_ago = np.searchsorted(arr[:, 0], arr[-1, 0] - 24 * 60 * MINUTE_MS, side="left")
+        ref = float(arr[day_ago, 4])
+        pct = ((last - ref) / ref) * 100 if ref else 0.0
+        return {
+            "symbol": symbol, "last": last, "close": last,
+            "percentage": pct, "timestamp": int(arr[-1, 0]) + MINUTE_MS,
+        }
+
+    async def load_markets(self):
+        return self.markets
+
+    async def fetch_ticker(self, symbol):
+        self.stats["calls"] += 1
+        t = self._ticker(symbol)
+        if t is None:
+            raise ValueError(f"ReplayExchange: no closed candles for {symbol} yet")
+        return t
+
+    async def fetch_tickers(self, symbols=None):
+        self.stats["calls"] += 1
+        out = {}
+        for s in (symbols or self.candles):
+            t = self._ticker(s)
+            if t is not None:
+                out[s] = t
+        return out
+
+    async def fetch_ohlcv(self, symbol, timeframe="1m", since=None, limit=100, params=None):
+        self.stats["calls"] += 1
+        arr = self._visible(symbol)
+        tf_ms = TIMEFRAME_MS[timeframe]
+        if not len(arr):
+            return []
+
+        last_bucket = int(arr[-1, 0] // tf_ms)
+        first_bucket = last_bucket - int(limit) + 1
+        if since is not None:
+            first_bucket = max(first_bucket, int(since // tf_ms))
+        arr = arr[np.searchsorted(arr[:, 0], first_bucket * tf_ms, side="left"):]
+        if not len(arr):
+            return []
+
+        buckets = (arr[:, 0] // tf_ms).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(arr)] - 1
+        out = np.column_stack([
+            buckets[starts] * tf_ms,
+            arr[starts, 1],
+            np.maximum.reduceat(arr[:, 2], starts),
+            np.minimum.reduceat(arr[:, 3], starts),
+            arr[ends, 4],
+            np.add.reduceat(arr[:, 5], starts),
+        ])
+        return [[int(r[0]), float(r[1]), float(r[2]), float(r[3]), float(r[4]), float(r[5])] for r in out]
+
+    # ------------------
+    # ACCOUNT / ORDERS
+    # ------------------
+    async def fetch_balance(self):
+        self.stats["calls"] += 1
+        bal = {"total": {}, "free": {}}
+        for coin, qty in self.balances.items():
+            bal[coin] = {"free": qty, "used": 0.0, "total": qty}
+            bal["total"][coin] = qty
+            bal["free"][coin] = qty
+        return bal
+
+    def amount_to_precision(self, symbol, amount):
+        return f"{float(amount):.8f}"
+
+    def _fill(self, symbol, side, amount, params=None):
+        price = self._ticker(symbol)["last"]
+        base, quote = symbol.split("/")
+        amount = float(amount)
+        cost = amount * price
+        fee = cost * self.fee_pct
+        if side == "buy":
+            self.balances[quote] = self.balances.get(quote, 0.0) - cost - fee
+            self.balances[base] = self.balances.get(base, 0.0) + amount
+        else:
+            self.balances[base] = self.balances.get(base, 0.0) - amount
+            self.balances[quote] = self.balances.get(quote, 0.0) + cost - fee
+
+        order_id = str(len(self.orders) + 1)
+        order = {
+            "id": order_id, "symbol": symbol, "side": side, "status": "closed",
+            "price": price, "average": price, "filled": amount, "cost": cost,
+            "fee": {"cost": fee, "currency": quote},
+            "timestamp": int(self.clock.time() * 1000),
+            "clientOrderId": (params or {}).get("newClientOrderId"),
+        }
+        self.orders[order_id] = order
+        return order
+
+    async def create_market_buy_order(self, symbol, amount, params=None):
+        self.stats["calls"] += 1
+        return self._fill(symbol, "buy", amount, params)
+
+    async def create_market_sell_order(self, symbol, amount, params=None):
+        self.stats["calls"] += 1
+        return self._fill(symbol, "sell", amount, params)
+
+    async def fetch_order(self, order_id, symbol=None, params=None):
+        self.stats["calls"] += 1
+        cid = (params or {}).get("origClientOrderId")
+        if cid is not None:
+            for order in self.orders.values():
+                if order["clientOrderId"] == cid:
+                    return order
+            raise ccxt.OrderNotFound(f"ReplayExchange: unknown clientOrderId {cid}")
+        if order_id not in self.orders:
+            raise ccxt.OrderNotFound(f"ReplayExchange: unknown order {order_id}")
+        return self.orders[order_id]
+
+    async def close(self):
+        pass
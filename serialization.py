@@ -0,0 +1,248 @@
+import os
+import json
+import gzip
+from typing import Any, Dict, Iterable, List, Optional
+
+import anyio
+import numpy as np
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback: same output, slower
+    orjson = None
+try:
+    import brotli
+except ImportError:  # br is only offered when installed (pip install brotli)
+    brotli = None
+
+# ------------------------
+# RESPONSE SERIALIZATION
+# ------------------------
+# dumps(): orjson when installed (numpy scalars/arrays and datetimes natively,
+# NaN/inf -> null). FastJSONResponse renders with it; hot endpoints return
+# json_response(...) directly and skip FastAPI's jsonable_encoder pass.
+# Floats are rounded per field (FIELD_DECIMALS, override with
+# JSON_DECIMALS="pnl=2,qty=6"); fields not listed are sent as is.
+# CompressionMiddleware negotiates br (if brotli is installed) or gzip per
+# request for complete JSON/text bodies >= COMPRESS_MIN_BYTES.
+
+_PRICE, _QTY, _USD, _PCT = 10, 8, 4, 2
+FIELD_DECIMALS: Dict[str, int] = {
+    # trade rows / positions
+    "entry_price": _PRICE, "sl": _PRICE, "tp": _PRICE, "exit_price": _PRICE,
+    "current_price": _PRICE, "highest_price": _PRICE, "trail_sl": _PRICE,
+    "qty": _QTY,
+    "used_usd": _USD, "pnl": _USD, "unrealized_pnl": _USD, "fees_usd": _USD,
+    # stats
+    "balance": _USD, "locked": _USD, "free": _USD, "total_pnl": _USD, "realized_pnl": _USD,
+    "win_rate": _PCT,
+    # chart series
+    "open": _PRICE, "high": _PRICE, "low": _PRICE, "close": _PRICE,
+    "ema5": _PRICE, "ema20": _PRICE, "ema50": _PRICE, "rsi": _PCT,
+}
+for _item in filter(None, os.environ.get("JSON_DECIMALS", "").split(",")):
+    _field, _, _dec = _item.partition("=")
+    FIELD_DECIMALS[_field.strip()] = int(_dec)
+
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "1024"))
+COMPRESS_THREAD_BYTES = 256 * 1024  # larger bodies are compressed off the event loop
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4  # ~gzip size at a fraction of max-quality CPU
+
+
+def _default(o):
+    try:
+        return float(o)  # numpy scalars, Decimal
+    except (TypeError, ValueError):
+        return str(o)
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default, option=_OPTIONS)
+else:
+    def _clean(obj):
+        if hasattr(obj, "tolist"):  # numpy arrays and scalars
+            obj = obj.tolist()
+        if isinstance(obj, float):
+            return None if obj != obj or obj in (float("inf"), float("-inf")) else obj
+        if isinstance(obj, dict):
+            return {k: _clean(v) for k, v in obj.items()}
+        if isinstance(obj, (list, tuple)):
+            return [_clean(v) for v in obj]
+        return obj
+
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(_clean(obj), default=_default, separators=(",", ":")).encode()
+
+
+def decimals(field: str) -> Optional[int]:
+    return FIELD_DECIMALS.get(field)
+
+
+def round_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    dec = FIELD_DECIMALS
+    return {k: round(v, dec[k]) if type(v) is float and k in dec else v for k, v in row.items()}
+
+
+def round_rows(rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """round_row for a list, one column at a time (np.round: ~4x faster than round() per value)."""
+    out = [dict(r) for r in rows]
+    if not out:
+        return out
+    present = set().union(*out)
+    for k, dec in FIELD_DECIMALS.items():
+        if k not in present:
+            continue
+        values = [r.get(k) for r in out]
+        is_float = [type(v) is float for v in values]
+        if not any(is_float):
+            continue
+        rounded = np.round(np.array([v if f else 0.0 for v, f in zip(values, is_float)], dtype=np.float64), dec)
+        for r, v, f in zip(out, rounded.tolist(), is_float):
+            if f:
+                r[k] = v
+    return out
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def json_response(content: Any, headers_from=None, status_code: int = 200) -> FastJSONResponse:
+    """
+    Response that skips jsonable_encoder. `headers_from`: FastAPI's injected
+    Response, whose headers (ETag, X-Next-Cursor, ...) would otherwise be lost.
+    """
+    resp = FastJSONResponse(content, status_code)
+    if headers_from is not None:
+        for k, v in headers_from.headers.items():
+            if k not in ("content-length", "content-type"):
+                resp.headers[k] = v
+    return resp
+
+
+# ------------------------
+# COMPRESSION
+# ------------------------
+_SUFFIX = {"br": "-br", "gzip": "-gz"}
+_COMPRESSIBLE = ("application/json", "text/")
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """'br' or 'gzip' (server preference order) if the client accepts it."""
+    offered = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        offered[name.strip()] = q
+    for enc in (("br",) if brotli is not None else ()) + ("gzip",):
+        if offered.get(enc, offered.get("*", 0.0)) > 0:
+            return enc
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def _unsuffixed(tag: str) -> str:
+    for suffix in _SUFFIX.values():
+        if tag.endswith(suffix + '"'):
+            return tag[:-len(suffix) - 1] + '"'
+    return tag
+
+
+def _unsuffix_list(value: bytes) -> bytes:
+    return ", ".join(_unsuffixed(t.strip()) for t in value.decode("latin-1").split(",")).encode("latin-1")
+
+
+class CompressionMiddleware:
+    """
+    Compresses complete (non-streaming) JSON/text responses. Streaming bodies
+    (SSE, file downloads) pass through untouched. The ETag of a compressed
+    body gets an encoding suffix (a different representation); the suffix is
+    stripped from If-None-Match before the app compares versions, and a 304
+    carries the suffixed validator the client sent back.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        request_headers = Headers(scope=scope)
+        encoding = negotiate(request_headers.get("accept-encoding", ""))
+
+        # App tag -> the suffixed tag the client holds (restored on a 304)
+        held = {}
+        for tag in request_headers.get("if-none-match", "").split(","):
+            tag = tag.strip()
+            base = _unsuffixed(tag)
+            if base != tag:
+                held[base.removeprefix("W/")] = tag.removeprefix("W/")
+        if held:
+            scope = dict(scope)
+            scope["headers"] = [
+                (k, _unsuffix_list(v) if k == b"if-none-match" else v)
+                for k, v in scope["headers"]
+            ]
+        if encoding is None and not held:
+            return await self.app(scope, receive, send)
+
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                if message["status"] == 304 or encoding is None:
+                    headers = MutableHeaders(raw=message["headers"])
+                    etag = headers.get("etag")
+                    if message["status"] == 304 and etag in held:
+                        headers["etag"] = held[etag]
+                    await send(message)
+                    return
+                start = message
+                return
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            if (message.get("more_body", False) or "content-encoding" in headers
+                    or len(body) < self.minimum_size
+                    or not headers.get("content-type", "").startswith(_COMPRESSIBLE)
+                    or headers.get("content-type", "").startswith("text/event-stream")):
+                await send(start)
+                start = None
+                await send(message)
+                return
+            if len(body) >= COMPRESS_THREAD_BYTES:
+                body = await anyio.to_thread.run_sync(compress, body, encoding)
+            else:
+                body = compress(body, encoding)
+            headers["content-encoding"] = encoding
+            headers["content-length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and etag.endswith('"'):
+                headers["etag"] = etag[:-1] + _SUFFIX[encoding] + '"'
+            await send(start)
+            start = None
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,127 @@
+import sys
+import time
+import argparse
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from analytics import load_trades
+from logic.constraints import Signal, simulate, DEFAULT_LIMITS
+
+MAX_HOLD_SEC = 8 * 3600  # Mirrors MAX_HOLD_SECONDS in main.py
+
+
+def signals_from_db(path):
+    """Historical trades as candidate signals (actual entries and exits)."""
+    df = load_trades(path, status='closed')
+    df = df[df['exit_time'].notna() & (df['entry_price'] > 0) & (df['exit_price'] > 0)]
+    entry_ts = df['time'].astype('int64') / 1e3  # datetime64[ms] -> epoch s
+    exit_ts = df['exit_time'].astype('int64') / 1e3
+    return [
+        Signal(float(a), s, st, float(e), float(sl), float(b), float(x))
+        for a, s, st, e, sl, b, x in zip(entry_ts, df['symbol'], df['strategy'],
+                                         df['entry_price'], df['sl'], exit_ts, df['exit_price'])
+    ]
+
+
+def signals_from_journal(days):
+    """
+    Every journaled signal (executed or not), with the exit resolved on 1m
+    candles: TP at 1:2 like execute_buy, SL, or time exit after MAX_HOLD.
+    """
+    import ccxt
+    from journal import journal
+    from candle_store import CandleStore
+    from logic.exits import build_windows, resolve_exits
+
+    raw = []
+    for day in days:
+        path = f"{journal.root}/{day}.jrnl"
+        for cid, _, _ in journal.iter_frames(path):
+            cycle = journal.load_cycle(cid, day)
+            for scan in cycle["scans"]:
+                if not scan["signal"]:
+                    continue
+                entry = scan["ohlcv_entry"][-1][4]  # live candle close ~ fill price
+                sl = scan["diagnostic"]["sl"]
+                raw.append((cid / 1000, scan["symbol"], f"SMC_{scan['diagnostic'].get('trigger', 'SMC')}", entry, sl))
+
+    store = CandleStore(exchange=ccxt.binance())
+    signals = []
+    df = pd.DataFrame(raw, columns=["ts", "symbol", "strategy", "entry", "sl"])
+    for symbol, grp in df.groupby("symbol"):
+        starts = (grp["ts"].to_numpy() * 1000)
+        ends = starts + MAX_HOLD_SEC * 1000
+        candles = store.get(symbol, starts.min() - 60000, ends.max())
+        w_ts, high, low, close = build_windows(candles, starts, ends)
+        entry = grp["entry"].to_numpy()
+        sl = grp["sl"].to_numpy()
+        res = resolve_exits(w_ts, high, low, close, sl, entry + 2 * (entry - sl), entry_ms=starts)
+        for row, ex_ts, ex_px in zip(grp.itertuples(), res["exit_ts"], res["exit_price"]):
+            if ex_ts < 0 or np.isnan(ex_px):
+                continue
+            signals.append(Signal(row.ts, symbol, row.strategy, row.entry, row.sl, ex_ts / 1000 + 60, float(ex_px)))
+    return signals
+
+
+def synthetic_signals(n, days=365, n_symbols=150, seed=1):
+    """Benchmark input: n random signals spread over `days`."""
+    rng = np.random.default_rng(seed)
+    ts = np.sort(rng.uniform(0, days * 86400, n)) + 1_767_225_600
+    sym = rng.integers(0, n_symbols, n)
+    entry = rng.uniform(0.5, 50, n)
+    sl = entry * (1 - rng.uniform(0.005, 0.05, n))
+    win = rng.random(n) < 0.4
+    exit_px = np.where(win, entry + 2 * (entry - sl), sl)
+    exit_ts = ts + rng.uniform(300, MAX_HOLD_SEC, n)
+    return [Signal(float(a), f"S{b}/USDT", "SMC_5EMA_Reclaim", float(c), float(d), float(e), float(f))
+            for a, b, c, d, e, f in zip(ts, sym, entry, sl, exit_ts, exit_px)]
+
+
+def parse_grid(items):
+    """['max_trades_per_day=10,20', 'trade_usd=20,40'] -> list of override dicts."""
+    axes = []
+    for item in items:
+        key, _, vals = item.partition("=")
+        if key not in DEFAULT_LIMITS:
+            raise SystemExit(f"Unknown limit '{key}'. Known: {', '.join(DEFAULT_LIMITS)}")
+        cast = type(DEFAULT_LIMITS[key])
+        axes.append([(key, cast(v)) for v in vals.split(",")])
+    return [dict(combo) for combo in itertools.product(*axes)] if axes else [{}]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Evaluate portfolio limits over a stream of signals.")
+    src = ap.add_mutually_exclusive_group()
+    src.add_argument("--db", default="trades_vps.db", help="Trades DB used as signal source")
+    src.add_argument("--journal", nargs="+", metavar="YYYY-MM-DD", help="Journal days used as signal source")
+    src.add_argument("--bench", type=int, metavar="N", help="N synthetic signals over one year")
+    ap.add_argument("grid", nargs="*", help="limit=v1,v2 ... (cartesian product)")
+    args = ap.parse_args()
+
+    if args.bench:
+        signals = synthetic_signals(args.bench)
+    elif args.journal:
+        signals = signals_from_journal(args.journal)
+    else:
+        signals = signals_from_db(args.db)
+
+    if not signals:
+        print("No signals found.")
+        return
+
+    print(f"--- 🧮 CONSTRAINT SIMULATOR ({len(signals)} signals) ---")
+    print(f"{'Overrides':<40} {'Taken':>6} {'Net PnL':>10} {'MaxOpen':>8} {'ms':>7}  Top rejections")
+    print("-" * 100)
+    for overrides in parse_grid(args.grid):
+        t0 = time.perf_counter()
+        res = simulate(signals, **overrides)
+        ms = (time.perf_counter() - t0) * 1000
+        label = ", ".join(f"{k}={v}" for k, v in overrides.items()) or "(current limits)"
+        top = ", ".join(f"{k}:{v}" for k, v in res["rejected"].most_common(3))
+        print(f"{label:<40} {res['accepted']:>6} {res['realized_pnl']:>10.2f} {res['max_open']:>8} {ms:>7.1f}  {top}")
+
+
+if __name__ == "__main__":
+    main()
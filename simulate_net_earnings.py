@@ -1,9 +1,9 @@
 
-import sqlite3
 import pandas as pd
 import ccxt
 import time
-from datetime import datetime
+
+from analytics import load_trades
 
 def calculate_rsi(series, period=14):
     delta = series.diff()
@@ -16,9 +16,8 @@ def calculate_ema(series, span):
     return series.ewm(span=span, adjust=False).mean()
 
 def simulate_net_earnings():
-    conn = sqlite3.connect('trades_new.db')
     # filtered by closed to match user's "158 trades" context
-    df_trades = pd.read_sql_query("SELECT * FROM trades WHERE status='closed'", conn)
+    df_trades = load_trades('trades_new.db', status='closed')
 
     if df_trades.empty:
         print("No closed trades found.")
@@ -34,17 +33,9 @@ def simulate_net_earnings():
     for i, row in df_trades.iterrows():
         try:
             symbol = row['symbol']
-            entry_time_str = row['time']
             pnl = float(row['pnl'])
             fees = float(row['fees_usd'])
-            
-            # Parse time
-            try:
-                dt_entry = datetime.fromisoformat(entry_time_str)
-            except:
-                dt_entry = datetime.strptime(entry_time_str, "%Y-%m-%dT%H:%M:%S.%f")
-            
-            ts_entry = int(dt_entry.timestamp() * 1000)
+            ts_entry = int(row['time'].value // 10**6)  # epoch ms
             
             # Fetch context
             since = ts_entry - (24 * 60 * 60 * 1000)
@@ -1,20 +1,15 @@
 
-import sqlite3
 import pandas as pd
 
+from analytics import load_trades
+
 def simulate():
-    conn = sqlite3.connect('trades_vps.db')
-    df = pd.read_sql_query("SELECT * FROM trades WHERE status = 'closed'", conn)
+    df = load_trades('trades_vps.db', status='closed')
     
     if df.empty:
         print("No trades data.")
         return
 
-    # Convert columns
-    cols = ['entry_price', 'exit_price', 'sl', 'tp', 'highest_price', 'pnl', 'fees_usd', 'qty']
-    for c in cols:
-        df[c] = pd.to_numeric(df[c], errors='coerce').fillna(0)
-
     # Simulation Variables
     sim_wins = 0
     sim_losses = 0
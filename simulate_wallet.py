@@ -1,11 +1,11 @@
 
-import sqlite3
 import pandas as pd
 from datetime import datetime
 
+from analytics import load_trades
+
 def simulate_wallet():
-    conn = sqlite3.connect('trades_vps.db')
-    df = pd.read_sql_query("SELECT * FROM trades WHERE status = 'closed'", conn)
+    df = load_trades('trades_vps.db', status='closed')
     
     if df.empty:
         print("No trades found.")
@@ -20,11 +20,10 @@ def simulate_wallet():
     
     for i, row in df.iterrows():
         try:
-            # Parse times
-            # Format in DB examples: "2026-01-19T15:56:53.109269+00:00"
-            # We need to handle potential parsing errors
-            t_entry = row['time'] # String format
+            # datetime64[ms] UTC from the snapshot (NaT when missing)
+            t_entry = row['time']
             t_exit = row['exit_time']
+            if pd.isna(t_entry) or pd.isna(t_exit): continue
             
             # Simple unique ID
             tid = row['id']
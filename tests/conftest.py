@@ -0,0 +1,56 @@
+import os
+import sys
+import logging
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+ADMIN = {"username": "test", "role": "admin"}
+
+
+@pytest.fixture(scope="session", autouse=True)
+def log_file(tmp_path_factory):
+    """main.py logs at import: keep server.log out of the repo root."""
+    path = tmp_path_factory.mktemp("log") / "server.log"
+    os.environ.setdefault("LOG_FILE", str(path))
+    return path
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    """
+    main.py against a throwaway trades.db, auth bypassed. Startup tasks are not
+    launched. Every singleton holding a Database is rebuilt on the temp file
+    (as timewarp.py does) and the log goes to tmp_path, never to the repo.
+    """
+    import main
+    from database import Database
+    from positions import PositionBook
+    from equity_series import EquitySeries
+    from maintenance import DbMaintenance
+    from valuation import Valuation
+
+    database = Database(str(tmp_path / "trades.db"))
+    monkeypatch.setattr(main, "db", database)
+    monkeypatch.setattr(main, "book", PositionBook(database))
+    monkeypatch.setattr(main, "equity_series", EquitySeries(database))
+    monkeypatch.setattr(main, "db_maintenance", DbMaintenance(database))
+    monkeypatch.setattr(main, "valuation", Valuation(main.ex_live))
+    log_handler = logging.FileHandler(tmp_path / "server.log", delay=True)
+    main.logger.removeHandler(main.file_handler)
+    main.logger.addHandler(log_handler)
+    main.app.dependency_overrides[main.get_current_user] = lambda: ADMIN
+    yield main
+    main.app.dependency_overrides.clear()
+    main.logger.removeHandler(log_handler)
+    main.logger.addHandler(main.file_handler)
+    log_handler.close()
+
+
+def client(main, **headers):
+    import httpx
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test", headers=headers)
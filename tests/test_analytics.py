@@ -0,0 +1,63 @@
+import mmap
+import time
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+
+from analytics import load_trades
+
+TIMES = {
+    "naive": "2026-01-19T20:00:45.221867",               # datetime.now() rows
+    "utc": "2026-01-19T20:00:45.221867+00:00",
+    "offset": "2026-01-19T22:00:45.221867+02:00",
+    "junk": "not a time",
+}
+
+
+def test_naive_times_are_local(tmp_path, monkeypatch):
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    try:
+        db = str(tmp_path / "trades.db")
+        with sqlite3.connect(db) as conn:
+            conn.execute("CREATE TABLE trades (id TEXT PRIMARY KEY, symbol TEXT, time TEXT)")
+            conn.executemany("INSERT INTO trades VALUES (?, 'BTC/USDT', ?)", TIMES.items())
+        df = load_trades(db, root=str(tmp_path / "analytics")).set_index("id")
+        ms = df["time"].to_numpy("datetime64[ms]")
+        got = dict(zip(df.index, ms.astype("int64")))
+        for k in ("naive", "utc", "offset"):
+            assert got[k] == int(datetime.fromisoformat(TIMES[k]).timestamp() * 1000)
+        assert got["naive"] - got["utc"] == 5 * 3600 * 1000  # EST, not UTC
+        assert np.isnat(ms[list(df.index).index("junk")])
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+
+def mapped(arr):
+    while arr is not None and not isinstance(arr, (np.memmap, mmap.mmap)):
+        arr = getattr(arr, "base", None)
+    return arr is not None
+
+
+def test_columns_are_memory_mapped_copy_on_write(tmp_path):
+    db = str(tmp_path / "trades.db")
+    with sqlite3.connect(db) as conn:
+        conn.execute("CREATE TABLE trades (id TEXT PRIMARY KEY, symbol TEXT, status TEXT, pnl REAL, time TEXT,"
+                     " updated_at TEXT)")
+        conn.executemany("INSERT INTO trades VALUES (?, ?, ?, ?, ?, ?)",
+                         [(f"t{i}", f"C{i % 300}/USDT", "closed", 1.0, "2026-01-01T00:00:00+00:00",
+                           f"2026-01-01T00:00:{i % 60:02d}+00:00") for i in range(400)])
+    root = str(tmp_path / "analytics")
+    df = load_trades(db, root=root)
+    assert mapped(df["pnl"].to_numpy()) and mapped(df["time"].to_numpy())
+    assert mapped(df["symbol"].array.codes) and df["symbol"].cat.codes.dtype == np.int16  # 300 symbols
+    df.loc[0, "pnl"] = 99.0  # private to this process: the snapshot is unchanged
+    assert load_trades(db, root=root, refresh_first=False)["pnl"].iloc[0] == 1.0
+
+    # Incremental refresh adds categories past the stored code width
+    with sqlite3.connect(db) as conn:
+        conn.execute("UPDATE trades SET symbol = 'NEW/USDT', updated_at = '2026-01-02T00:00:00+00:00' WHERE id = 't0'")
+    df = load_trades(db, root=root).set_index("id")
+    assert df.loc["t0", "symbol"] == "NEW/USDT" and df.loc["t299", "symbol"] == "C299/USDT"
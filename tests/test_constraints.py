@@ -0,0 +1,33 @@
+import time
+
+import pytest
+
+from logic.constraints import Signal, simulate
+
+
+@pytest.fixture
+def karachi(monkeypatch):
+    """Host clock at UTC+5 (no DST): local midnight is 19:00 UTC."""
+    monkeypatch.setenv("TZ", "Asia/Karachi")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def sig(ts, symbol, strategy="SMC_A"):
+    return Signal(ts, symbol, strategy, 100.0, 99.0, ts + 60, 101.0)
+
+
+def test_daily_limit_resets_at_local_midnight(karachi):
+    d = 1_767_225_600.0  # 2026-01-01 00:00 UTC
+    signals = [sig(d + 18.5 * 3600, "SOL/USDT"), sig(d + 19.5 * 3600, "ETH/USDT")]  # 23:30 / 00:30 local
+    out = simulate(signals, max_trades_per_day=1)
+    assert out["accepted"] == 2  # same UTC day, different local days (main.daily_reset_if_needed)
+
+
+def test_symbol_cooldown_matches_like_main(karachi):
+    d = 1_767_225_600.0
+    out = simulate([sig(d, "METH/USDT"), sig(d + 600, "ETH/USDT", "SMC_B")])
+    # main.can_place_trade: `symbol in key` over "strategy:symbol" keys
+    assert out["accepted"] == 1 and out["rejected"]["symbol_cooldown"] == 1
@@ -0,0 +1,71 @@
+import asyncio
+
+from conftest import client
+from models import Trade
+
+
+def trade(i):
+    return Trade(id=f"t{i:03d}", time=f"2026-01-01T00:{i:02d}:00+00:00", symbol="SOL/USDT",
+                 strategy="SMC_5EMA_Reclaim", entry_price=100.0 + i, qty=0.1, used_usd=10.0)
+
+
+def with_db(api, scenario):
+    async def go():
+        await api.db.init_db()
+        try:
+            return await scenario(api.db)
+        finally:
+            await api.db.close()
+    return asyncio.run(go())
+
+
+def test_etag_304_uncompressed(api):
+    async def scenario(db):
+        for i in range(20):
+            await db.add_trade(trade(i))
+        async with client(api, **{"Accept-Encoding": "identity"}) as c:
+            r = await c.get("/trades")
+            tag = r.headers["etag"]
+            assert r.status_code == 200 and "content-encoding" not in r.headers
+            assert not tag.endswith(('-gz"', '-br"'))
+            r = await c.get("/trades", headers={"If-None-Match": tag})
+            assert r.status_code == 304 and r.headers["etag"] == tag
+            await db.add_trade(trade(20))
+            r = await c.get("/trades", headers={"If-None-Match": tag})
+            assert r.status_code == 200 and r.headers["etag"] != tag
+
+    with_db(api, scenario)
+
+
+def test_etag_304_gzip_keeps_suffixed_validator(api):
+    async def scenario(db):
+        for i in range(20):
+            await db.add_trade(trade(i))
+        async with client(api, **{"Accept-Encoding": "gzip"}) as c:
+            r = await c.get("/trades")
+            tag = r.headers["etag"]
+            assert r.status_code == 200 and r.headers["content-encoding"] == "gzip"
+            assert tag.endswith('-gz"') and len(r.json()) == 20
+            # Revalidation sees the same validator the 200 carried
+            r = await c.get("/trades", headers={"If-None-Match": tag})
+            assert r.status_code == 304 and r.headers["etag"] == tag
+            r = await c.get("/trades", headers={"If-None-Match": f'"other", W/{tag}'})
+            assert r.status_code == 304 and r.headers["etag"] == tag
+            await db.add_trade(trade(20))
+            r = await c.get("/trades", headers={"If-None-Match": tag})
+            assert r.status_code == 200 and r.headers["etag"] != tag and r.headers["etag"].endswith('-gz"')
+
+    with_db(api, scenario)
+
+
+def test_small_bodies_are_not_suffixed(api):
+    async def scenario(db):
+        await db.add_trade(trade(0))
+        async with client(api, **{"Accept-Encoding": "gzip"}) as c:
+            r = await c.get("/trades", params={"fields": "id"})
+            tag = r.headers["etag"]
+            assert "content-encoding" not in r.headers and not tag.endswith('-gz"')
+            r = await c.get("/trades", params={"fields": "id"}, headers={"If-None-Match": tag})
+            assert r.status_code == 304 and r.headers["etag"] == tag
+
+    with_db(api, scenario)
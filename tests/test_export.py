@@ -0,0 +1,79 @@
+import gzip
+import asyncio
+import sqlite3
+
+import requests
+
+import export
+from database import Database
+from models import Trade
+from test_migrations import baseline_db
+
+
+class FakeResponse:
+    def __init__(self, content=b"", headers=None):
+        self.content = content
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, size):
+        for i in range(0, len(self.content), size):
+            yield self.content[i:i + size]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeApi:
+    """The two /export endpoints pull() calls, served from a snapshot file."""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.headers = {}
+        self.snapshots = 0
+
+    def get(self, url, stream=False, params=None, timeout=None):
+        if url.endswith("/export/snapshot"):
+            self.snapshots += 1
+            with open(self.snapshot, "rb") as fh:
+                return FakeResponse(fh.read())
+        return FakeResponse(gzip.compress(b""))
+
+
+def server_snapshot(tmp_path):
+    async def go():
+        database = Database(str(tmp_path / "server.db"))
+        try:
+            await database.init_db()
+            await database.add_trade(Trade(id="live1", time="2026-02-01T00:00:00+00:00", symbol="SOL/USDT",
+                                           status="open", updated_at="2026-02-01T00:00:00+00:00"))
+            await database.backup_to(str(tmp_path / "snapshot.db"))
+        finally:
+            await database.close()
+
+    asyncio.run(go())
+    return tmp_path / "snapshot.db"
+
+
+def test_pull_replaces_a_stale_copy(tmp_path, monkeypatch):
+    api = FakeApi(server_snapshot(tmp_path))
+    monkeypatch.setattr(requests, "Session", lambda: api)
+    replica = str(tmp_path / "trades_vps_check.db")
+    baseline_db(replica)  # an old scp copy: no updated_at, no replica_state
+    assert export.needs_snapshot(replica)
+
+    first = export.pull("http://bot/api", replica, token="t")
+    second = export.pull("http://bot/api", replica, token="t")
+    assert first["snapshot_bytes"] > 0 and second["snapshot_bytes"] == 0 and api.snapshots == 1
+    assert not export.needs_snapshot(replica)
+    con = sqlite3.connect(replica)
+    try:
+        ids = [r[0] for r in con.execute("SELECT id FROM trades")]
+    finally:
+        con.close()
+    assert ids == ["live1"]
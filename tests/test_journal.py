@@ -0,0 +1,60 @@
+import asyncio
+import threading
+
+from clock import VirtualClock
+from journal import DecisionJournal, CycleRecorder
+
+
+def test_commit_encodes_off_the_event_loop(tmp_path, monkeypatch):
+    threads = []
+    encode = CycleRecorder.encode
+
+    def spy(self):
+        threads.append(threading.current_thread())
+        return encode(self)
+
+    monkeypatch.setattr(CycleRecorder, "encode", spy)
+    j = DecisionJournal(root=str(tmp_path), enabled=True)
+
+    async def go():
+        rec = j.begin_cycle(1_767_225_600)
+        rec.record("executed", ["SOL/USDT"])
+        return await j.commit(rec)
+
+    assert asyncio.run(go()) > 0
+    assert threads and threads[0] is not threading.main_thread()
+    assert j.load_cycle(1_767_225_600_000)["executed"] == ["SOL/USDT"]
+
+
+class TickersDown:
+    markets = {}
+
+    async def fetch_tickers(self, symbols=None):
+        raise ConnectionError("exchange unreachable")
+
+    async def fetch_balance(self):
+        return {"USDT": {"free": 0.0}, "total": {}}
+
+
+def test_cycle_that_stops_early_is_journaled(api, tmp_path, monkeypatch):
+    start = 1_767_225_600.0  # 2026-01-01 UTC
+    vclock = VirtualClock(start, participants=1, until_ts=start + 5)
+    j = DecisionJournal(root=str(tmp_path / "journal"), enabled=True)
+    monkeypatch.setattr(api, "clock", vclock)
+    monkeypatch.setattr(api, "journal", j)
+    monkeypatch.setattr(api, "ex_live", TickersDown())
+
+    async def go():
+        await api.db.init_db()
+        try:
+            await api.db.set_state_keys({"auto_trading": True, "kill_switch": False})
+            task = asyncio.create_task(api.strategy_loop())
+            await vclock.finished.wait()
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        finally:
+            await api.db.close()
+
+    asyncio.run(go())
+    cycle = j.load_cycle(int(start * 1000))
+    assert cycle["outcome"] == "fetch_tickers failed: exchange unreachable"
@@ -0,0 +1,90 @@
+import json
+import asyncio
+
+from conftest import client
+from live import LiveHub
+from models import Trade
+
+
+def test_trades_topic_follows_commits_not_queued_writes(api, monkeypatch):
+    main, db = api, api.db
+    hub = LiveHub()
+    monkeypatch.setattr(main, "live_hub", hub)
+    monkeypatch.setitem(main.live_versions, "trades", -1)
+
+    async def go():
+        await db.init_db()
+        await main.book.load()
+        try:
+            stream = hub.stream()
+            await stream.__anext__()  # registered
+            # Hold the writer: the open stays queued in the book while we publish
+            async with db._write_lock:
+                main.book.open(Trade(id="t1", time="2026-01-01T00:00:00+00:00", symbol="SOL/USDT",
+                                     strategy="SMC_5EMA_Reclaim", entry_price=100.0, qty=0.1, used_usd=10.0))
+                await main.publish_live()
+                before = [r["id"] for r in hub.state["trades"]]
+            await main.book.flush()
+            await main.publish_live()
+            after = [r["id"] for r in hub.state["trades"]]
+            await stream.aclose()
+            return before, after
+        finally:
+            await main.book.stop()
+            await db.close()
+
+    before, after = asyncio.run(go())
+    assert before == [] and after == ["t1"]
+
+
+async def frames(stream, n):
+    return [await stream.__anext__() for _ in range(n)]
+
+
+def test_stream_registers_on_first_iteration():
+    async def go():
+        hub = LiveHub()
+        never_sent = hub.stream()  # e.g. the client aborted before the first chunk
+        assert not hub.has_clients
+        stream = hub.stream()
+        _, hello, _ = await frames(stream, 3)
+        client = json.loads(hello.split("data: ")[1])["client"]
+        assert list(hub.clients) == [client]
+        await stream.aclose()
+        assert not hub.has_clients
+        await never_sent.aclose()
+
+    asyncio.run(go())
+
+
+def test_charts_ride_on_one_stream():
+    async def go():
+        hub = LiveHub()
+        a, b = hub.stream(), hub.stream()
+        ids = [json.loads((await frames(s, 3))[1].split("data: ")[1])["client"] for s in (a, b)]
+        hub.publish("candle:BTC/USDT@15m", {"candles": [{"time": 1, "close": 1.0}]})
+        assert all(c.queue.empty() for c in hub.clients.values())
+
+        # Subscribing sends the chart's current candles to that client only
+        assert hub.subscribe(ids[0], ["BTC/USDT@15m"])
+        assert '"replace"' in await a.__anext__()
+        hub.publish("candle:BTC/USDT@15m", {"candles": [{"time": 1, "close": 2.0}]})
+        assert "candle:BTC/USDT@15m" in await a.__anext__()
+        assert hub.clients[ids[1]].queue.empty()
+        assert hub.chart_subscriptions() == {"BTC/USDT@15m"}
+
+        assert hub.subscribe(ids[0], [])
+        assert hub.chart_subscriptions() == set()
+        assert not hub.subscribe("gone", ["BTC/USDT@15m"])
+        await a.aclose()
+        await b.aclose()
+
+    asyncio.run(go())
+
+
+def test_chart_subscribe_needs_an_open_stream(api):
+    async def go():
+        async with client(api) as c:
+            return (await c.post("/stream/charts", params={"client": "gone", "charts": "BTC/USDT@15m"})).status_code
+
+    assert asyncio.run(go()) == 404
@@ -0,0 +1,59 @@
+import asyncio
+
+from maintenance import DbMaintenance, MAINTENANCE_INTERVAL, WAL_PASSIVE_BYTES
+
+
+class FakeDb:
+    """WAL above the PASSIVE threshold, no writes: every tick is 'quiet'."""
+
+    def __init__(self, drained=True, pinned=False):
+        self.drained = drained
+        self.pinned = pinned  # a reader holds an old snapshot: TRUNCATE stays busy
+        self.wal = WAL_PASSIVE_BYTES + 1
+        self.last_write_at = 0.0
+        self.modes = []
+
+    def wal_bytes(self):
+        return self.wal
+
+    async def wal_checkpoint(self, mode):
+        self.modes.append(mode)
+        if mode == "TRUNCATE":
+            if self.pinned:
+                return {"busy": 1, "log_pages": 100, "checkpointed_pages": 100}
+            self.wal = 0
+            return {"busy": 0, "log_pages": 0, "checkpointed_pages": 0}
+        return {"busy": 0, "log_pages": 100, "checkpointed_pages": 100 if self.drained else 40}
+
+    async def prune_order_events(self, cutoff):
+        return 0
+
+    async def storage_stats(self):
+        return {"auto_vacuum": 2, "freelist_count": 0}
+
+    async def optimize(self):
+        pass
+
+
+def run_ticks(db, seconds=600):
+    async def go():
+        maint = DbMaintenance(db)
+        for now in range(1000, 1000 + seconds, MAINTENANCE_INTERVAL):
+            await maint.tick(float(now))
+    asyncio.run(go())
+    return db.modes
+
+
+def test_truncate_only_after_a_draining_passive():
+    modes = run_ticks(FakeDb(drained=False))
+    assert "TRUNCATE" not in modes
+
+    modes = run_ticks(FakeDb(drained=True))
+    assert modes == ["PASSIVE", "TRUNCATE"]  # WAL reset: nothing left to do
+
+
+def test_busy_truncate_backs_off():
+    modes = run_ticks(FakeDb(pinned=True))
+    ticks = 600 // MAINTENANCE_INTERVAL
+    # Backoff doubles from one interval: 0, 15, 45, 105, 225, 465 s
+    assert modes.count("TRUNCATE") <= 6 < ticks
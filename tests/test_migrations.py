@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import sqlite3
+from datetime import datetime, timezone
+
+import pytest
+
+from database import Database
+from maintenance import DbMaintenance
+from migrations import MIGRATIONS, applied_versions, convert_auto_vacuum, run_migrations
+
+
+# trades.db as the pre-migration init_db left it (before exit_time / is_partial)
+BASELINE_SCHEMA = """
+CREATE TABLE trades (
+    id TEXT PRIMARY KEY, time TEXT, symbol TEXT, side TEXT, strategy TEXT,
+    entry_price REAL, qty REAL, used_usd REAL, status TEXT, pnl REAL, sl REAL, tp REAL,
+    exit_price REAL, current_price REAL, unrealized_pnl REAL, fees_usd REAL,
+    highest_price REAL, trail_active INTEGER, trail_sl REAL
+);
+CREATE TABLE users (username TEXT PRIMARY KEY, hashed_password TEXT, role TEXT DEFAULT 'viewer', is_active INTEGER DEFAULT 1);
+CREATE TABLE app_state (key TEXT PRIMARY KEY, value TEXT);
+"""
+BASELINE_SCHEMA_COLUMNS = (
+    "id", "time", "symbol", "side", "strategy", "entry_price", "qty", "used_usd", "status", "pnl", "sl", "tp",
+    "exit_price", "current_price", "unrealized_pnl", "fees_usd", "highest_price", "trail_active", "trail_sl",
+)
+
+
+def baseline_db(path, n_closed=5, n_open=2):
+    con = sqlite3.connect(path)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.executescript(BASELINE_SCHEMA)
+    rows = []
+    for i in range(n_closed + n_open):
+        closed = i < n_closed
+        rows.append((f"t{i}", f"2026-01-0{1 + i % 5}T10:00:0{i % 10}+00:00", "SOL/USDT", "buy", "SMC_5EMA_Reclaim",
+                     100.0, 0.1, 10.0, "closed" if closed else "open", (i - 2) * 0.5 if closed else 0.0,
+                     98.0, 104.0, 101.0 if closed else None, None, None, 0.02, 101.0, 0, 0.0))
+    con.executemany(f"INSERT INTO trades VALUES ({','.join('?' * 19)})", rows)
+    con.execute("INSERT INTO app_state VALUES ('trade_usd', '20.0')")
+    con.commit()
+    con.close()
+    return rows
+
+
+def pragma(path, name):
+    con = sqlite3.connect(path)
+    try:
+        return con.execute(f"PRAGMA {name}").fetchone()[0]
+    finally:
+        con.close()
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def migrate(path):
+    database = Database(str(path))
+    try:
+        await database.init_db()
+        return await applied_versions(database)
+    finally:
+        await database.close()
+
+
+def test_new_file_is_incremental(tmp_path):
+    path = tmp_path / "fresh.db"
+    assert run(migrate(path)) == {m.version for m in MIGRATIONS}
+    assert pragma(path, "auto_vacuum") == 2
+
+
+def test_chain_on_baseline_db(tmp_path):
+    path = tmp_path / "trades.db"
+    rows = baseline_db(path)
+
+    async def go():
+        database = Database(str(path))
+        try:
+            # Small chunks: the backfills span several commits
+            applied = await run_migrations(database, chunk=2)
+            await database.init_db()  # second boot: nothing left to apply
+            return applied, await applied_versions(database)
+        finally:
+            await database.close()
+
+    applied, versions = run(go())
+    assert applied == [m.version for m in MIGRATIONS]
+    assert versions == {m.version for m in MIGRATIONS}
+
+    con = sqlite3.connect(path)
+    con.row_factory = sqlite3.Row
+    try:
+        trades = {r["id"]: r for r in con.execute("SELECT * FROM trades")}
+        aggregates = {(r["scope"], r["key"]): tuple(r)[2:] for r in con.execute("SELECT * FROM trade_aggregates")}
+        tables = {r[0] for r in con.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'index')")}
+        state = con.execute("SELECT value FROM app_state WHERE key = 'trade_usd'").fetchone()[0]
+        pending = con.execute("SELECT COUNT(*) FROM schema_backfill").fetchone()[0]
+    finally:
+        con.close()
+
+    # Existing rows survive untouched; new columns get their defaults / backfill
+    assert len(trades) == len(rows)
+    for row in rows:
+        t = trades[row[0]]
+        assert tuple(t[c] for c in BASELINE_SCHEMA_COLUMNS) == row
+        assert t["exit_time"] is None and t["is_partial"] == 0
+        assert t["updated_at"] == row[1]  # COALESCE(exit_time, time)
+    # pnl of the closed rows: -1.0, -0.5, 0.0, 0.5, 1.0; fees 0.02 each. The
+    # zero-pnl close adds its fees but is not a trade
+    closed = (4, 2, 2, 0.0, pytest.approx(0.1))
+    assert aggregates == {("all", ""): closed, ("strategy", "SMC_5EMA_Reclaim"): closed, ("day", ""): closed}
+    assert {"trade_marks", "equity_series", "order_events", "idx_trades_open",
+            "idx_trades_time_id", "idx_trades_updated_at", "idx_order_events_cid"} <= tables
+    assert state == "20.0" and pending == 0
+
+
+def test_boot_does_not_vacuum_existing_file(tmp_path, caplog):
+    path = tmp_path / "trades.db"
+    baseline_db(path)
+    with caplog.at_level(logging.WARNING, logger="TradingBot"):
+        assert run(migrate(path)) == {m.version for m in MIGRATIONS}
+    # A VACUUM on a connection that set auto_vacuum=INCREMENTAL would have converted it
+    assert pragma(path, "auto_vacuum") == 0
+    assert "migrations.py auto-vacuum" in caplog.text
+
+
+def test_offline_conversion(tmp_path):
+    path = tmp_path / "trades.db"
+    baseline_db(path)
+
+    async def go():
+        database = Database(str(path))
+        try:
+            await database.init_db()
+            first = await convert_auto_vacuum(database)
+            second = await convert_auto_vacuum(database)
+            count = (await database.get_trades_page(limit=100))
+            return first, second, count
+        finally:
+            await database.close()
+
+    first, second, page = run(go())
+    assert (first, second) == (True, False)
+    assert pragma(path, "auto_vacuum") == 2
+    assert len(page) == 7
+
+
+def test_maintenance_skips_vacuum_when_not_incremental(tmp_path, caplog):
+    path = tmp_path / "trades.db"
+    baseline_db(path)
+
+    async def go():
+        database = Database(str(path))
+        try:
+            await database.init_db()
+            maint = DbMaintenance(database)
+            now = datetime(2026, 6, 1, tzinfo=timezone.utc).timestamp()
+            return [await maint.housekeeping(now), await maint.housekeeping(now)]
+        finally:
+            await database.close()
+
+    with caplog.at_level(logging.WARNING, logger="TradingBot"):
+        passes = run(go())
+    assert all(p["vacuum_pages_freed"] == 0 for p in passes)
+    assert caplog.text.count("skipping vacuum steps") == 1
+
+
+def test_archive_follows_trades_schema(tmp_path):
+    path = tmp_path / "trades.db"
+    baseline_db(path)
+    # An archive left by the old CREATE TABLE AS: no key, no updated_at, one id twice
+    archive = tmp_path / "trades_archive.db"
+    con = sqlite3.connect(archive)
+    con.executescript(BASELINE_SCHEMA.replace("id TEXT PRIMARY KEY", "id TEXT").split(";")[0])
+    con.executemany(f"INSERT INTO trades (id, time, status, pnl) VALUES (?, ?, 'closed', ?)",
+                    [("a1", "2025-01-01T00:00:00+00:00", 1.0), ("a1", "2025-01-01T00:00:00+00:00", 2.0)])
+    con.commit()
+    con.close()
+
+    async def go():
+        database = Database(str(path))
+        try:
+            await database.init_db()
+            # A later migration adds a column to trades
+            async with database._write() as conn:
+                await conn.execute("UPDATE trades SET exit_time = time WHERE status = 'closed'")
+                await conn.execute("ALTER TABLE trades ADD COLUMN venue TEXT DEFAULT 'binance'")
+            now = datetime(2026, 6, 1, tzinfo=timezone.utc)
+            moved = await database.archive_closed_trades(30, now=now)
+            # Same ids archived again (e.g. restored from a backup): replaced, not duplicated
+            async with database._write() as conn:
+                await conn.execute("INSERT INTO trades (id, time, status, exit_time, pnl) "
+                                   "VALUES ('t0', '2026-01-01T00:00:00+00:00', 'closed', '2026-01-01T01:00:00+00:00', 9.0)")
+            moved += await database.archive_closed_trades(30, now=now)
+            page = await database.get_trades_page(limit=100, include_archive=True)
+            return moved, page
+        finally:
+            await database.close()
+
+    moved, page = run(go())
+    assert moved == 6
+    con = sqlite3.connect(archive)
+    try:
+        cols = {r[1]: r for r in con.execute("PRAGMA table_info(trades)")}
+        ids = [r[0] for r in con.execute("SELECT id FROM trades ORDER BY id")]
+        t0_pnl = con.execute("SELECT pnl FROM trades WHERE id = 't0'").fetchone()[0]
+        a1_pnl = con.execute("SELECT pnl FROM trades WHERE id = 'a1'").fetchone()[0]
+    finally:
+        con.close()
+    assert cols["id"][5] == 1 and "updated_at" in cols and "venue" in cols
+    assert ids == ["a1", "t0", "t1", "t2", "t3", "t4"]
+    assert (t0_pnl, a1_pnl) == (9.0, 2.0)
+    # Reads of the archive select TRADE_COLUMNS explicitly: they work on the migrated table
+    assert {"a1", "t0"} <= {r["id"] for r in page}
@@ -0,0 +1,52 @@
+import asyncio
+
+from database import Database
+from models import Trade
+from positions import PositionBook
+
+STRATEGY = "SMC_5EMA_Reclaim"
+
+
+def trade(trade_id, **kw):
+    return Trade(id=trade_id, time="2026-01-01T00:00:00+00:00", symbol="SOL/USDT", strategy=STRATEGY,
+                 side="buy", status="open", entry_price=100.0, qty=0.1, used_usd=10.0, current_price=100.0,
+                 unrealized_pnl=0.0, highest_price=100.0, **kw)
+
+
+def with_book(tmp_path, body):
+    async def go():
+        database = Database(str(tmp_path / "trades.db"))
+        await database.init_db()
+        book = PositionBook(database)
+        await book.load()
+        try:
+            return await body(database, book)
+        finally:
+            await book.stop()
+            await database.close()
+
+    return asyncio.run(go())
+
+
+def test_strategy_readers_see_flushed_marks(tmp_path):
+    async def body(database, book):
+        await book.open(trade("t1"))
+        book.mark("t1", {"current_price": 110.0, "unrealized_pnl": 1.0, "highest_price": 110.0})
+        await book.flush_marks()
+        return (await database.get_trades_by_strategy(STRATEGY),
+                await database.get_trades_by_status_symbol_strategy("open", "SOL/USDT", STRATEGY))
+
+    for rows in with_book(tmp_path, body):
+        assert [(t.id, t.current_price, t.unrealized_pnl, t.highest_price) for t in rows] == [("t1", 110.0, 1.0, 110.0)]
+
+
+def test_zero_pnl_closes_are_not_counted(tmp_path):
+    async def body(database, book):
+        for trade_id, pnl in (("win", 1.0), ("loss", -0.5), ("phantom", 0.0)):
+            await book.open(trade(trade_id))
+            await book.close(trade_id, {"pnl": pnl, "fees_usd": 0.01, "exit_time": "2026-01-02T00:00:00+00:00"})
+        return await database.get_aggregates("all", "")
+
+    [row] = with_book(tmp_path, body)
+    assert (row["trades"], row["wins"], row["losses"], row["realized_pnl"]) == (2, 1, 1, 0.5)
+    assert round(row["fees_usd"], 6) == 0.03
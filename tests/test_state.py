@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+
+def test_failed_writes_leave_the_cached_state_alone(api):
+    main, db = api, api.db
+
+    async def go():
+        await db.init_db()
+        try:
+            await db.set_state_keys({"exit_cooldowns": {"AAA/USDT": 1.0}, "last_trade_ts_map": {}})
+
+            # Rolled back transaction: the close's bookkeeping must not leak
+            with pytest.raises(RuntimeError):
+                async with db.transaction():
+                    await main.register_trade_close(5.0, "BBB/USDT")
+                    raise RuntimeError("order failed")
+            assert await db.get_state_key("exit_cooldowns") == {"AAA/USDT": 1.0}
+
+            # Failed commit outside a transaction
+            async def broken_commit():
+                raise RuntimeError("disk I/O error")
+            commit, db._writer.commit = db._writer.commit, broken_commit
+            with pytest.raises(RuntimeError):
+                await main.register_trade_open("BBB/USDT", "s")
+            db._writer.commit = commit
+            assert await db.get_state_key("last_trade_ts_map") == {}
+            assert await db.get_state_key("trades_today", 0) == 0
+
+            # Reads are copies: editing one does not touch the cache
+            (await db.get_state())["exit_cooldowns"]["CCC/USDT"] = 2.0
+            assert await db.get_state_key("exit_cooldowns") == {"AAA/USDT": 1.0}
+
+            await main.register_trade_open("BBB/USDT", "s")
+            assert set(await db.get_state_key("last_trade_ts_map")) == {"s:BBB/USDT"}
+        finally:
+            await db.close()
+
+    asyncio.run(go())
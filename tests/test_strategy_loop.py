@@ -0,0 +1,43 @@
+import asyncio
+
+from clock import VirtualClock
+
+START = 1_767_225_600.0  # 2026-01-01 UTC
+
+
+class NoMarket:
+    markets = {}
+
+    async def fetch_tickers(self, symbols=None):
+        raise ConnectionError("exchange unreachable")
+
+
+def run_loop_for(api, monkeypatch, seconds):
+    vclock = VirtualClock(START, participants=1, until_ts=START + seconds)
+    monkeypatch.setattr(api, "clock", vclock)
+    monkeypatch.setattr(api, "ex_live", NoMarket())
+    monkeypatch.setattr(api.journal, "enabled", False)
+
+    async def go():
+        await api.db.init_db()
+        try:
+            await api.db.set_state_keys({"auto_trading": True, "kill_switch": False})
+            task = asyncio.create_task(api.strategy_loop())
+            await vclock.finished.wait()
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        finally:
+            await api.db.close()
+
+    asyncio.run(go())
+
+
+def test_full_sync_runs_on_the_first_pass(api, monkeypatch):
+    synced = []
+
+    async def sync():
+        synced.append(api.clock.time())
+
+    monkeypatch.setattr(api, "sync_portfolio_with_exchange", sync)
+    run_loop_for(api, monkeypatch, 60)
+    assert synced == [START]
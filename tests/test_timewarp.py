@@ -0,0 +1,40 @@
+import os
+import sys
+import json
+import sqlite3
+import subprocess
+
+from conftest import ROOT
+
+
+def run_timewarp(tmp_path, name):
+    """One seeded synthetic run in a fresh interpreter (main.py keeps module state)."""
+    db_path = tmp_path / f"{name}.db"
+    out = subprocess.run(
+        [sys.executable, os.path.join(ROOT, "timewarp.py"), "--synthetic", "12", "--days", "0.1",
+         "--db", str(db_path), "--json"],
+        cwd=tmp_path, capture_output=True, text=True, timeout=600,
+    )
+    assert out.returncode == 0, out.stderr[-2000:]
+    summary = json.loads(out.stdout.strip().splitlines()[-1])
+    for k in ("wall_seconds", "speedup", "db"):
+        summary.pop(k)
+    # Virtual timestamps are the sensitive part: a clock that jumps while a loop
+    # is mid-cycle shifts entry times and equity buckets before totals change
+    con = sqlite3.connect(db_path)
+    try:
+        trades = con.execute(
+            "SELECT symbol, time, entry_price, qty, status, exit_price, exit_time, pnl FROM trades ORDER BY time, symbol"
+        ).fetchall()
+        equity = con.execute("SELECT * FROM equity_series ORDER BY res, bucket").fetchall()
+    finally:
+        con.close()
+    return summary, trades, equity
+
+
+def test_same_seed_same_result(tmp_path):
+    summary_a, trades_a, equity_a = run_timewarp(tmp_path, "a")
+    summary_b, trades_b, equity_b = run_timewarp(tmp_path, "b")
+    assert summary_a == summary_b
+    assert trades_a == trades_b
+    assert equity_a == equity_b
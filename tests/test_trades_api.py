@@ -0,0 +1,73 @@
+import asyncio
+
+from conftest import client
+from models import Trade
+
+FLUSH_AT = "2026-01-02T10:00:30+00:00"  # one mark flush: every row gets this updated_at
+
+
+def trades(n):
+    return [Trade(id=f"t{i:03d}", time=f"2026-01-01T{i // 60:02d}:{i % 60:02d}:00+00:00", symbol="SOL/USDT",
+                  strategy="SMC_5EMA_Reclaim", entry_price=100.0, qty=0.1, used_usd=10.0, updated_at=FLUSH_AT)
+            for i in range(n)]
+
+
+def test_since_pages_across_equal_updated_at(api):
+    async def go():
+        db = api.db
+        await db.init_db()
+        try:
+            for t in trades(7):
+                await db.add_trade(t)
+            await db.add_trade(Trade(id="old", time="2025-12-31T00:00:00+00:00", updated_at="2026-01-01T00:00:00+00:00"))
+            seen, cursor = [], None
+            async with client(api) as c:
+                for _ in range(10):
+                    params = {"since": "2026-01-02T00:00:00+00:00", "limit": 3}
+                    if cursor:
+                        params["cursor"] = cursor
+                    r = await c.get("/trades", params=params)
+                    assert r.status_code == 200
+                    page = r.json()
+                    if not page:
+                        break
+                    seen += [row["id"] for row in page]
+                    cursor = r.headers["X-Next-Cursor"]
+                    assert r.headers["X-Next-Since"] == FLUSH_AT
+                r = await c.get("/trades", params={"since": "x", "cursor": "not a cursor"})
+                assert r.status_code == 400
+            return seen
+        finally:
+            await db.close()
+
+    assert asyncio.run(go()) == [f"t{i:03d}" for i in range(7)]
+
+
+def test_keyset_pages_cover_all_rows(api):
+    async def go():
+        db = api.db
+        await db.init_db()
+        try:
+            for t in trades(25):
+                await db.add_trade(t)
+            seen, cursor = [], None
+            async with client(api) as c:
+                while True:
+                    r = await c.get("/trades", params={"limit": 10, **({"cursor": cursor} if cursor else {})})
+                    seen += [row["id"] for row in r.json()]
+                    cursor = r.headers.get("X-Next-Cursor")
+                    if not cursor:
+                        break
+            return seen
+        finally:
+            await db.close()
+
+    assert asyncio.run(go()) == [f"t{i:03d}" for i in reversed(range(25))]
+
+
+def test_fixture_keeps_the_real_db_out(api):
+    import database
+
+    for holder in (api.book, api.equity_series, api.db_maintenance):
+        assert holder.db is api.db and holder.db is not database.db
+    assert api.logger.handlers.count(api.file_handler) == 0
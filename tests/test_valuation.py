@@ -0,0 +1,77 @@
+import asyncio
+
+from valuation import Valuation
+
+
+class FakeExchange:
+    markets = {"BTC/USDT": {}, "ETH/USDT": {}, "SOL/USDT": {}}
+
+    def __init__(self):
+        self.calls = 0
+        self.total = {"USDT": 100.0, "BTC": 0.5, "ETH": 2.0, "XYZ": 5.0}  # XYZ: no market
+        self.last = {"BTC/USDT": 100.0, "ETH/USDT": 10.0, "SOL/USDT": 4.0}
+
+    def balance(self):
+        return {"USDT": {"free": self.total["USDT"]}, "total": dict(self.total)}
+
+    async def fetch_balance(self):
+        self.calls += 1
+        return self.balance()
+
+    async def fetch_tickers(self, symbols=None):
+        self.calls += 1
+        assert set(symbols) <= set(self.markets)
+        return {s: {"last": self.last[s]} for s in symbols}
+
+
+def test_served_from_memory_within_the_bound():
+    async def go():
+        ex = FakeExchange()
+        v = Valuation(ex)
+        assert await v.get(0) == (170.0, 100.0) and ex.calls == 2
+        assert await v.get(10) == (170.0, 100.0) and ex.calls == 2
+        # Incremental: qty * (new - old) for held symbols, others ignored
+        v.on_price("BTC/USDT", 110.0)
+        v.on_price("DOGE/USDT", 1.0)
+        assert (await v.get(20))[0] == 175.0 and ex.calls == 2
+        await v.get(31)  # past VALUATION_MAX_AGE
+        assert ex.calls == 4
+        await v.refresh(32, force=True)
+        assert ex.calls == 6
+        # Concurrent stale reads share one refresh
+        await asyncio.gather(*(v.get(100) for _ in range(5)))
+        assert ex.calls == 8
+
+    asyncio.run(go())
+
+
+def test_order_invalidates_balance():
+    async def go():
+        ex = FakeExchange()
+        v = Valuation(ex)
+        await v.get(0)
+        v.invalidate()
+        ex.total["USDT"] = 80.0
+        ex.total["ETH"] = 4.0
+        assert await v.get(1) == (80.0 + 50.0 + 40.0, 80.0)
+
+    asyncio.run(go())
+
+
+def test_new_holding_is_priced_before_serving():
+    async def go():
+        ex = FakeExchange()
+        v = Valuation(ex)
+        await v.get(0)
+        calls = ex.calls
+        # A balance seen elsewhere (portfolio sync) shows a coin not held before
+        ex.total["SOL"] = 10.0
+        v.on_balance(ex.balance(), 1)
+        assert v.is_stale(2)
+        equity, _ = await v.get(2)
+        assert equity == 170.0 + 40.0 and ex.calls == calls + 2
+        # Unpriceable dust that was already held does not force refreshes
+        v.on_balance(ex.balance(), 3)
+        assert not v.is_stale(4)
+
+    asyncio.run(go())
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Time-warp runner: drives the REAL main.py loops (strategy_loop, watcher_loop,
+execute_buy, execute_sell) against recorded 1m candles on a virtual clock.
+
+    python timewarp.py --symbols SOL/USDT,ETH/USDT --start 2026-01-20 --end 2026-01-22
+    python timewarp.py --synthetic 20 --days 2 --json     # seeded data, perf harness
+
+Candles come from candle_store.py (fetched once, then cached on disk).
+Everything is written to a throwaway database, never to trades.db.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+from datetime import datetime, timezone
+
+import numpy as np
+
+DAY_MS = 24 * 3600 * 1000
+WARMUP_MS = 5 * DAY_MS  # 100 x 1h candles for the HTF context
+
+
+def synthetic_candles(n_symbols, start_ms, end_ms, seed=7):
+    """Seeded random-walk 1m candles (deterministic perf/regression input)."""
+    rng = np.random.default_rng(seed)
+    ts = np.arange(start_ms, end_ms, 60000, dtype=np.float64)
+    out = {}
+    for i in range(n_symbols):
+        drift = rng.normal(0.00002, 0.00002)
+        sigma = 0.0006 if i == 0 else 0.0015  # SYN0 becomes a calmer BTC
+        rets = rng.normal(drift, sigma, len(ts))
+        close = 10.0 * (1 + i) * np.exp(np.cumsum(rets))
+        open_ = np.r_[close[0], close[:-1]]
+        spread = np.abs(rng.normal(0, 0.0008, len(ts))) * close
+        high = np.maximum(open_, close) + spread
+        low = np.minimum(open_, close) - spread
+        vol = rng.lognormal(3, 0.5, len(ts))
+        out[f"SYN{i}/USDT"] = np.column_stack([ts, open_, high, low, close, vol])
+    btc = out.pop("SYN0/USDT")
+    out["BTC/USDT"] = btc
+    return out
+
+
+def recorded_candles(symbols, start_ms, end_ms):
+    import ccxt
+    from candle_store import CandleStore
+
+    store = CandleStore(exchange=ccxt.binance())
+    if "BTC/USDT" not in symbols:
+        symbols = symbols + ["BTC/USDT"]
+    return {s: store.get(s, start_ms, end_ms) for s in symbols}
+
+
+async def run(candles, start_ms, end_ms, mode, db_path, verbose=False):
+    import main
+    from clock import VirtualClock
+    from database import Database
+    from positions import PositionBook
+    from equity_series import EquitySeries
+    from maintenance import DbMaintenance
+    from valuation import Valuation
+    from replay_exchange import ReplayExchange
+
+    if not verbose:
+        main.logger.setLevel(logging.WARNING)
+
+    # Every loop startup() launches on clock.sleep must be a participant, or time
+    # jumps while another loop is mid-cycle and runs stop being reproducible
+    vclock = VirtualClock(start_ms / 1000, participants=len(main.CLOCK_LOOPS), until_ts=end_ms / 1000)
+    main.clock = vclock
+    main.ex_live = ReplayExchange(candles, vclock, quote_balance=main.BASE_BALANCE,
+                                  fee_pct=main.COMMISSION_PCT)
+    main.db = Database(db_path, clock=vclock)
+    main.book = PositionBook(main.db)
+    main.equity_series = EquitySeries(main.db)
+    main.db_maintenance = DbMaintenance(main.db)
+    main.valuation = Valuation(main.ex_live)
+
+    wall0 = time.perf_counter()
+    await main.startup()
+    await vclock.finished.wait()
+    wall = time.perf_counter() - wall0
+
+    current = asyncio.current_task()
+    # The book writer stays up so shutdown() can flush pending writes
+    keep = {current, main.book._writer_task}
+    tasks = [t for t in asyncio.all_tasks() if t not in keep]
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    trades = await main.db.get_all_trades_desc(limit=1_000_000)
+    closed = [t for t in trades if t.status == "closed"]
+    await main.shutdown()
+    virtual = (end_ms - start_ms) / 1000
+    return {
+        "mode": mode,
+        "symbols": len(candles),
+        "virtual_hours": round(virtual / 3600, 2),
+        "wall_seconds": round(wall, 3),
+        "speedup": round(virtual / wall, 1) if wall > 0 else None,
+        "exchange_calls": main.ex_live.stats["calls"],
+        "trades_opened": len(trades),
+        "trades_closed": len(closed),
+        "realized_pnl": round(sum(t.pnl for t in closed), 4),
+        "db": db_path,
+    }
+
+
+def parse_day(s):
+    return int(datetime.strptime(s, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def main_cli(argv=None):
+    ap = argparse.ArgumentParser(description="Run the production loops on a virtual clock.")
+    ap.add_argument("--symbols", default="", help="Comma-separated symbols (recorded data)")
+    ap.add_argument("--start", help="UTC day YYYY-MM-DD (recorded data)")
+    ap.add_argument("--end", help="UTC day YYYY-MM-DD, exclusive (recorded data)")
+    ap.add_argument("--synthetic", type=int, default=0, help="Use N seeded synthetic symbols instead")
+    ap.add_argument("--days", type=float, default=1.0, help="Synthetic run length in days")
+    ap.add_argument("--mode", choices=["paper", "live"], default="paper")
+    ap.add_argument("--db", default=None, help="Output DB (default: temp file)")
+    ap.add_argument("--journal", action="store_true", help="Also write the decision journal")
+    ap.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    ap.add_argument("--verbose", action="store_true")
+    args = ap.parse_args(argv)
+
+    if args.synthetic:
+        start_ms = parse_day("2026-01-01")
+        end_ms = start_ms + int(args.days * DAY_MS)
+        candles = synthetic_candles(args.synthetic, start_ms - WARMUP_MS, end_ms)
+    else:
+        if not (args.symbols and args.start and args.end):
+            ap.error("--symbols, --start and --end are required without --synthetic")
+        start_ms, end_ms = parse_day(args.start), parse_day(args.end)
+        symbols = [s.strip() for s in args.symbols.split(",") if s.strip()]
+        candles = recorded_candles(symbols, start_ms - WARMUP_MS, end_ms)
+
+    tmpdir = tempfile.mkdtemp(prefix="timewarp_")
+    db_path = args.db or os.path.join(tmpdir, "timewarp.db")
+
+    # main.py reads these at import time
+    os.environ["TRADE_MODE"] = args.mode
+    os.environ["JOURNAL_ENABLED"] = "1" if args.journal else "0"
+    os.environ.setdefault("JOURNAL_DIR", os.path.join(tmpdir, "journal"))
+
+    summary = asyncio.run(run(candles, start_ms, end_ms, args.mode, db_path, args.verbose))
+    if args.json:
+        print(json.dumps(summary))
+    else:
+        print("--- ⏩ TIME-WARP RUN ---")
+        for k, v in summary.items():
+            print(f"{k:<16} {v}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,149 @@
+import os
+import math
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger("TradingBot")
+
+# ------------------------
+# LIVE VALUATION
+# ------------------------
+# Account equity = free quote balance + every held coin at its last price.
+# Holds the last balance and a price map restricted to the held coins, so a
+# read (/stats, position sizing) is answered from memory while the snapshot
+# is younger than VALUATION_MAX_AGE. Balances and prices the bot fetches
+# anyway are fed in as events (on_balance / on_price / on_tickers) and keep
+# the total current incrementally; only a stale or invalidated snapshot costs
+# a fetch_balance() + fetch_tickers(<held symbols>). Orders invalidate the
+# balance so sizing never uses a pre-fill free amount.
+
+VALUATION_MAX_AGE = float(os.environ.get("VALUATION_MAX_AGE", "30"))  # seconds
+QUOTE = "USDT"
+
+
+def _num(v) -> float:
+    try:
+        v = float(v)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if math.isnan(v) or math.isinf(v) else v
+
+
+class Valuation:
+    def __init__(self, exchange, quote: str = QUOTE):
+        self.exchange = exchange
+        self.quote = quote
+        self.free_quote = 0.0
+        self.holdings: Dict[str, float] = {}  # "COIN/USDT" -> total qty
+        self.prices: Dict[str, float] = {}    # held symbols only
+        self.holdings_usd = 0.0
+        self.balance_at: Optional[float] = None
+        self.prices_at: Optional[float] = None
+        self.version = 0  # bumps when equity or free changes (ETags)
+        self._invalid = True
+        self._lock = asyncio.Lock()
+        self.stats = {"refreshes": 0, "forced": 0, "memory_hits": 0, "price_events": 0, "balance_events": 0}
+
+    @property
+    def equity(self) -> float:
+        return self.free_quote + self.holdings_usd
+
+    def _changed(self):
+        self.version += 1
+
+    # ------------------
+    # EVENTS
+    # ------------------
+    def on_balance(self, balance: Dict[str, Any], now: float):
+        """A fresh ccxt balance (from any fetch_balance the bot made)."""
+        self.free_quote = _num((balance.get(self.quote) or {}).get("free", 0))
+        holdings = {}
+        for coin, qty in (balance.get("total") or {}).items():
+            qty = _num(qty)
+            if coin != self.quote and qty > 0:
+                holdings[f"{coin}/{self.quote}"] = qty
+        added = holdings.keys() - self.holdings.keys()
+        self.holdings = holdings
+        self.prices = {s: p for s, p in self.prices.items() if s in holdings}
+        if any(s not in self.prices for s in added):
+            # A newly held coin has no price yet: stale until the next refresh
+            # or ticker batch prices it, instead of missing from equity
+            self.prices_at = None
+        # Full resum on balance events (also clears incremental float drift)
+        self.holdings_usd = sum(q * self.prices[s] for s, q in holdings.items() if s in self.prices)
+        self.balance_at = now
+        self._invalid = False
+        self.stats["balance_events"] += 1
+        self._changed()
+
+    def on_price(self, symbol: str, price: float):
+        """Last price of one symbol; ignored unless the account holds it."""
+        qty = self.holdings.get(symbol)
+        price = _num(price)
+        if qty is None or price <= 0:
+            return
+        old = self.prices.get(symbol)
+        if old == price:
+            return
+        self.holdings_usd += qty * (price - (old or 0.0))
+        self.prices[symbol] = price
+        self.stats["price_events"] += 1
+        self._changed()
+
+    def on_tickers(self, tickers: Dict[str, Dict[str, Any]], now: float):
+        """A ccxt tickers map: only the held symbols are read."""
+        for symbol in self.holdings:
+            t = tickers.get(symbol)
+            if t is not None:
+                self.on_price(symbol, t.get("last"))
+        if all(s in self.prices or s not in tickers for s in self.holdings):
+            self.prices_at = now
+
+    def invalidate(self):
+        """The balance changed on the exchange (an order was sent): refetch on the next read."""
+        self._invalid = True
+
+    # ------------------
+    # READS
+    # ------------------
+    def is_stale(self, now: float, max_age: float = VALUATION_MAX_AGE) -> bool:
+        return (self._invalid or self.balance_at is None or self.prices_at is None
+                or now - self.balance_at > max_age or now - self.prices_at > max_age)
+
+    async def refresh(self, now: float, force: bool = False):
+        async with self._lock:
+            if not force and not self.is_stale(now):
+                return  # another caller refreshed while we waited
+            balance = await self.exchange.fetch_balance()
+            self.on_balance(balance, now)
+            markets = getattr(self.exchange, "markets", None)
+            symbols = [s for s in self.holdings if not markets or s in markets]
+            tickers = await self.exchange.fetch_tickers(symbols) if symbols else {}
+            self.on_tickers(tickers, now)
+            self.prices_at = now  # symbols without a market stay unvalued, like before
+            self.stats["refreshes"] += 1
+            self.stats["forced"] += int(force)
+
+    async def get(self, now: float, max_age: float = VALUATION_MAX_AGE) -> Tuple[float, float]:
+        """(equity, free quote) no older than max_age seconds."""
+        if self.is_stale(now, max_age):
+            await self.refresh(now)
+        else:
+            self.stats["memory_hits"] += 1
+        return self.equity, self.free_quote
+
+    def metrics(self, now: float) -> Dict[str, Any]:
+        return {
+            "equity": self.equity,
+            "free": self.free_quote,
+            "holdings_usd": self.holdings_usd,
+            "held": len(self.holdings),
+            "priced": len(self.prices),
+            "balance_age_sec": None if self.balance_at is None else round(now - self.balance_at, 3),
+            "prices_age_sec": None if self.prices_at is None else round(now - self.prices_at, 3),
+            "stale": self.is_stale(now),
+            "version": self.version,
+            "max_age_sec": VALUATION_MAX_AGE,
+            **self.stats,
+        }